@@ -0,0 +1,85 @@
+# ruff: noqa: INP001
+"""Micro-benchmark of the envelope codecs over representative ``Event.serialize()`` payloads.
+
+Encodes and decodes small, medium and large event payloads with every codec whose library is
+installed, reporting the time per operation and the encoded size.
+
+Usage:
+    uv run --package stega_core --extra orjson --extra msgpack python scripts/bench_codec.py
+"""
+
+from __future__ import annotations
+
+import functools
+import timeit
+import uuid
+from dataclasses import dataclass
+from typing import Any, ClassVar
+
+from stega_core import EnvelopeCodecKind, Event, build_codec
+
+_NUMBER = 20_000
+
+
+@dataclass(frozen=True, kw_only=True)
+class PortfolioDeleted(Event):
+    topic: ClassVar[str] = "bench.portfolio_deleted"
+
+    portfolio_id: str
+
+
+@dataclass(frozen=True, kw_only=True)
+class PortfolioCreated(Event):
+    topic: ClassVar[str] = "bench.portfolio_created"
+
+    portfolio_id: str
+    name: str
+    allocations: list[dict[str, Any]]
+
+
+def payloads() -> dict[str, dict[str, Any]]:
+    correlation_id = str(uuid.uuid4())
+
+    def allocations(n: int) -> list[dict[str, Any]]:
+        return [{"symbol": f"SYM{i:04d}", "weight": 1 / n, "quantity": 10.5 * i} for i in range(n)]
+
+    return {
+        "small": PortfolioDeleted(correlation_id=correlation_id, portfolio_id=str(uuid.uuid4())).serialize(),
+        "medium": PortfolioCreated(
+            correlation_id=correlation_id,
+            portfolio_id=str(uuid.uuid4()),
+            name="Retirement",
+            allocations=allocations(10),
+        ).serialize(),
+        "large": PortfolioCreated(
+            correlation_id=correlation_id,
+            portfolio_id=str(uuid.uuid4()),
+            name="Index",
+            allocations=allocations(500),
+        ).serialize(),
+    }
+
+
+def main() -> None:
+    codecs = {}
+    for kind in EnvelopeCodecKind:
+        try:
+            codecs[kind] = build_codec(kind)
+        except RuntimeError as err:
+            print(f"skipping {kind}: {err}")  # noqa: T201
+
+    for size, payload in payloads().items():
+        for kind, codec in codecs.items():
+            encoded = codec.encode(payload)
+            assert codec.decode(encoded) == payload  # noqa: S101
+            number = _NUMBER // 50 if size == "large" else _NUMBER
+            encode = min(timeit.repeat(functools.partial(codec.encode, payload), number=number, repeat=5)) / number
+            decode = min(timeit.repeat(functools.partial(codec.decode, encoded), number=number, repeat=5)) / number
+            print(  # noqa: T201
+                f"{size:<7} {kind:<8} encode {encode * 1e6:9.2f} us  decode {decode * 1e6:9.2f} us  "
+                f"{len(encoded):7d} bytes"
+            )
+
+
+if __name__ == "__main__":
+    main()
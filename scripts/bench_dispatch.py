@@ -0,0 +1,122 @@
+# ruff: noqa: INP001
+"""Micro-benchmark of per-dispatch dependency resolution overhead in the message bus.
+
+Compares the reflective resolution path (``inspect.signature`` + ``get_type_hints`` on every
+provider for every dispatch) against the dispatch plans compiled at build time.
+
+Usage:
+    uv run --package stega_core python scripts/bench_dispatch.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import timeit
+from dataclasses import dataclass
+from typing import Any
+
+from stega_core import (
+    Dependency,
+    DependencyContainer,
+    DispatchScope,
+    Query,
+    QueryResponse,
+    QueryStatus,
+    Scope,
+    View,
+    bind_handler,
+)
+from stega_core.di import annotated_param_types
+
+_NUMBER = 50_000
+
+
+class SessionFactory:
+    pass
+
+
+class Registry:
+    pass
+
+
+class QueryContext:
+    def __init__(self, session_factory: SessionFactory, registry: Registry) -> None:
+        self.session_factory = session_factory
+        self.registry = registry
+
+
+@dataclass(frozen=True, kw_only=True)
+class PortfolioView(View):
+    portfolio_id: str
+
+
+@dataclass(frozen=True, kw_only=True)
+class GetPortfolio(Query[PortfolioView]):
+    portfolio_id: str
+
+
+async def get_portfolio(query: GetPortfolio, _qc: QueryContext) -> QueryResponse[PortfolioView]:
+    return QueryResponse(status=QueryStatus.OK, result=PortfolioView(portfolio_id=query.portfolio_id))
+
+
+def provide_query_context(session_factory: SessionFactory, registry: Registry) -> QueryContext:
+    return QueryContext(session_factory, registry)
+
+
+def reflective_bind(container: DependencyContainer, dep_types: dict[str, type]) -> dict[str, Any]:
+    # mirrors the pre-compilation resolution path: a fresh scope and reflection per provider
+    scope = DispatchScope(container)
+
+    def resolve(dep_type: type) -> object:
+        dep = container.get_dependency(dep_type)
+        if dep.scope is Scope.SINGLETON:
+            return container.resolve_singleton(dep_type)
+        if dep_type not in scope.resolved:
+            params = annotated_param_types(dep.provider)
+            scope.resolved[dep_type] = dep.provider(**{name: resolve(t) for name, t in params.items()})
+        return scope.resolved[dep_type]
+
+    return {name: resolve(t) for name, t in dep_types.items()}
+
+
+def main() -> None:
+    container = DependencyContainer(
+        [
+            Dependency(dep_type=SessionFactory, scope=Scope.SINGLETON, provider=SessionFactory),
+            Dependency(dep_type=Registry, scope=Scope.SINGLETON, provider=Registry),
+            Dependency(dep_type=QueryContext, scope=Scope.DISPATCH, provider=provide_query_context),
+        ]
+    )
+    binding = bind_handler(get_portfolio, Query)
+    plan = container.compile_plan(binding)
+    query = GetPortfolio(portfolio_id="bench")
+
+    async def dispatch_reflective() -> None:
+        deps = reflective_bind(container, binding.dep_types)
+        await binding.handler(query, **deps)
+
+    async def dispatch_planned() -> None:
+        deps, _ = plan.bind()
+        await plan.handler(query, **deps)
+
+    def run(dispatch: Any) -> float:  # noqa: ANN401
+        async def loop() -> None:
+            for _ in range(_NUMBER):
+                await dispatch()
+
+        return min(timeit.repeat(lambda: asyncio.run(loop()), number=1, repeat=5))
+
+    results = {
+        "resolve (reflective)": min(
+            timeit.repeat(lambda: reflective_bind(container, binding.dep_types), number=_NUMBER, repeat=5)
+        ),
+        "resolve (compiled plan)": min(timeit.repeat(plan.bind, number=_NUMBER, repeat=5)),
+        "dispatch (reflective)": run(dispatch_reflective),
+        "dispatch (compiled plan)": run(dispatch_planned),
+    }
+    for name, seconds in results.items():
+        print(f"{name:<28} {seconds / _NUMBER * 1e6:8.2f} us/op")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# ruff: noqa: INP001
+"""Micro-benchmark of request decoding over the portfolio contract messages.
+
+Compares the reflective ``marshal`` path (``get_type_hints`` + ``dataclasses.fields`` and a
+recursive ``coerce`` walk on every request) against the decoders compiled once per message type.
+
+Usage:
+    uv run --package stega_core --package stega_contracts python scripts/bench_marshal.py
+"""
+
+from __future__ import annotations
+
+import functools
+import timeit
+from dataclasses import MISSING, fields
+from types import UnionType
+from typing import Any, Union, get_args, get_origin, get_type_hints
+
+from stega_contracts.portfolio.command import CreatePortfolio, DeletePortfolio, UpdatePortfolio
+from stega_contracts.portfolio.query import GetPortfolio, ListPortfolios
+from stega_core import Message, marshal
+
+_NUMBER = 50_000
+
+
+def reflective_marshal(msg_type: type[Message], data: dict[str, Any]) -> Message:
+    # mirrors the pre-compilation decoding path: reflection on the message type per request
+    hints = get_type_hints(msg_type)
+    kwargs = {}
+    missing = []
+    for fld in fields(msg_type):
+        if fld.name in data:
+            kwargs[fld.name] = reflective_coerce(data[fld.name], hints[fld.name])
+        elif fld.default is MISSING and fld.default_factory is MISSING:
+            missing.append(fld.name)
+    if missing:
+        err_msg = f"missing required fields: {', '.join(missing)}"
+        raise ValueError(err_msg)
+    return msg_type(**kwargs)
+
+
+def reflective_coerce(value: Any, annotation: type) -> Any:  # noqa: ANN401, PLR0911
+    origin = get_origin(annotation)
+    if origin in (Union, UnionType):
+        if value is None:
+            return None
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return reflective_coerce(value, args[0])
+    if origin is list:
+        (inner,) = get_args(annotation) or (Any,)
+        return [reflective_coerce(val, inner) for val in value]
+    if origin is dict:
+        key_t, val_t = get_args(annotation) or (Any, Any)
+        return {reflective_coerce(k, key_t): reflective_coerce(v, val_t) for k, v in value.items()}
+    if annotation is Any or annotation is None:
+        return value
+    if annotation is bool:
+        return value if isinstance(value, bool) else str(value).strip().lower() in {"1", "true", "yes", "on"}
+    return value if isinstance(value, annotation) else annotation(value)
+
+
+def requests() -> dict[str, tuple[type[Message], dict[str, Any]]]:
+    assets = {f"SYM{i:03d}": 1 / 20 for i in range(20)}
+    return {
+        "CreatePortfolio": (CreatePortfolio, {"portfolio_id": "p1", "name": "Retirement", "assets": assets}),
+        "UpdatePortfolio": (UpdatePortfolio, {"portfolio_id": "p1", "name": "Index", "assets": None}),
+        "DeletePortfolio": (DeletePortfolio, {"portfolio_id": "p1"}),
+        "GetPortfolio": (GetPortfolio, {"portfolio_id": "p1"}),
+        "ListPortfolios": (ListPortfolios, {}),
+    }
+
+
+def main() -> None:
+    for name, (msg_type, data) in requests().items():
+        assert marshal(msg_type, data) == reflective_marshal(msg_type, data)  # noqa: S101
+        reflective = min(timeit.repeat(functools.partial(reflective_marshal, msg_type, data), number=_NUMBER, repeat=5))
+        compiled = min(timeit.repeat(functools.partial(marshal, msg_type, data), number=_NUMBER, repeat=5))
+        print(  # noqa: T201
+            f"{name:<16} reflective {reflective / _NUMBER * 1e6:7.2f} us  "
+            f"compiled {compiled / _NUMBER * 1e6:7.2f} us  {reflective / compiled:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
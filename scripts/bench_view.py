@@ -0,0 +1,66 @@
+# ruff: noqa: INP001
+"""Micro-benchmark of query response encoding over portfolio list views.
+
+Compares the generic ``dataclasses.asdict`` conversion followed by ``json.dumps`` against the
+envelope codecs, which encode views with encoders compiled once per view type (json, msgpack) or
+natively straight to bytes (orjson).
+
+Usage:
+    uv run --package stega_core --package stega_contracts --extra orjson --extra msgpack python scripts/bench_view.py
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import timeit
+from dataclasses import asdict
+from typing import Any
+
+from stega_contracts.portfolio.view import AssetView, PortfolioListView, PortfolioView
+from stega_core import EnvelopeCodecKind, build_codec
+
+_NUMBER = 500
+
+
+def views() -> dict[str, PortfolioListView]:
+    def build(portfolios: int, assets: int) -> PortfolioListView:
+        return PortfolioListView(
+            portfolios=[
+                PortfolioView(
+                    portfolio_id=f"p{i}",
+                    name=f"Portfolio {i}",
+                    assets=[AssetView(symbol=f"SYM{j:03d}", weight=1 / assets) for j in range(assets)],
+                )
+                for i in range(portfolios)
+            ]
+        )
+
+    return {"small": build(1, 5), "medium": build(20, 20), "large": build(100, 20)}
+
+
+def reflective_encode(view: PortfolioListView) -> bytes:
+    body: dict[str, Any] = {"ok": True, "msg": "OK", "result": asdict(view)}
+    return json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+
+def main() -> None:
+    codecs = {}
+    for kind in EnvelopeCodecKind:
+        try:
+            codecs[kind.value] = build_codec(kind)
+        except RuntimeError:
+            continue
+
+    for name, view in views().items():
+        body = {"ok": True, "msg": "OK", "result": view}
+        baseline = min(timeit.repeat(functools.partial(reflective_encode, view), number=_NUMBER, repeat=5))
+        line = f"{name:<8} asdict+json {baseline / _NUMBER * 1e6:9.2f} us"
+        for kind, codec in codecs.items():
+            elapsed = min(timeit.repeat(functools.partial(codec.encode, body), number=_NUMBER, repeat=5))
+            line += f"  {kind} {elapsed / _NUMBER * 1e6:9.2f} us ({baseline / elapsed:4.1f}x)"
+        print(line)  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# ruff: noqa: INP001
+"""Remove the direct exchange and work queues left behind by the move to topic routing.
+
+Before topic routing, services declared a durable direct exchange (``events`` by default) and durable
+``<exchange>.<service>`` work queues bound to it by exact topic. Redeclaring that exchange as a topic exchange
+fails with PRECONDITION_FAILED, so the topic exchange is declared under a new name (``stega.events`` by default)
+and every service gets fresh work queues named after it. Run this once every service is on the new version to
+delete the old queues and exchange. Queues still holding messages are kept unless ``--force`` is given.
+
+Usage:
+    SERVICE_BROKER_USER=... SERVICE_BROKER_PASS=... \\
+    uv run --package stega_core python scripts/migrate_topic_exchange.py \\
+        --service stega_portfolio --service stega_market_data [--exchange events] [--force]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+
+import aio_pika
+
+
+async def queue_depth(connection: aio_pika.abc.AbstractConnection, name: str) -> int | None:
+    # a passive declare of a missing queue closes the channel, so each check gets its own
+    channel = await connection.channel()
+    try:
+        queue = await channel.declare_queue(name, passive=True)
+    except aio_pika.exceptions.ChannelNotFoundEntity:
+        return None
+    else:
+        return queue.declaration_result.message_count
+    finally:
+        if not channel.is_closed:
+            await channel.close()
+
+
+async def migrate(exchange: str, services: list[str], *, force: bool) -> None:
+    connection = await aio_pika.connect(
+        host=os.environ.get("SERVICE_BROKER_HOST", "localhost"),
+        port=int(os.environ.get("SERVICE_BROKER_PORT", "5672")),
+        login=os.environ["SERVICE_BROKER_USER"],
+        password=os.environ["SERVICE_BROKER_PASS"],
+    )
+    async with connection:
+        kept = 0
+        for service in services:
+            name = f"{exchange}.{service}"
+            depth = await queue_depth(connection, name)
+            if depth is None:
+                print(f"{name}: not found")  # noqa: T201
+                continue
+            if depth and not force:
+                kept += 1
+                print(f"{name}: kept, {depth} messages left to drain")  # noqa: T201
+                continue
+            channel = await connection.channel()
+            await channel.queue_delete(name)
+            await channel.close()
+            print(f"{name}: deleted ({depth} messages)")  # noqa: T201
+
+        if kept:
+            print(f"{exchange}: kept while old queues still hold messages")  # noqa: T201
+            return
+        channel = await connection.channel()
+        await channel.exchange_delete(exchange)
+        await channel.close()
+        print(f"{exchange}: deleted")  # noqa: T201
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--exchange", default="events", help="name of the old direct exchange")
+    parser.add_argument("--service", action="append", required=True, help="service whose old work queue to delete")
+    parser.add_argument("--force", action="store_true", help="delete old queues even if they still hold messages")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.exchange, args.service, force=args.force))
+
+
+if __name__ == "__main__":
+    main()
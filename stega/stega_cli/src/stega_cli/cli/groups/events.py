@@ -1,5 +1,6 @@
 import asyncio
 import json
+from urllib.parse import quote
 
 import click
 import httpx
@@ -25,7 +26,7 @@ def watch(topic: str) -> None:
 
 async def _watch(topic: str) -> None:
     config = create_config()
-    url = f"{config.EDGE_SERVICE_URL}/api/events/{topic}"
+    url = f"{config.EDGE_SERVICE_URL}/api/events/{quote(topic, safe='*.')}"
     async with httpx.AsyncClient(timeout=_TIMEOUT) as client, client.stream("GET", url) as response:
         response.raise_for_status()
         async for event in decode(response.aiter_lines()):
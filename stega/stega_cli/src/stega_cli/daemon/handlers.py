@@ -17,10 +17,9 @@ if TYPE_CHECKING:
     from stega_core import Event
 
 
-SUBSCRIPTIONS: list[type[Event]] = [
-    PortfolioCreated,
-    PortfolioUpdated,
-    PortfolioDeleted,
+# topic patterns tailed from the edge, one sse stream follows every portfolio event
+TAIL_TOPICS: list[str] = [
+    "portfolio.*",
 ]
 
 
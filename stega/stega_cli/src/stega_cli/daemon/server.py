@@ -6,12 +6,12 @@ from contextlib import suppress
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-from stega_core import marshal, read_frame, write_frame
+from stega_core import JSON_CODEC, marshal, read_codec_frame, write_frame
 
 from stega_cli.bootstrap import build_edge_port
 from stega_cli.commands import MESSAGE_TYPES
 from stega_cli.daemon.dispatch import RequestDispatcher
-from stega_cli.daemon.handlers import SUBSCRIPTIONS
+from stega_cli.daemon.handlers import TAIL_TOPICS
 from stega_cli.daemon.tail import run_tail
 from stega_cli.daemon.worker import run_writer
 from stega_cli.ports.cache import db
@@ -24,15 +24,17 @@ async def handle_client(
     reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
     dispatcher: RequestDispatcher,
 ) -> None:
+    # answer in whichever codec the client framed its request with
+    codec = JSON_CODEC
     try:
-        frame = await read_frame(reader)
+        codec, frame = await read_codec_frame(reader)
         msg_type = MESSAGE_TYPES[frame["msg_type"]]
         result = await dispatcher.handle(marshal(msg_type, frame["payload"]))
         response = {"ok": result.ok, "msg": result.msg, "result": result.result}
     except Exception as exc:
         response = {"ok": False, "msg": f"{type(exc).__name__}: {exc}", "result": None}
     try:
-        await write_frame(writer, response)
+        await write_frame(writer, response, codec)
     finally:
         writer.close()
         with suppress(ConnectionError):
@@ -57,5 +59,5 @@ async def serve(config: CliConfig) -> None:
     async with asyncio.TaskGroup() as tasks:
         tasks.create_task(server.serve_forever())
         tasks.create_task(run_writer(queue, port_factory))
-        for event_type in SUBSCRIPTIONS:
-            tasks.create_task(run_tail(config, event_type.topic))
+        for topic in TAIL_TOPICS:
+            tasks.create_task(run_tail(config, topic))
@@ -3,12 +3,12 @@ from __future__ import annotations
 import asyncio
 import json
 from typing import TYPE_CHECKING
+from urllib.parse import quote
 
 import httpx
 from stega_core import Event, decode
 
 from stega_cli.daemon.handlers import CACHE_HANDLERS
-from stega_cli.ports.cache import actions as action_db
 from stega_cli.ports.cache import db
 
 if TYPE_CHECKING:
@@ -22,15 +22,22 @@ _TIMEOUT: httpx.Timeout = httpx.Timeout(5.0, read=None)
 
 
 async def run_tail(config: CliConfig, topic: str) -> None:
-    url = f"{config.EDGE_SERVICE_URL}/api/events/{topic}" backoff = _BACKOFF_MIN
+    # "#" in topic patterns would start the url fragment
+    url = f"{config.EDGE_SERVICE_URL}/api/events/{quote(topic, safe='*.')}"
+    backoff = _BACKOFF_MIN
+    last_event_id: int | None = None
     async with httpx.AsyncClient(timeout=_TIMEOUT) as client:
         while True:
+            # resume after the last applied event, the edge replays what was missed meanwhile
+            headers = {} if last_event_id is None else {"Last-Event-ID": str(last_event_id)}
             try:
-                async with client.stream("GET", url) as response:
+                async with client.stream("GET", url, headers=headers) as response:
                     if response.is_success:
                         backoff = _BACKOFF_MIN
                         async for event in decode(response.aiter_lines()):
                             await _apply(config, json.loads(event.data))
+                            if event.sse_id is not None:
+                                last_event_id = event.sse_id
                     elif response.is_client_error:
                         response.raise_for_status()
                     else:
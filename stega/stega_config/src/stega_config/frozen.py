@@ -380,32 +380,3 @@ def get_private_class_attributes(cls):
         and not callable(getattr(cls, attr))
         and attr.startswith("__")  # include dunder methods and private attributes
     ]
-
-
-def _is_truthy(value: bool | int | str) -> bool:
-    """Checks if a value is truthy or not.
-
-    NOTE: The inputs below have the following truthy values (all str values
-    are considered case insensitive):
-        - 1         (int) - True
-        - "1"       (str) - True
-        - "on"      (str) - True
-        - "yes"     (str) - True
-        - "true"    (str) - True
-        - "enabled" (str) - True
-
-        - 0             (int) - False
-        - "0"           (str) - False
-        - "off"         (str) - False
-        - "no"          (str) - False
-        - "false"       (str) - False
-        - "disabled"    (str) - False
-    """
-    if isinstance(value, bool):
-        return value
-    if isinstance(value, int):
-        return value != 0
-    if isinstance(value, str):
-        value = value.strip().lower()
-        return value in {"1", "on", "yes", "true", "enabled"}
-    return False  # Default to False for any other type
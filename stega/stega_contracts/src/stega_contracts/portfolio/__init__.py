@@ -38,6 +38,7 @@ CONTRACT = ServiceContract(
             runtime=PortfolioServiceRuntime.HTTP,
             base_url_field="PORTFOLIO_SERVICE_URL",
             routes=ROUTES,
+            passthrough=True,
         ),
     ],
 )
@@ -11,7 +11,8 @@ class AssetAllocation(TypedDict):
 
 @dataclass(frozen=True, kw_only=True)
 class PortfolioCreated(Event):
-    topic: ClassVar[str] = "portfolio_created"
+    topic: ClassVar[str] = "portfolio.created"
+    partition_key: ClassVar[str] = "portfolio_id"
     portfolio_id: str
     name: str
     assets: list[AssetAllocation]
@@ -19,11 +20,13 @@ class PortfolioCreated(Event):
 
 @dataclass(frozen=True, kw_only=True)
 class PortfolioDeleted(Event):
-    topic: ClassVar[str] = "portfolio_deleted"
+    topic: ClassVar[str] = "portfolio.deleted"
+    partition_key: ClassVar[str] = "portfolio_id"
     portfolio_id: str
 
 
 @dataclass(frozen=True, kw_only=True)
 class PortfolioUpdated(Event):
-    topic: ClassVar[str] = "portfolio_updated"
+    topic: ClassVar[str] = "portfolio.updated"
+    partition_key: ClassVar[str] = "portfolio_id"
     portfolio_id: str
@@ -10,23 +10,64 @@ from stega_core.bootstrap import (
 from stega_core.broker import (
     ClientBroker,
     Envelope,
+    EnvelopeHandler,
+    EventLogBroker,
+    EventLogOptions,
+    EventLogStats,
     InMemoryBroker,
+    InMemoryBrokerStats,
     MessageBroker,
     RabbitMqBroker,
     RabbitMqConnectionParameters,
+    RabbitMqConsumeOptions,
+    RabbitMqConsumeStats,
+    RabbitMqPublishOptions,
+    RabbitMqPublishStats,
     ServiceBroker,
+    SlowConsumerPolicy,
+    TopicTrie,
+    is_topic_pattern,
     make_client_publish_handler,
     make_service_publish_handler,
+    topic_matches,
+    validate_topic_pattern,
 )
 from stega_core.bus import (
     BusConfig,
+    CommandOverflowPolicy,
+    EventPartitionStats,
     MessageBus,
 )
+from stega_core.cache import (
+    CacheRule,
+    InMemoryQueryCache,
+    QueryCache,
+    QueryCacheStats,
+)
 from stega_core.cli import (
     CliCommand,
     CliParam,
     ParamKind,
 )
+from stega_core.codec import (
+    JSON_CODEC,
+    EnvelopeCodec,
+    EnvelopeCodecKind,
+    JsonCodec,
+    MsgpackCodec,
+    OrjsonCodec,
+    build_codec,
+    codec_for_content_type,
+    codec_for_frame_flag,
+    compile_encoder,
+    encode_default,
+    text_codec,
+)
+from stega_core.completion import (
+    CommandCompletion,
+    CompletionRegistry,
+    CompletionStatus,
+)
 from stega_core.config import (
     ClientBrokerConfig,
     ReaderConfig,
@@ -34,6 +75,7 @@ from stega_core.config import (
     ServiceBrokerConfig,
     ServiceConfig,
 )
+from stega_core.consumer import EventConsumer, EventConsumerStats
 from stega_core.context import (
     current_context,
     set_context,
@@ -41,17 +83,20 @@ from stega_core.context import (
 from stega_core.di import (
     Dependency,
     DependencyContainer,
+    DispatchPlan,
     DispatchScope,
     MessageHandler,
     MessageHandlerBinding,
     Scope,
     bind_handler,
+    cpu_bound,
 )
 from stega_core.domain import (
     Aggregate,
     AppError,
     ConflictError,
     DomainEntity,
+    OverloadedError,
     ResourceNotFoundError,
 )
 from stega_core.hosting import (
@@ -59,11 +104,20 @@ from stega_core.hosting import (
     Origin,
     Route,
     ServerSentEvent,
+    SseEncoding,
     SseRoute,
+    SseStream,
+    SseStreams,
+    SseStreamStats,
+    TopicHub,
+    TopicHubStats,
     Wire,
     build_quart_app,
+    compile_decoder,
     decode,
     marshal,
+    negotiate_encoding,
+    run_hypercorn,
     serve_hypercorn,
 )
 from stega_core.logging import (
@@ -72,6 +126,7 @@ from stega_core.logging import (
 from stega_core.message import (
     Command,
     CommandResponse,
+    EncodedView,
     Event,
     EventDispatch,
     Message,
@@ -81,6 +136,25 @@ from stega_core.message import (
     Response,
     SubmissionStatus,
     View,
+    get_correlation_id,
+)
+from stega_core.metrics import (
+    BusMetrics,
+    InMemoryBusMetrics,
+    MetricsCollector,
+    NoopBusMetrics,
+    PrometheusText,
+)
+from stega_core.outbox import (
+    OutboxRecord,
+    OutboxRelay,
+    OutboxRelayStats,
+    SqlAlchemyOutbox,
+    build_outbox_table,
+)
+from stega_core.pool import (
+    HandlerPoolStats,
+    HandlerProcessPool,
 )
 from stega_core.query_context import (
     AbstractQueryContext,
@@ -120,15 +194,20 @@ from stega_core.service import (
     UnixSocketChannel,
     UnixSocketServiceSpec,
     UnixSocketTransport,
+    read_codec_frame,
     read_frame,
     write_frame,
 )
+from stega_core.singleflight import (
+    SingleFlight,
+)
 from stega_core.uow import (
     AbstractUnitOfWork,
     SqlAlchemyUnitOfWork,
 )
 
 __all__ = [
+    "JSON_CODEC",
     "AbstractInMemoryRepository",
     "AbstractQueryContext",
     "AbstractReader",
@@ -141,6 +220,8 @@ __all__ = [
     "AppError",
     "Binding",
     "BusConfig",
+    "BusMetrics",
+    "CacheRule",
     "Channel",
     "CliCommand",
     "CliParam",
@@ -148,38 +229,74 @@ __all__ = [
     "ClientBrokerConfig",
     "ClientBrokerRuntime",
     "Command",
+    "CommandCompletion",
+    "CommandOverflowPolicy",
     "CommandRegistry",
     "CommandResponse",
+    "CompletionRegistry",
+    "CompletionStatus",
     "ConflictError",
     "Dependency",
     "DependencyContainer",
+    "DispatchPlan",
     "DispatchScope",
     "DomainEntity",
+    "EncodedView",
     "Envelope",
+    "EnvelopeCodec",
+    "EnvelopeCodecKind",
+    "EnvelopeHandler",
     "Event",
+    "EventConsumer",
+    "EventConsumerStats",
     "EventDispatch",
+    "EventLogBroker",
+    "EventLogOptions",
+    "EventLogStats",
+    "EventPartitionStats",
     "EventRegistry",
+    "HandlerPoolStats",
+    "HandlerProcessPool",
     "HttpChannel",
     "HttpServiceSpec",
     "HttpTransport",
     "HypercornRuntimeFields",
     "InMemoryBroker",
+    "InMemoryBrokerStats",
+    "InMemoryBusMetrics",
     "InMemoryChannel",
+    "InMemoryQueryCache",
     "InMemoryServiceSpec",
     "InMemoryTransport",
+    "JsonCodec",
     "Message",
     "MessageBroker",
     "MessageBus",
     "MessageHandler",
     "MessageHandlerBinding",
+    "MetricsCollector",
+    "MsgpackCodec",
+    "NoopBusMetrics",
     "Origin",
+    "OrjsonCodec",
+    "OutboxRecord",
+    "OutboxRelay",
+    "OutboxRelayStats",
+    "OverloadedError",
     "ParamKind",
+    "PrometheusText",
     "Query",
+    "QueryCache",
+    "QueryCacheStats",
     "QueryRegistry",
     "QueryResponse",
     "QueryStatus",
     "RabbitMqBroker",
     "RabbitMqConnectionParameters",
+    "RabbitMqConsumeOptions",
+    "RabbitMqConsumeStats",
+    "RabbitMqPublishOptions",
+    "RabbitMqPublishStats",
     "ReaderConfig",
     "ReaderFactory",
     "ReaderRegistry",
@@ -204,26 +321,52 @@ __all__ = [
     "ServiceContract",
     "ServiceResult",
     "ServiceSpec",
+    "SingleFlight",
+    "SlowConsumerPolicy",
+    "SqlAlchemyOutbox",
     "SqlAlchemyQueryContext",
     "SqlAlchemyUnitOfWork",
+    "SseEncoding",
     "SseRoute",
+    "SseStream",
+    "SseStreamStats",
+    "SseStreams",
     "StegaServicePort",
     "SubmissionStatus",
+    "TopicHub",
+    "TopicHubStats",
+    "TopicTrie",
     "UnixSocketChannel",
     "UnixSocketServiceSpec",
     "UnixSocketTransport",
     "View",
     "Wire",
     "bind_handler",
+    "build_codec",
+    "build_outbox_table",
     "build_quart_app",
+    "codec_for_content_type",
+    "codec_for_frame_flag",
+    "compile_decoder",
+    "compile_encoder",
+    "cpu_bound",
     "current_context",
     "decode",
+    "encode_default",
+    "get_correlation_id",
     "init_logger",
+    "is_topic_pattern",
     "make_client_publish_handler",
     "make_service_publish_handler",
     "marshal",
+    "negotiate_encoding",
+    "read_codec_frame",
     "read_frame",
+    "run_hypercorn",
     "serve_hypercorn",
     "set_context",
+    "text_codec",
+    "topic_matches",
+    "validate_topic_pattern",
     "write_frame",
 ]
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import asyncio
+import dataclasses
+import functools
 from collections.abc import Callable
 from contextlib import AsyncExitStack, asynccontextmanager
 from enum import Flag, auto
+from time import perf_counter
 from typing import TYPE_CHECKING, Any
 
 from stega_core.broker import (
@@ -12,11 +16,15 @@ from stega_core.broker import (
     make_service_publish_handler,
 )
 from stega_core.bus import (
+    BusConfig,
     MessageBus,
 )
+from stega_core.codec import JSON_CODEC
+from stega_core.consumer import EventConsumer
 from stega_core.di import (
     Dependency,
     DependencyContainer,
+    Lifecycle,
     MessageHandler,
     Scope,
     bind_handler,
@@ -26,6 +34,9 @@ from stega_core.message import (
     Event,
     Query,
 )
+from stega_core.metrics import MetricsCollector, PrometheusText
+from stega_core.outbox import OutboxRelay
+from stega_core.pool import HandlerProcessPool
 from stega_core.query_context import (
     AbstractQueryContext,
 )
@@ -38,6 +49,7 @@ from stega_core.registry import (
 )
 from stega_core.uow import (
     AbstractUnitOfWork,
+    SqlAlchemyUnitOfWork,
 )
 
 if TYPE_CHECKING:
@@ -46,6 +58,10 @@ if TYPE_CHECKING:
 
     from stega_config import BaseConfig
 
+    from stega_core.cache import QueryCache
+    from stega_core.codec import EnvelopeCodec
+    from stega_core.metrics import BusMetrics
+    from stega_core.outbox import SqlAlchemyOutbox
     from stega_core.reader import (
         AbstractReader,
     )
@@ -95,6 +111,7 @@ class ServiceBrokerRuntime(RuntimeFlag):
 class ClientBrokerRuntime(RuntimeFlag):
     MEMORY = auto()
     RABBITMQ = auto()
+    LOG = auto()
 
 
 class ServiceBuilder:
@@ -133,6 +150,8 @@ class ServiceBuilder:
         self._event_handlers: list[MessageHandler] = []
         self._service_events: list[Event] = []
         self._client_events: list[Event] = []
+        # client events published by a relay instead of one publish handler per event
+        self._client_events_relayed = False
 
         # service ports
         self._service_ports: dict[type[StegaServicePort], tuple[str, dict[RuntimeFlag, ServiceSpec]]] = {}
@@ -140,21 +159,92 @@ class ServiceBuilder:
         # generic dependencies
         self._dependencies: list[Dependency] = []
 
+        # message bus tuning
+        self._bus_config: BusConfig | None = None
+        self._query_cache: QueryCache | None = None
+        self._handler_pool_workers: int | None = None
+        self._bus_metrics: BusMetrics | None = None
+
+        # default bound on starting each lifecycle resource
+        self._start_timeout_seconds: float | None = None
+
+        # transactional outbox, replaces the service publish handlers when set
+        self._outbox: SqlAlchemyOutbox | None = None
+        self._outbox_relay_options: dict[str, Any] = {}
+
+        # wire format for sse streams and service responses
+        self._codec: EnvelopeCodec = JSON_CODEC
+
+        # feeds events consumed from the service broker into the bus when set
+        self._event_consumer_options: dict[str, Any] | None = None
+
     def with_dependency[DepT](
         self,
         dep_type: type[DepT],
         scope: Scope,
         provider: Callable[[], DepT],
+        start_timeout_seconds: float | None = None,
     ) -> ServiceBuilder:
         self._dependencies.append(
             Dependency(
                 dep_type=dep_type,
                 scope=scope,
                 provider=provider,
+                start_timeout_seconds=start_timeout_seconds,
             )
         )
         return self
 
+    def with_start_timeout(self, seconds: float) -> ServiceBuilder:
+        self._start_timeout_seconds = seconds
+        return self
+
+    def with_codec(self, codec: EnvelopeCodec) -> ServiceBuilder:
+        self._codec = codec
+        return self
+
+    def with_bus_config(self, bus_config: BusConfig) -> ServiceBuilder:
+        self._bus_config = bus_config
+        return self
+
+    def with_query_cache(self, query_cache: QueryCache) -> ServiceBuilder:
+        self._query_cache = query_cache
+        return self
+
+    def with_bus_metrics(self, metrics: BusMetrics) -> ServiceBuilder:
+        self._bus_metrics = metrics
+        return self
+
+    def with_handler_pool(self, max_workers: int | None = None) -> ServiceBuilder:
+        self._handler_pool_workers = max_workers
+        return self
+
+    def with_outbox(
+        self,
+        outbox: SqlAlchemyOutbox,
+        batch_size: int = 100,
+        poll_interval_seconds: float = 1.0,
+        retention_seconds: float = 3600.0,
+    ) -> ServiceBuilder:
+        self._outbox = outbox
+        self._outbox_relay_options = {
+            "batch_size": batch_size,
+            "poll_interval_seconds": poll_interval_seconds,
+            "retention_seconds": retention_seconds,
+        }
+        return self
+
+    def with_event_consumer(
+        self,
+        topics: list[str] | None = None,
+        concurrency: int = 64,
+    ) -> ServiceBuilder:
+        self._event_consumer_options = {
+            "topics": topics,
+            "concurrency": concurrency,
+        }
+        return self
+
     def with_repository_runtime(self, runtime_field: str) -> ServiceBuilder:
         self._repo_runtime_field = runtime_field
         return self
@@ -245,8 +335,9 @@ class ServiceBuilder:
         self._service_events = events
         return self
 
-    def with_client_events(self, events: list[Event]) -> ServiceBuilder:
+    def with_client_events(self, events: list[Event], *, relayed: bool = False) -> ServiceBuilder:
         self._client_events = events
+        self._client_events_relayed = relayed
         return self
 
     def with_service(
@@ -263,7 +354,7 @@ class ServiceBuilder:
             self.with_service(c.port_base, c.runtime_field, c.specs)
         return self
 
-    def build(self, logger: logging.Logger) -> Service:  # noqa: C901
+    def build(self, logger: logging.Logger) -> Service:  # noqa: C901, PLR0912, PLR0915
         # track dependencies
         deps = []
 
@@ -307,6 +398,17 @@ class ServiceBuilder:
             msg = "All client broker related constructs must be set if one is."
             raise RuntimeError(msg)
 
+        # validate state kept per serving process
+        workers = getattr(self._config, "WORKERS", 1)
+        if workers > 1 and (local := self._process_local_state()):
+            msg = f"WORKERS={workers} cannot be combined with {', '.join(local)}, every worker would keep its own copy."
+            raise RuntimeError(msg)
+
+        # validate outbox
+        if self._outbox is not None and not (all(repo_build_settings) and all(service_broker_settings)):
+            msg = "An outbox requires both repository and service broker constructs to be set."
+            raise RuntimeError(msg)
+
         # construct repositories
         if all(repo_build_settings):
             uow_session_factory = self._build_session_factory(
@@ -321,6 +423,12 @@ class ServiceBuilder:
                 self._repo_runtime_field,
                 self._uow_classes,
             )
+            if self._outbox is not None:
+                if not issubclass(uow_factory, SqlAlchemyUnitOfWork):
+                    msg = f"An outbox requires a SqlAlchemyUnitOfWork, got {uow_factory.__name__}"
+                    raise RuntimeError(msg)
+                uow_factory = functools.partial(uow_factory, outbox=self._outbox)
+                deps.append(self._build_outbox_relay_dependency(uow_session_factory, self._outbox))
             deps.append(
                 Dependency(
                     dep_type=AbstractUnitOfWork,
@@ -409,6 +517,27 @@ class ServiceBuilder:
                 )
             )
 
+        # construct a process pool only when some handler needs one
+        bindings = [
+            *(command_registry.get(t) for t in command_registry.message_types),
+            *(query_registry.get(t) for t in query_registry.message_types),
+            *(b for t in event_registry.message_types for b in event_registry.get(t)),
+        ]
+        needs_handler_pool = any(b.cpu_bound for b in bindings)
+        if needs_handler_pool:
+            deps.append(
+                Dependency(
+                    dep_type=HandlerProcessPool,
+                    scope=Scope.SINGLETON,
+                    provider=lambda: HandlerProcessPool(self._handler_pool_workers),
+                )
+            )
+
+        # completions are only looked up in the process that ran the command, tracking can be switched off
+        bus_config = self._bus_config
+        if not getattr(self._config, "COMMAND_COMPLETIONS", True):
+            bus_config = dataclasses.replace(bus_config or BusConfig(), completion_maxsize=0)
+
         # construct container dependencies
         def _provide_message_bus(container: DependencyContainer) -> MessageBus:
             return MessageBus(
@@ -416,6 +545,10 @@ class ServiceBuilder:
                 query_registry=query_registry,
                 event_registry=event_registry,
                 container=container,
+                config=bus_config,
+                query_cache=self._query_cache,
+                handler_pool=container.resolve_singleton(HandlerProcessPool) if needs_handler_pool else None,
+                metrics=self._bus_metrics,
             )
 
         deps.append(
@@ -423,15 +556,44 @@ class ServiceBuilder:
                 dep_type=MessageBus,
                 scope=Scope.SINGLETON,
                 provider=_provide_message_bus,
-                requires=(ServiceBroker, ClientBroker),
+                requires=(ServiceBroker, ClientBroker, HandlerProcessPool),
             )
         )
 
+        # construct the consumer of service broker events
+        if all(service_broker_settings) and self._event_consumer_options is not None:
+            deps.append(self._build_event_consumer_dependency())
+
         # register custom dependencies
         deps.extend(self._dependencies)
 
         container = DependencyContainer(deps)
-        return Service(container=container, logger=logger)
+        return Service(
+            container=container,
+            logger=logger,
+            start_timeout_seconds=self._start_timeout_seconds,
+            codec=self._codec,
+            client_topics=frozenset(event_type.topic for event_type in self._client_events),
+        )
+
+    def _process_local_state(self) -> list[str]:
+        local = []
+        if self._query_cache is not None:
+            local.append("a query cache (QUERY_CACHE)")
+        if self._command_handlers and getattr(self._config, "COMMAND_COMPLETIONS", True):
+            local.append("command completions (COMMAND_COMPLETIONS)")
+        # an in-memory client broker is fine per worker, every worker relays all client events into its own
+        if (
+            self._service_broker_runtime_field is not None
+            and getattr(self._config, self._service_broker_runtime_field, None) == ServiceBrokerRuntime.MEMORY
+        ):
+            local.append(f"an in-memory broker ({self._service_broker_runtime_field})")
+        if (
+            self._client_broker_runtime_field is not None
+            and getattr(self._config, self._client_broker_runtime_field, None) == ClientBrokerRuntime.LOG
+        ):
+            local.append(f"an event log broker ({self._client_broker_runtime_field})")
+        return local
 
     def _build_session_factory(
         self,
@@ -491,6 +653,38 @@ class ServiceBuilder:
     ) -> Callable[[BaseConfig], ServiceBroker | ClientBroker]:
         return self._select(runtime_field, broker_factories)
 
+    def _build_outbox_relay_dependency(
+        self,
+        session_factory: Callable[[], Any],
+        outbox: SqlAlchemyOutbox,
+    ) -> Dependency:
+        def provider(broker: ServiceBroker) -> OutboxRelay:
+            return OutboxRelay(session_factory, outbox, broker, **self._outbox_relay_options)
+
+        return Dependency(
+            dep_type=OutboxRelay,
+            scope=Scope.SINGLETON,
+            provider=provider,
+            requires=(ServiceBroker,),
+        )
+
+    def _build_event_consumer_dependency(self) -> Dependency:
+        options = dict(self._event_consumer_options)
+        own_topics = {event_type.topic for event_type in self._service_events}
+
+        def provider(bus: MessageBus, broker: ServiceBroker) -> EventConsumer:
+            # events this service publishes were already dispatched when raised, consuming them would repeat that
+            if options["topics"] is None:
+                options["topics"] = bus.consumed_topics - own_topics
+            return EventConsumer(bus, broker, **options)
+
+        return Dependency(
+            dep_type=EventConsumer,
+            scope=Scope.SINGLETON,
+            provider=provider,
+            requires=(MessageBus, ServiceBroker),
+        )
+
     def _build_command_registry(self, command_handlers: list[MessageHandler]) -> CommandRegistry:
         registry = CommandRegistry()
         for handler in command_handlers:
@@ -515,12 +709,13 @@ class ServiceBuilder:
     ) -> EventRegistry:
         registry = EventRegistry()
 
-        for event_type in service_events:
+        # with an outbox, service events are published by its relay once committed
+        for event_type in service_events if self._outbox is None else []:
             handler = make_service_publish_handler(event_type)
             binding = bind_handler(handler, Event)
             registry.register(binding.msg_type, binding)
 
-        for event_type in client_events:
+        for event_type in client_events if not self._client_events_relayed else []:
             handler = make_client_publish_handler(event_type)
             binding = bind_handler(handler, Event)
             registry.register(binding.msg_type, binding)
@@ -553,9 +748,15 @@ class Service:
         self,
         container: DependencyContainer,
         logger: logging.Logger,
+        start_timeout_seconds: float | None = None,
+        codec: EnvelopeCodec = JSON_CODEC,
+        client_topics: frozenset[str] = frozenset(),
     ) -> None:
         self._container = container
         self._logger = logger
+        self._start_timeout_seconds = start_timeout_seconds
+        self._codec = codec
+        self._client_topics = client_topics
         self._bus = self._container.resolve_singleton(MessageBus)
         self._service_broker: ServiceBroker | None = self._resolve_broker(ServiceBroker)
         self._client_broker: ClientBroker | None = self._resolve_broker(ClientBroker)
@@ -568,6 +769,14 @@ class Service:
     def bus(self) -> MessageBus:
         return self._bus
 
+    @property
+    def codec(self) -> EnvelopeCodec:
+        return self._codec
+
+    @property
+    def client_topics(self) -> frozenset[str]:
+        return self._client_topics
+
     @property
     def service_broker(self) -> ServiceBroker:
         if self._service_broker is None:
@@ -582,14 +791,60 @@ class Service:
             raise RuntimeError(msg)
         return self._client_broker
 
+    def render_metrics(self, *collectors: MetricsCollector) -> str:
+        out = PrometheusText()
+        for instance in self._container.singletons():
+            if isinstance(instance, MetricsCollector):
+                instance.collect_metrics(out)
+        for collector in collectors:
+            collector.collect_metrics(out)
+        return out.render()
+
     @asynccontextmanager
     async def lifespan(self) -> AsyncIterator[Service]:
         async with AsyncExitStack() as stack:
-            for resource in self._container.lifecycle_singletons():
-                await resource.start()
-                stack.push_async_callback(resource.stop)
+            started_at = perf_counter()
+            report: list[str] = []
+            # resources of a level only depend on earlier levels, so each level starts concurrently
+            for index, level in enumerate(self._container.lifecycle_levels()):
+                results = await asyncio.gather(
+                    *(self._start_resource(dep, resource) for dep, resource in level),
+                    return_exceptions=True,
+                )
+                started = [
+                    resource
+                    for (_, resource), result in zip(level, results, strict=True)
+                    if not isinstance(result, BaseException)
+                ]
+                # callbacks unwind in reverse, stopping levels from the last started back to the first
+                stack.push_async_callback(self._stop_resources, started)
+                for result in results:
+                    if isinstance(result, BaseException):
+                        raise result
+                timings = ", ".join(
+                    f"{dep.dep_type.__name__} {seconds:.3f}s" for (dep, _), seconds in zip(level, results, strict=True)
+                )
+                report.append(f"level {index} [{timings}]")
+
+            self._logger.info("Started service in %.3fs: %s", perf_counter() - started_at, "; ".join(report))
             yield self
 
+    async def _start_resource(self, dep: Dependency, resource: Lifecycle) -> float:
+        timeout = dep.start_timeout_seconds if dep.start_timeout_seconds is not None else self._start_timeout_seconds
+        started_at = perf_counter()
+        try:
+            await asyncio.wait_for(resource.start(), timeout=timeout)
+        except TimeoutError as err:
+            msg = f"{dep.dep_type.__name__} did not start within {timeout}s"
+            raise TimeoutError(msg) from err
+        return perf_counter() - started_at
+
+    async def _stop_resources(self, resources: list[Lifecycle]) -> None:
+        results = await asyncio.gather(*(resource.stop() for resource in resources), return_exceptions=True)
+        for resource, result in zip(resources, results, strict=True):
+            if isinstance(result, Exception):
+                self._logger.error("Failed to stop %s: %s", type(resource).__name__, result)
+
     def _resolve_broker(self, broker_cls: type[ServiceBroker | ClientBroker]) -> ServiceBroker | ClientBroker | None:
         try:
             return self._container.resolve_singleton(broker_cls)
@@ -1,25 +1,46 @@
 from stega_core.broker.base import (
     ClientBroker,
     Envelope,
+    EnvelopeHandler,
     MessageBroker,
     ServiceBroker,
     make_client_publish_handler,
     make_service_publish_handler,
 )
-from stega_core.broker.memory import InMemoryBroker
+from stega_core.broker.log import EventLogBroker, EventLogOptions, EventLogStats
+from stega_core.broker.memory import InMemoryBroker, InMemoryBrokerStats, SlowConsumerPolicy
 from stega_core.broker.rabbitmq import (
     RabbitMqBroker,
     RabbitMqConnectionParameters,
+    RabbitMqConsumeOptions,
+    RabbitMqConsumeStats,
+    RabbitMqPublishOptions,
+    RabbitMqPublishStats,
 )
+from stega_core.broker.topic import TopicTrie, is_topic_pattern, topic_matches, validate_topic_pattern
 
 __all__ = [
     "ClientBroker",
     "Envelope",
+    "EnvelopeHandler",
+    "EventLogBroker",
+    "EventLogOptions",
+    "EventLogStats",
     "InMemoryBroker",
+    "InMemoryBrokerStats",
     "MessageBroker",
     "RabbitMqBroker",
     "RabbitMqConnectionParameters",
+    "RabbitMqConsumeOptions",
+    "RabbitMqConsumeStats",
+    "RabbitMqPublishOptions",
+    "RabbitMqPublishStats",
     "ServiceBroker",
+    "SlowConsumerPolicy",
+    "TopicTrie",
+    "is_topic_pattern",
     "make_client_publish_handler",
     "make_service_publish_handler",
+    "topic_matches",
+    "validate_topic_pattern",
 ]
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 from abc import ABC, abstractmethod
 from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
 from dataclasses import dataclass
@@ -11,6 +13,11 @@ from stega_core.message import Event
 class Envelope[PayloadT]:
     topic: str
     payload: PayloadT
+    # position in a durable log, only set by brokers that retain what they deliver
+    offset: int | None = None
+
+
+type EnvelopeHandler[PayloadT] = Callable[[Envelope[PayloadT]], Awaitable[None]]
 
 
 class MessageBroker[InT, OutT](ABC):
@@ -23,9 +30,44 @@ class MessageBroker[InT, OutT](ABC):
     @abstractmethod
     async def publish(self, envelope: Envelope[OutT]) -> None: ...
 
+    async def publish_many(self, envelopes: Iterable[Envelope[OutT]]) -> None:
+        for envelope in envelopes:
+            await self.publish(envelope)
+
     @abstractmethod
     async def subscribe(self, topics: str | Iterable[str]) -> AsyncIterator[Envelope[InT]]: ...
 
+    async def consume(
+        self,
+        topics: str | Iterable[str],
+        handler: EnvelopeHandler[InT],
+        *,
+        concurrency: int | None = None,
+    ) -> None:
+        # like a broker without acks, a failed envelope is dropped and consumption carries on
+        async def handle(envelope: Envelope[InT]) -> None:
+            with contextlib.suppress(Exception):
+                await handler(envelope)
+
+        if concurrency is None or concurrency <= 1:
+            async for envelope in self.subscribe(topics):
+                await handle(envelope)
+            return
+
+        limit = asyncio.Semaphore(concurrency)
+        handlers: set[asyncio.Task] = set()
+        try:
+            async for envelope in self.subscribe(topics):
+                await limit.acquire()
+                task = asyncio.create_task(handle(envelope))
+                handlers.add(task)
+                task.add_done_callback(handlers.discard)
+                task.add_done_callback(lambda _: limit.release())
+        finally:
+            for task in list(handlers):
+                task.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+
 
 class ServiceBroker[InT, OutT](MessageBroker[InT, OutT]):
     pass
@@ -58,6 +100,7 @@ def make_service_publish_handler(event_type: type[Event]) -> ServicePublishHandl
 
     publish.__name__ = f"publish_service_{event_type.__name__}"
     publish.__annotations__["event"] = event_type
+    publish.__stega_service_publish__ = True
     return publish
 
 
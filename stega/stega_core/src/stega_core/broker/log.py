@@ -0,0 +1,439 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import fcntl
+import json
+import mmap
+import os
+import struct
+import time
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
+
+from stega_core.broker.base import Envelope, MessageBroker
+from stega_core.broker.topic import compile_topics
+from stega_core.codec import JSON_CODEC, EnvelopeCodec
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable, Iterator
+
+    from stega_core.broker.base import EnvelopeHandler
+    from stega_core.metrics import PrometheusText
+
+# payload length, offset, unix timestamp and topic length, followed by the topic and the payload
+_RECORD = struct.Struct("!IQdH")
+_SEGMENT_SUFFIX = ".log"
+_OFFSETS_FILE = "offsets.json"
+_LOCK_FILE = ".lock"
+
+
+@dataclass(frozen=True, kw_only=True)
+class EventLogOptions:
+    segment_bytes: int = 16 * 1024 * 1024
+    retention_bytes: int | None = 1024 * 1024 * 1024
+    retention_seconds: float | None = 7 * 24 * 3600.0
+    index_interval_bytes: int = 4096
+    read_batch_size: int = 256
+    commit_interval: int = 100
+    fsync: bool = False
+    # consume resumes from the offset committed under this name, unnamed consumers start at the tail
+    consumer_name: str | None = None
+
+
+@dataclass(frozen=True, kw_only=True)
+class EventLogStats:
+    segments: int
+    size_bytes: int
+    first_offset: int
+    next_offset: int
+    consumer_lag: dict[str, int]
+
+
+@dataclass(frozen=True, kw_only=True)
+class _Record:
+    offset: int
+    timestamp: float
+    topic: str
+    payload: bytes
+
+
+class _Segment:
+    def __init__(self, path: Path, base_offset: int) -> None:
+        self.path = path
+        self.base_offset = base_offset
+        self.next_offset = base_offset
+        self.size = 0
+        self.last_timestamp = 0.0
+        # sparse (offset, position) pairs, reads scan forward from the closest entry
+        self.index: list[tuple[int, int]] = []
+        self._map: mmap.mmap | None = None
+
+    def view(self) -> mmap.mmap | None:
+        if self.size == 0:
+            return None
+        if self._map is None or len(self._map) < self.size:
+            self.close()
+            with self.path.open("rb") as f:
+                self._map = mmap.mmap(f.fileno(), self.size, access=mmap.ACCESS_READ)
+        return self._map
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def records(self, position: int = 0) -> Iterator[tuple[_Record, int]]:
+        buf = self.view()
+        if buf is None:
+            return
+        end = self.size
+        while position + _RECORD.size <= end:
+            length, offset, timestamp, topic_len = _RECORD.unpack_from(buf, position)
+            start = position + _RECORD.size
+            stop = start + topic_len + length
+            if stop > end:
+                return
+            topic = buf[start : start + topic_len].decode("utf-8")
+            yield _Record(offset=offset, timestamp=timestamp, topic=topic, payload=buf[start + topic_len : stop]), stop
+            position = stop
+
+    def locate(self, offset: int) -> int:
+        i = bisect_right(self.index, (offset, float("inf"))) - 1
+        position = self.index[i][1] if i >= 0 else 0
+        for record, next_position in self.records(position):
+            if record.offset >= offset:
+                return position
+            position = next_position
+        return position
+
+
+class _OffsetTracker:
+    def __init__(self) -> None:
+        self._inflight: deque[int] = deque()
+        self._settled: set[int] = set()
+
+    def track(self, offset: int) -> None:
+        self._inflight.append(offset)
+
+    def settle(self, offset: int) -> int | None:
+        self._settled.add(offset)
+        # the commit only moves past a contiguous run of handled envelopes
+        frontier = None
+        while self._inflight and self._inflight[0] in self._settled:
+            head = self._inflight.popleft()
+            self._settled.discard(head)
+            frontier = head + 1
+        return frontier
+
+
+class EventLogBroker[InT, OutT](MessageBroker[InT, OutT]):
+    def __init__(
+        self,
+        directory: str | Path,
+        options: EventLogOptions | None = None,
+        codec: EnvelopeCodec = JSON_CODEC,
+    ) -> None:
+        self._directory = Path(directory).expanduser()
+        self._options = options or EventLogOptions()
+        self._codec = codec
+        self._segments: list[_Segment] = []
+        self._writer: BinaryIO | None = None
+        self._lock: BinaryIO | None = None
+        self._offsets: dict[str, int] = {}
+        self._uncommitted = 0
+        self._readable: asyncio.Future[None] | None = None
+        self._closed = False
+
+    @property
+    def first_offset(self) -> int:
+        return self._segments[0].base_offset if self._segments else 0
+
+    @property
+    def next_offset(self) -> int:
+        return self._segments[-1].next_offset if self._segments else 0
+
+    async def start(self) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        # offsets are assigned and readers woken in process, so the directory has exactly one owner
+        lock = (self._directory / _LOCK_FILE).open("ab")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            err_msg = f"Event log {self._directory} is already open in another broker"
+            raise RuntimeError(err_msg) from None
+        self._lock = lock
+        self._closed = False
+        self._segments = [self._recover(path) for path in sorted(self._directory.glob(f"*{_SEGMENT_SUFFIX}"))]
+        if not self._segments:
+            self._segments.append(_Segment(self._segment_path(0), 0))
+        self._writer = self._segments[-1].path.open("ab")
+        offsets_path = self._directory / _OFFSETS_FILE
+        if offsets_path.exists():
+            self._offsets = json.loads(offsets_path.read_text())
+        self._enforce_retention()
+
+    async def stop(self) -> None:
+        self._closed = True
+        self._wake_readers()
+        self._persist_offsets()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        for segment in self._segments:
+            segment.close()
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    async def publish(self, envelope: Envelope[OutT]) -> None:
+        await self.publish_many([envelope])
+
+    async def publish_many(self, envelopes: Iterable[Envelope[OutT]]) -> None:
+        if self._writer is None:
+            err_msg = "Broker not started"
+            raise RuntimeError(err_msg)
+
+        now = time.time()
+        for envelope in envelopes:
+            segment = self._segments[-1]
+            if segment.size >= self._options.segment_bytes:
+                segment = self._roll()
+            topic = envelope.topic.encode("utf-8")
+            payload = self._codec.encode(envelope.payload)
+            record = _RECORD.pack(len(payload), segment.next_offset, now, len(topic)) + topic + payload
+            if segment.size - (segment.index[-1][1] if segment.index else -self._options.index_interval_bytes) >= (
+                self._options.index_interval_bytes
+            ):
+                segment.index.append((segment.next_offset, segment.size))
+            self._writer.write(record)
+            segment.size += len(record)
+            segment.next_offset += 1
+            segment.last_timestamp = now
+
+        # readers map the file, so records must reach the os before they are announced
+        self._writer.flush()
+        if self._options.fsync:
+            os.fsync(self._writer.fileno())
+        self._wake_readers()
+
+    async def subscribe(
+        self,
+        topics: str | Iterable[str],
+        *,
+        from_offset: int | None = None,
+        consumer: str | None = None,
+    ) -> AsyncIterator[Envelope[InT]]:
+        if self._writer is None:
+            err_msg = "Broker not started"
+            raise RuntimeError(err_msg)
+
+        routes = compile_topics([topics] if isinstance(topics, str) else topics, value=True)
+        position = self._start_offset(from_offset, consumer)
+        try:
+            while not self._closed:
+                # retention may have deleted records this subscription never read
+                position = max(position, self.first_offset)
+                records = self._read(position, self._options.read_batch_size)
+                if not records:
+                    await asyncio.wait({self._readable_future()})
+                    continue
+                for record in records:
+                    position = record.offset + 1
+                    if routes.match(record.topic):
+                        yield Envelope(
+                            topic=record.topic, payload=self._codec.decode(record.payload), offset=record.offset
+                        )
+                        # resumed by the consumer, so the envelope was handled
+                        if consumer is not None:
+                            self._track(consumer, position)
+                if consumer is not None:
+                    self._track(consumer, position)
+        finally:
+            if consumer is not None:
+                self._persist_offsets()
+
+    async def consume(
+        self,
+        topics: str | Iterable[str],
+        handler: EnvelopeHandler[InT],
+        *,
+        concurrency: int | None = None,
+    ) -> None:
+        consumer = self._options.consumer_name
+        if consumer is None:
+            await super().consume(topics, handler, concurrency=concurrency)
+            return
+        if self._writer is None:
+            err_msg = "Broker not started"
+            raise RuntimeError(err_msg)
+
+        position = self._start_offset(None, consumer)
+        # a first run commits where it starts, so events published while it is down are not skipped
+        if consumer not in self._offsets:
+            self.commit(consumer, position)
+
+        tracker = _OffsetTracker()
+        limit = asyncio.Semaphore(max(concurrency or 1, 1))
+        handlers: set[asyncio.Task] = set()
+
+        async def handle(envelope: Envelope[InT]) -> None:
+            # like a broker without acks, a failed envelope is dropped and consumption carries on
+            with contextlib.suppress(Exception):
+                await handler(envelope)
+            frontier = tracker.settle(envelope.offset)
+            if frontier is not None:
+                self._track(consumer, frontier)
+
+        try:
+            async for envelope in self.subscribe(topics, from_offset=position):
+                await limit.acquire()
+                tracker.track(envelope.offset)
+                task = asyncio.create_task(handle(envelope))
+                handlers.add(task)
+                task.add_done_callback(handlers.discard)
+                task.add_done_callback(lambda _: limit.release())
+        finally:
+            # unfinished envelopes stay uncommitted and are delivered again on the next run
+            for task in list(handlers):
+                task.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            self._persist_offsets()
+
+    def commit(self, consumer: str, offset: int) -> None:
+        self._offsets[consumer] = offset
+        self._persist_offsets()
+
+    def committed(self, consumer: str) -> int | None:
+        return self._offsets.get(consumer)
+
+    def stats(self) -> EventLogStats:
+        next_offset = self.next_offset
+        return EventLogStats(
+            segments=len(self._segments),
+            size_bytes=sum(s.size for s in self._segments),
+            first_offset=self.first_offset,
+            next_offset=next_offset,
+            consumer_lag={name: next_offset - offset for name, offset in self._offsets.items()},
+        )
+
+    def collect_metrics(self, out: PrometheusText) -> None:
+        stats = self.stats()
+        out.gauge("stega_event_log_segments", "Segments in the event log.", [({}, stats.segments)])
+        out.gauge("stega_event_log_bytes", "Bytes retained by the event log.", [({}, stats.size_bytes)])
+        out.gauge("stega_event_log_first_offset", "Oldest retained offset.", [({}, stats.first_offset)])
+        out.gauge("stega_event_log_next_offset", "Offset of the next appended record.", [({}, stats.next_offset)])
+        out.gauge(
+            "stega_event_log_consumer_lag",
+            "Records a named consumer has not committed yet.",
+            (({"consumer": name}, lag) for name, lag in stats.consumer_lag.items()),
+        )
+
+    def _start_offset(self, from_offset: int | None, consumer: str | None) -> int:
+        if from_offset is not None:
+            return from_offset
+        if consumer is not None and consumer in self._offsets:
+            return self._offsets[consumer]
+        # like the other brokers, a new subscription only sees what is published from now on
+        return self.next_offset
+
+    def _read(self, offset: int, limit: int) -> list[_Record]:
+        records: list[_Record] = []
+        i = bisect_right([s.base_offset for s in self._segments], offset) - 1
+        for segment in self._segments[max(i, 0) :]:
+            if offset >= segment.next_offset:
+                continue
+            for record, _ in segment.records(segment.locate(offset)):
+                # copied out of the map, retention may unmap the segment while the consumer holds it
+                records.append(
+                    _Record(
+                        offset=record.offset,
+                        timestamp=record.timestamp,
+                        topic=record.topic,
+                        payload=bytes(record.payload),
+                    )
+                )
+                if len(records) >= limit:
+                    return records
+            offset = segment.next_offset
+        return records
+
+    def _recover(self, path: Path) -> _Segment:
+        segment = _Segment(path, int(path.stem))
+        segment.size = path.stat().st_size
+        valid = 0
+        last_indexed = -self._options.index_interval_bytes
+        for record, next_position in segment.records():
+            if valid - last_indexed >= self._options.index_interval_bytes:
+                segment.index.append((record.offset, valid))
+                last_indexed = valid
+            segment.next_offset = record.offset + 1
+            segment.last_timestamp = record.timestamp
+            valid = next_position
+        segment.close()
+        if valid < segment.size:
+            # a torn write at the tail from a crash, drop the partial record
+            with path.open("r+b") as f:
+                f.truncate(valid)
+            segment.size = valid
+        return segment
+
+    def _roll(self) -> _Segment:
+        assert self._writer is not None  # noqa: S101
+        self._writer.close()
+        segment = _Segment(self._segment_path(self.next_offset), self.next_offset)
+        self._segments.append(segment)
+        self._writer = segment.path.open("ab")
+        self._enforce_retention()
+        return segment
+
+    def _enforce_retention(self) -> None:
+        opts = self._options
+        total = sum(s.size for s in self._segments)
+        cutoff = time.time() - opts.retention_seconds if opts.retention_seconds is not None else None
+        # the active segment is never deleted
+        while len(self._segments) > 1:
+            oldest = self._segments[0]
+            over_size = opts.retention_bytes is not None and total > opts.retention_bytes
+            expired = cutoff is not None and oldest.last_timestamp < cutoff
+            if not (over_size or expired):
+                break
+            self._segments.pop(0)
+            total -= oldest.size
+            oldest.close()
+            oldest.path.unlink(missing_ok=True)
+
+    def _track(self, consumer: str, offset: int) -> None:
+        if self._offsets.get(consumer) == offset:
+            return
+        self._offsets[consumer] = offset
+        self._uncommitted += 1
+        if self._uncommitted >= self._options.commit_interval:
+            self._persist_offsets()
+
+    def _persist_offsets(self) -> None:
+        if not self._directory.exists():
+            return
+        self._uncommitted = 0
+        # written aside and renamed, a crash never leaves a half written offsets file
+        tmp = self._directory / f"{_OFFSETS_FILE}.tmp"
+        tmp.write_text(json.dumps(self._offsets))
+        tmp.replace(self._directory / _OFFSETS_FILE)
+
+    def _segment_path(self, base_offset: int) -> Path:
+        return self._directory / f"{base_offset:020d}{_SEGMENT_SUFFIX}"
+
+    def _readable_future(self) -> asyncio.Future[None]:
+        if self._readable is None:
+            self._readable = asyncio.get_running_loop().create_future()
+        return self._readable
+
+    def _wake_readers(self) -> None:
+        if self._readable is not None:
+            if not self._readable.done():
+                self._readable.set_result(None)
+            self._readable = None
@@ -1,44 +1,254 @@
+from __future__ import annotations
+
 import asyncio
-from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING
 
 from stega_core.broker.base import Envelope, MessageBroker
+from stega_core.broker.topic import TopicTrie, validate_topic_pattern
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable
+
+    from stega_core.metrics import PrometheusText
+
+
+class SlowConsumerPolicy(Enum):
+    BLOCK: str = "block"
+    DROP_OLDEST: str = "drop_oldest"
+    DISCONNECT: str = "disconnect"
+
+
+@dataclass(frozen=True, kw_only=True)
+class InMemoryBrokerStats:
+    topics: int
+    subscribers: int
+    published: int
+    dropped: int
+    disconnected: int
+    lagging: int
+    blocked_publishes: int
+
+
+@dataclass(eq=False, kw_only=True)
+class _Cursor:
+    position: int
+    closed: bool = False
+
+
+class _TopicRing:
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.head = 0
+        self.cursors: set[_Cursor] = set()
+        self._slots: list[tuple[int, Envelope] | None] = [None] * capacity
+        self._readable: asyncio.Future[None] | None = None
+        self._writable: asyncio.Future[None] | None = None
+
+    @property
+    def oldest(self) -> int:
+        return max(0, self.head - self.capacity)
+
+    @property
+    def full(self) -> bool:
+        return any(c.position <= self.head - self.capacity for c in self.cursors)
+
+    def append(self, seq: int, envelope: Envelope) -> None:
+        self._slots[self.head % self.capacity] = (seq, envelope)
+        self.head += 1
+        self.wake_readers()
+
+    def read(self, position: int) -> tuple[int, Envelope]:
+        return self._slots[position % self.capacity]
+
+    def readable(self) -> asyncio.Future[None]:
+        if self._readable is None:
+            self._readable = asyncio.get_running_loop().create_future()
+        return self._readable
+
+    def writable(self) -> asyncio.Future[None]:
+        if self._writable is None:
+            self._writable = asyncio.get_running_loop().create_future()
+        return self._writable
+
+    def wake_readers(self) -> None:
+        if self._readable is not None:
+            _wake(self._readable)
+            self._readable = None
+
+    def wake_writers(self) -> None:
+        if self._writable is not None:
+            _wake(self._writable)
+            self._writable = None
 
 
 class InMemoryBroker[InT, OutT](MessageBroker[InT, OutT]):
-    def __init__(self, queue_maxsize: int = 100) -> None:
-        self._subscribers: dict[str, list[asyncio.Queue[Envelope]]] = {}
-        self._queue_maxsize = queue_maxsize
+    def __init__(
+        self,
+        buffer_size: int = 1024,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP_OLDEST,
+    ) -> None:
+        self._buffer_size = buffer_size
+        self._policy = policy
+        # one ring per subscribed topic pattern, publishes find theirs through the trie
+        self._rings: dict[str, _TopicRing] = {}
+        self._routes: TopicTrie[_TopicRing] = TopicTrie()
+        # global sequence, orders envelopes across the rings of a multi-topic subscriber
+        self._seq = 0
+        self._subscribers = 0
+        self._published = 0
+        self._dropped = 0
+        self._disconnected = 0
+        self._blocked_publishes = 0
 
     async def start(self) -> None:
         pass
 
     async def stop(self) -> None:
-        self._subscribers.clear()
+        rings, self._rings = self._rings, {}
+        self._routes = TopicTrie()
+        for ring in rings.values():
+            for cursor in ring.cursors:
+                cursor.closed = True
+            ring.wake_readers()
+            ring.wake_writers()
 
     async def publish(self, envelope: Envelope[OutT]) -> None:
-        queues = list(self._subscribers.get(envelope.topic, []))
-        for queue in queues:
-            try:
-                queue.put_nowait(envelope)
-            except asyncio.QueueFull:
-                pass
+        rings = self._routes.match(envelope.topic)
+        if not rings:
+            return
 
-    async def subscribe(self, topics: str | Iterable[str]) -> AsyncIterator[Envelope[InT]]:
-        queue: asyncio.Queue[Envelope[InT]] = asyncio.Queue(maxsize=self._queue_maxsize)
+        if self._policy is SlowConsumerPolicy.BLOCK and any(ring.full for ring in rings):
+            self._blocked_publishes += 1
+            while full := [ring for ring in rings if ring.full]:
+                await asyncio.wait({ring.writable() for ring in full}, return_when=asyncio.FIRST_COMPLETED)
+                # subscribers may have come or gone while the publisher waited
+                rings = self._routes.match(envelope.topic)
+            if not rings:
+                return
 
-        topics = [topics] if isinstance(topics, str) else list(topics)
+        self._seq += 1
+        # written once per matching pattern, every subscriber reads the slot through its own cursor
+        for ring in rings:
+            ring.append(self._seq, envelope)
+        self._published += 1
+
+    async def subscribe(self, topics: str | Iterable[str]) -> AsyncIterator[Envelope[InT]]:
+        topics = [topics] if isinstance(topics, str) else list(dict.fromkeys(topics))
         for topic in topics:
-            self._subscribers.setdefault(topic, []).append(queue)
+            validate_topic_pattern(topic)
+        cursors: list[tuple[_TopicRing, _Cursor]] = []
+        for topic in topics:
+            ring = self._rings.get(topic)
+            if ring is None:
+                ring = self._rings[topic] = _TopicRing(self._buffer_size)
+                self._routes.add(topic, ring)
+            cursor = _Cursor(position=ring.head)
+            ring.cursors.add(cursor)
+            cursors.append((ring, cursor))
+        self._subscribers += 1
 
         try:
             while True:
-                yield await queue.get()
+                ready = self._next_ready(cursors)
+                if ready is None:
+                    # waiting never cancels the shared futures, other subscribers keep theirs
+                    await asyncio.wait({ring.readable() for ring, _ in cursors}, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+
+                ring, cursor = ready
+                if cursor.closed:
+                    return
+                seq, envelope = ring.read(cursor.position)
+                cursor.position += 1
+                _skip_duplicates(cursors, seq)
+                if self._policy is SlowConsumerPolicy.BLOCK:
+                    ring.wake_writers()
+                yield envelope
         finally:
-            for topic in topics:
-                if topic in self._subscribers:
-                    try:
-                        self._subscribers[topic].remove(queue)
-                    except ValueError:
-                        pass
-                    if not self._subscribers[topic]:
-                        del self._subscribers[topic]
+            self._subscribers -= 1
+            for topic, (ring, cursor) in zip(topics, cursors, strict=True):
+                ring.cursors.discard(cursor)
+                ring.wake_writers()
+                if not ring.cursors and self._rings.get(topic) is ring:
+                    del self._rings[topic]
+                    self._routes.remove(topic, ring)
+
+    def stats(self) -> InMemoryBrokerStats:
+        lagging = 0
+        for ring in self._rings.values():
+            lagging += sum(1 for c in ring.cursors if ring.head - c.position > ring.capacity // 2)
+        return InMemoryBrokerStats(
+            topics=len(self._rings),
+            subscribers=self._subscribers,
+            published=self._published,
+            dropped=self._dropped,
+            disconnected=self._disconnected,
+            lagging=lagging,
+            blocked_publishes=self._blocked_publishes,
+        )
+
+    def collect_metrics(self, out: PrometheusText) -> None:
+        stats = self.stats()
+        out.gauge("stega_memory_broker_topics", "Topic patterns with at least one subscriber.", [({}, stats.topics)])
+        out.gauge("stega_memory_broker_subscribers", "Active subscriptions.", [({}, stats.subscribers)])
+        out.gauge(
+            "stega_memory_broker_lagging_subscribers",
+            "Subscriber cursors more than half a ring behind.",
+            [({}, stats.lagging)],
+        )
+        out.counter(
+            "stega_memory_broker_published_total",
+            "Envelopes written to a topic ring.",
+            [({}, stats.published)],
+        )
+        out.counter(
+            "stega_memory_broker_dropped_total",
+            "Envelopes overwritten before a slow subscriber read them.",
+            [({}, stats.dropped)],
+        )
+        out.counter(
+            "stega_memory_broker_disconnected_total",
+            "Subscribers disconnected for falling a full ring behind.",
+            [({}, stats.disconnected)],
+        )
+        out.counter(
+            "stega_memory_broker_blocked_publishes_total",
+            "Publishes that waited for a slow subscriber.",
+            [({}, stats.blocked_publishes)],
+        )
+
+    def _next_ready(self, cursors: list[tuple[_TopicRing, _Cursor]]) -> tuple[_TopicRing, _Cursor] | None:
+        ready: tuple[_TopicRing, _Cursor] | None = None
+        ready_seq = 0
+        for ring, cursor in cursors:
+            if cursor.closed:
+                return ring, cursor
+            if cursor.position >= ring.head:
+                continue
+            if cursor.position < ring.oldest:
+                # the publisher lapped this cursor
+                if self._policy is SlowConsumerPolicy.DISCONNECT:
+                    self._disconnected += 1
+                    cursor.closed = True
+                    return ring, cursor
+                self._dropped += ring.oldest - cursor.position
+                cursor.position = ring.oldest
+            seq, _ = ring.read(cursor.position)
+            if ready is None or seq < ready_seq:
+                ready, ready_seq = (ring, cursor), seq
+        return ready
+
+
+def _skip_duplicates(cursors: list[tuple[_TopicRing, _Cursor]], seq: int) -> None:
+    # an envelope matching several patterns of one subscription sits in each of their rings, deliver it once
+    for ring, cursor in cursors:
+        if ring.oldest <= cursor.position < ring.head and ring.read(cursor.position)[0] == seq:
+            cursor.position += 1
+            ring.wake_writers()
+
+
+def _wake(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
@@ -1,11 +1,21 @@
+from __future__ import annotations
+
 import asyncio
-import json
-from collections.abc import AsyncIterator, Iterable
-from dataclasses import dataclass
+import contextlib
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
 import aio_pika
 
 from stega_core.broker.base import Envelope, MessageBroker
+from stega_core.codec import JSON_CODEC, EnvelopeCodec, codec_for_content_type
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable
+
+    from stega_core.broker.base import EnvelopeHandler
+    from stega_core.metrics import PrometheusText
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -16,28 +26,146 @@ class RabbitMqConnectionParameters:
     password: str
 
 
+@dataclass(frozen=True, kw_only=True)
+class RabbitMqPublishOptions:
+    buffer_size: int = 10_000
+    batch_size: int = 256
+    linger_seconds: float = 0.005
+    # batches on different channels confirm independently, more than one gives up publish order;
+    # a retried envelope can land after newer ones either way, confirmed ones are never resent
+    channels: int = 1
+    confirm_timeout_seconds: float = 10.0
+    max_retries: int = 5
+    retry_backoff_seconds: float = 0.1
+
+
+@dataclass(frozen=True, kw_only=True)
+class RabbitMqPublishStats:
+    buffered: int
+    inflight_batches: int
+    published: int
+    batches: int
+    retries: int
+    failed: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class RabbitMqConsumeOptions:
+    # replicas consuming with the same name share one durable work queue
+    queue_name: str | None = None
+    prefetch: int = 256
+    concurrency: int = 64
+    ack_batch_size: int = 64
+    ack_interval_seconds: float = 0.05
+
+
+@dataclass(frozen=True, kw_only=True)
+class RabbitMqConsumeStats:
+    inflight: int
+    handled: int
+    failed: int
+    ack_frames: int
+
+
+@dataclass(kw_only=True)
+class _PendingPublish:
+    routing_key: str
+    body: bytes
+    confirmed: asyncio.Future[None]
+    attempts: int = field(default=0)
+
+
+@dataclass(kw_only=True)
+class _Delivery:
+    message: aio_pika.abc.AbstractIncomingMessage
+    settled: bool = False
+    ok: bool = False
+
+
+class _AckTracker:
+    def __init__(self) -> None:
+        self._deliveries: deque[_Delivery] = deque()
+        self._frontier: aio_pika.abc.AbstractIncomingMessage | None = None
+        self.ready = 0
+
+    def track(self, message: aio_pika.abc.AbstractIncomingMessage) -> _Delivery:
+        delivery = _Delivery(message=message)
+        self._deliveries.append(delivery)
+        return delivery
+
+    def settle(self, delivery: _Delivery, *, ok: bool) -> None:
+        delivery.settled = True
+        delivery.ok = ok
+        # only a contiguous run of settled deliveries can be covered by a single multiple ack
+        while self._deliveries and self._deliveries[0].settled:
+            head = self._deliveries.popleft()
+            self.ready += 1
+            if head.ok:
+                self._frontier = head.message
+
+    async def flush(self) -> bool:
+        self.ready = 0
+        if self._frontier is None:
+            return False
+        frontier, self._frontier = self._frontier, None
+        # nacked deliveries below the frontier are already settled and not covered again
+        await frontier.ack(multiple=True)
+        return True
+
+
 class RabbitMqBroker[InT, OutT](MessageBroker[InT, OutT]):
     def __init__(
         self,
         connection_params: RabbitMqConnectionParameters,
         exchange_name: str,
+        publish_options: RabbitMqPublishOptions | None = None,
+        consume_options: RabbitMqConsumeOptions | None = None,
+        codec: EnvelopeCodec = JSON_CODEC,
     ) -> None:
         self._connection_params = connection_params
         self._exchange_name = exchange_name
+        self._publish_options = publish_options or RabbitMqPublishOptions()
+        self._consume_options = consume_options or RabbitMqConsumeOptions()
+        self._codec = codec
 
         self._connection: aio_pika.abc.AbstractConnection | None = None
         self._channel: aio_pika.abc.AbstractChannel | None = None
         self._exchange: aio_pika.abc.AbstractExchange | None = None
 
+        self._publish_channels: list[aio_pika.abc.AbstractChannel] = []
+        self._idle_exchanges: asyncio.Queue[aio_pika.abc.AbstractExchange] | None = None
+        self._buffer: asyncio.Queue[_PendingPublish] | None = None
+        self._flusher: asyncio.Task | None = None
+        self._batch_tasks: set[asyncio.Task] = set()
+        self._published = 0
+        self._batches = 0
+        self._retries = 0
+        self._failed = 0
+        self._consume_inflight = 0
+        self._consume_handled = 0
+        self._consume_failed = 0
+        self._ack_frames = 0
+
     async def start(self) -> None:
         self._connection = await self._connect_with_retry()
         self._channel = await self._connection.channel()
         self._exchange = await self._channel.declare_exchange(
             self._exchange_name,
-            aio_pika.ExchangeType.DIRECT,
+            # bindings may be topic patterns with * and # wildcards
+            aio_pika.ExchangeType.TOPIC,
             durable=True,
         )
 
+        # publishing gets its own confirm channels so one slow batch never holds up the next
+        opts = self._publish_options
+        self._idle_exchanges = asyncio.Queue()
+        for _ in range(opts.channels):
+            channel = await self._connection.channel(publisher_confirms=True)
+            self._publish_channels.append(channel)
+            self._idle_exchanges.put_nowait(await channel.get_exchange(self._exchange_name, ensure=False))
+        self._buffer = asyncio.Queue(maxsize=opts.buffer_size)
+        self._flusher = asyncio.create_task(self._flush_loop(), name="rabbitmq-publish-flusher")
+
     async def _connect_with_retry(
         self,
         attempts: int = 10,
@@ -59,6 +187,7 @@ class RabbitMqBroker[InT, OutT](MessageBroker[InT, OutT]):
         raise last
 
     async def stop(self) -> None:
+        await self._stop_publishing()
         if self._channel is not None:
             await self._channel.close()
             self._channel = None
@@ -68,15 +197,182 @@ class RabbitMqBroker[InT, OutT](MessageBroker[InT, OutT]):
         self._exchange = None
 
     async def publish(self, envelope: Envelope[OutT]) -> None:
-        if self._exchange is None:
+        await self.publish_many([envelope])
+
+    async def publish_many(self, envelopes: Iterable[Envelope[OutT]]) -> None:
+        if self._buffer is None or self._flusher is None:
             err_msg = "Broker not started"
             raise RuntimeError(err_msg)
-        body = json.dumps(envelope.payload).encode()
-        await self._exchange.publish(
-            aio_pika.Message(body=body, content_type="application/json"),
-            routing_key=envelope.topic,
+
+        loop = asyncio.get_running_loop()
+        pending = [
+            _PendingPublish(
+                routing_key=envelope.topic,
+                body=self._codec.encode(envelope.payload),
+                confirmed=loop.create_future(),
+            )
+            for envelope in envelopes
+        ]
+        for item in pending:
+            # a full buffer pushes back on publishers instead of growing without bound
+            await self._buffer.put(item)
+        # returns once the broker confirmed every envelope, or raises the first one that gave up
+        results = await asyncio.gather(*(item.confirmed for item in pending), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    def publish_stats(self) -> RabbitMqPublishStats:
+        return RabbitMqPublishStats(
+            buffered=self._buffer.qsize() if self._buffer is not None else 0,
+            inflight_batches=len(self._batch_tasks),
+            published=self._published,
+            batches=self._batches,
+            retries=self._retries,
+            failed=self._failed,
         )
 
+    def collect_metrics(self, out: PrometheusText) -> None:
+        self._collect_publish_metrics(out)
+        self._collect_consume_metrics(out)
+
+    def _collect_publish_metrics(self, out: PrometheusText) -> None:
+        stats = self.publish_stats()
+        out.gauge("stega_rabbitmq_publish_buffered", "Envelopes waiting to be flushed.", [({}, stats.buffered)])
+        out.gauge(
+            "stega_rabbitmq_publish_inflight_batches",
+            "Batches awaiting publisher confirms.",
+            [({}, stats.inflight_batches)],
+        )
+        out.counter(
+            "stega_rabbitmq_published_total",
+            "Envelopes confirmed by the broker.",
+            [({}, stats.published)],
+        )
+        out.counter("stega_rabbitmq_publish_batches_total", "Batches flushed to the broker.", [({}, stats.batches)])
+        out.counter(
+            "stega_rabbitmq_publish_retries_total",
+            "Envelopes republished after a failed confirm.",
+            [({}, stats.retries)],
+        )
+        out.counter(
+            "stega_rabbitmq_publish_failed_total",
+            "Envelopes that exhausted their publish retries.",
+            [({}, stats.failed)],
+        )
+
+    def _collect_consume_metrics(self, out: PrometheusText) -> None:
+        stats = self.consume_stats()
+        out.gauge("stega_rabbitmq_consume_inflight", "Deliveries being handled.", [({}, stats.inflight)])
+        out.counter("stega_rabbitmq_consume_handled_total", "Deliveries handled successfully.", [({}, stats.handled)])
+        out.counter(
+            "stega_rabbitmq_consume_failed_total",
+            "Deliveries whose handler raised and were nacked.",
+            [({}, stats.failed)],
+        )
+        out.counter("stega_rabbitmq_ack_frames_total", "Multiple acks sent to the broker.", [({}, stats.ack_frames)])
+
+    async def _flush_loop(self) -> None:
+        assert self._buffer is not None  # noqa: S101
+        assert self._idle_exchanges is not None  # noqa: S101
+        loop = asyncio.get_running_loop()
+        opts = self._publish_options
+        while True:
+            batch = [await self._buffer.get()]
+            try:
+                # flush as soon as a batch is full, otherwise linger briefly for a burst to fill it
+                deadline = loop.time() + opts.linger_seconds
+                while len(batch) < opts.batch_size:
+                    if not self._buffer.empty():
+                        batch.append(self._buffer.get_nowait())
+                        continue
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._buffer.get(), timeout=remaining))
+                    except TimeoutError:
+                        break
+                exchange = await self._idle_exchanges.get()
+            except asyncio.CancelledError:
+                # envelopes taken off the buffer are no longer drained by stop, fail them here
+                for item in batch:
+                    _resolve(item.confirmed, RuntimeError("Broker stopped"))
+                    self._buffer.task_done()
+                raise
+            task = asyncio.create_task(self._publish_batch(exchange, batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _publish_batch(self, exchange: aio_pika.abc.AbstractExchange, batch: list[_PendingPublish]) -> None:
+        assert self._buffer is not None  # noqa: S101
+        assert self._idle_exchanges is not None  # noqa: S101
+        opts = self._publish_options
+        self._batches += 1
+        pending = batch
+        try:
+            while pending:
+                # confirms are awaited outside the channel lock, so the whole batch shares one round trip
+                results = await asyncio.gather(
+                    *(self._publish_one(exchange, item) for item in pending),
+                    return_exceptions=True,
+                )
+                failed = []
+                for item, result in zip(pending, results, strict=True):
+                    if not isinstance(result, BaseException):
+                        self._published += 1
+                        _resolve(item.confirmed)
+                        continue
+                    item.attempts += 1
+                    if item.attempts > opts.max_retries:
+                        self._failed += 1
+                        _resolve(item.confirmed, result)
+                    else:
+                        failed.append(item)
+                if not failed:
+                    break
+
+                # only unconfirmed envelopes go out again, confirmed ones are never resent
+                self._retries += len(failed)
+                await asyncio.sleep(opts.retry_backoff_seconds * 2 ** (failed[0].attempts - 1))
+                pending = failed
+        finally:
+            for item in batch:
+                _resolve(item.confirmed, RuntimeError("Broker stopped before the envelope was confirmed"))
+                self._buffer.task_done()
+            self._idle_exchanges.put_nowait(exchange)
+
+    async def _publish_one(self, exchange: aio_pika.abc.AbstractExchange, item: _PendingPublish) -> None:
+        await exchange.publish(
+            aio_pika.Message(body=item.body, content_type=self._codec.content_type),
+            routing_key=item.routing_key,
+            timeout=self._publish_options.confirm_timeout_seconds,
+        )
+
+    async def _stop_publishing(self) -> None:
+        if self._flusher is None:
+            return
+        # let buffered envelopes go out while the connection is still open
+        if self._buffer is not None:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._buffer.join(), timeout=self._publish_options.confirm_timeout_seconds)
+
+        flusher, self._flusher = self._flusher, None
+        flusher.cancel()
+        for task in list(self._batch_tasks):
+            task.cancel()
+        await asyncio.gather(flusher, *self._batch_tasks, return_exceptions=True)
+
+        if self._buffer is not None:
+            while not self._buffer.empty():
+                _resolve(self._buffer.get_nowait().confirmed, RuntimeError("Broker stopped"))
+        self._buffer = None
+        self._idle_exchanges = None
+        for channel in self._publish_channels:
+            with contextlib.suppress(Exception):
+                await channel.close()
+        self._publish_channels.clear()
+
     async def subscribe(self, topics: str | Iterable[str]) -> AsyncIterator[Envelope[InT]]:
         if self._channel is None or self._exchange is None:
             err_msg = "Broker not started"
@@ -88,14 +384,117 @@ class RabbitMqBroker[InT, OutT](MessageBroker[InT, OutT]):
             auto_delete=True,
             durable=False,
         )
-        for topic in topics:
+        for topic in _topic_list(topics):
             await queue.bind(self._exchange, routing_key=topic)
 
+        # a private fan-out queue, deliveries are settled by the broker as they are sent
         async with queue.iterator(no_ack=True) as consumer:
             async for rabbit_msg in consumer:
-                async with rabbit_msg.process(requeue=True):
-                    payload = json.loads(rabbit_msg.body.decode())
-                    yield Envelope(
-                        topic=rabbit_msg.routing_key or "",
-                        payload=payload,
-                    )
+                yield self._decode(rabbit_msg)
+
+    async def consume(
+        self,
+        topics: str | Iterable[str],
+        handler: EnvelopeHandler[InT],
+        *,
+        concurrency: int | None = None,
+    ) -> None:
+        if self._connection is None or self._exchange is None:
+            err_msg = "Broker not started"
+            raise RuntimeError(err_msg)
+
+        opts = self._consume_options
+        channel = await self._connection.channel()
+        await channel.set_qos(prefetch_count=opts.prefetch)
+        exchange = await channel.get_exchange(self._exchange_name, ensure=False)
+        if opts.queue_name is None:
+            queue = await channel.declare_queue(name="", exclusive=True, auto_delete=True)
+        else:
+            queue = await channel.declare_queue(name=opts.queue_name, durable=True)
+        for topic in _topic_list(topics):
+            await queue.bind(exchange, routing_key=topic)
+
+        tracker = _AckTracker()
+        limit = asyncio.Semaphore(concurrency or opts.concurrency)
+        handlers: set[asyncio.Task] = set()
+        ack_flusher = asyncio.create_task(self._flush_acks_periodically(tracker))
+        try:
+            async with queue.iterator() as deliveries:
+                async for message in deliveries:
+                    await limit.acquire()
+                    task = asyncio.create_task(self._handle_delivery(handler, tracker, tracker.track(message)))
+                    handlers.add(task)
+                    task.add_done_callback(handlers.discard)
+                    task.add_done_callback(lambda _: limit.release())
+        finally:
+            ack_flusher.cancel()
+            # unsettled deliveries are requeued by the broker once the channel closes
+            for task in list(handlers):
+                task.cancel()
+            await asyncio.gather(ack_flusher, *handlers, return_exceptions=True)
+            await self._flush_acks(tracker)
+            with contextlib.suppress(Exception):
+                await channel.close()
+
+    def consume_stats(self) -> RabbitMqConsumeStats:
+        return RabbitMqConsumeStats(
+            inflight=self._consume_inflight,
+            handled=self._consume_handled,
+            failed=self._consume_failed,
+            ack_frames=self._ack_frames,
+        )
+
+    async def _handle_delivery(
+        self,
+        handler: EnvelopeHandler[InT],
+        tracker: _AckTracker,
+        delivery: _Delivery,
+    ) -> None:
+        message = delivery.message
+        self._consume_inflight += 1
+        try:
+            await handler(self._decode(message))
+        except Exception:
+            self._consume_failed += 1
+            # a redelivery that fails again is dropped rather than looping through the queue forever
+            with contextlib.suppress(Exception):
+                await message.nack(requeue=not message.redelivered)
+            tracker.settle(delivery, ok=False)
+        else:
+            self._consume_handled += 1
+            tracker.settle(delivery, ok=True)
+        finally:
+            self._consume_inflight -= 1
+
+        if tracker.ready >= self._consume_options.ack_batch_size:
+            await self._flush_acks(tracker)
+
+    def _decode(self, message: aio_pika.abc.AbstractIncomingMessage) -> Envelope[InT]:
+        # publishers may run a different codec, the content type says which one they used
+        codec = codec_for_content_type(message.content_type, self._codec)
+        return Envelope(topic=message.routing_key or "", payload=codec.decode(message.body))
+
+    async def _flush_acks_periodically(self, tracker: _AckTracker) -> None:
+        while True:
+            await asyncio.sleep(self._consume_options.ack_interval_seconds)
+            if tracker.ready:
+                await self._flush_acks(tracker)
+
+    async def _flush_acks(self, tracker: _AckTracker) -> None:
+        # a failed ack means the channel is gone, and the broker redelivers those messages anyway
+        with contextlib.suppress(Exception):
+            if await tracker.flush():
+                self._ack_frames += 1
+
+
+def _resolve(future: asyncio.Future[None], exc: BaseException | None = None) -> None:
+    if future.done():
+        return
+    if exc is None:
+        future.set_result(None)
+    else:
+        future.set_exception(exc)
+
+
+def _topic_list(topics: str | Iterable[str]) -> list[str]:
+    return [topics] if isinstance(topics, str) else list(topics)
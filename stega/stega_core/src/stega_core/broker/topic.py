@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# topics are dot separated words, a pattern word "*" matches exactly one word and "#" zero or more
+TOPIC_SEPARATOR = "."
+ONE_WORD = "*"
+ANY_WORDS = "#"
+_MATCH_CACHE_SIZE = 4096
+
+
+def is_topic_pattern(topic: str) -> bool:
+    return any(word in {ONE_WORD, ANY_WORDS} for word in topic.split(TOPIC_SEPARATOR))
+
+
+def validate_topic_pattern(pattern: str) -> list[str]:
+    words = pattern.split(TOPIC_SEPARATOR)
+    for word in words:
+        if not word or (word not in {ONE_WORD, ANY_WORDS} and (ONE_WORD in word or ANY_WORDS in word)):
+            err_msg = f"Invalid topic pattern '{pattern}'"
+            raise ValueError(err_msg)
+    return words
+
+
+def topic_matches(pattern: str, topic: str) -> bool:
+    return _match_words(validate_topic_pattern(pattern), topic.split(TOPIC_SEPARATOR), 0, 0)
+
+
+def _match_words(pattern: list[str], words: list[str], i: int, j: int) -> bool:
+    if i == len(pattern):
+        return j == len(words)
+    if pattern[i] == ANY_WORDS:
+        return any(_match_words(pattern, words, i + 1, k) for k in range(j, len(words) + 1))
+    if j == len(words):
+        return False
+    return pattern[i] in {ONE_WORD, words[j]} and _match_words(pattern, words, i + 1, j + 1)
+
+
+class _Node[ValueT]:
+    __slots__ = ("children", "values")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node[ValueT]] = {}
+        # insertion ordered set, values are compared by identity or their own hash
+        self.values: dict[ValueT, None] = {}
+
+
+class TopicTrie[ValueT]:
+    def __init__(self) -> None:
+        self._root: _Node[ValueT] = _Node()
+        # topics repeat, so the result of walking the trie is kept until the patterns change
+        self._matches: dict[str, tuple[ValueT, ...]] = {}
+
+    def add(self, pattern: str, value: ValueT) -> None:
+        node = self._root
+        for word in validate_topic_pattern(pattern):
+            node = node.children.setdefault(word, _Node())
+        node.values[value] = None
+        self._matches.clear()
+
+    def remove(self, pattern: str, value: ValueT) -> None:
+        path = [self._root]
+        for word in validate_topic_pattern(pattern):
+            node = path[-1].children.get(word)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].values.pop(value, None)
+        self._matches.clear()
+
+        # prune the branch back to the last node still in use
+        words = pattern.split(TOPIC_SEPARATOR)
+        for depth in range(len(words), 0, -1):
+            node = path[depth]
+            if node.values or node.children:
+                break
+            del path[depth - 1].children[words[depth - 1]]
+
+    def match(self, topic: str) -> tuple[ValueT, ...]:
+        matched = self._matches.get(topic)
+        if matched is None:
+            found: dict[ValueT, None] = {}
+            self._walk(self._root, topic.split(TOPIC_SEPARATOR), 0, found)
+            matched = tuple(found)
+            if len(self._matches) >= _MATCH_CACHE_SIZE:
+                self._matches.clear()
+            self._matches[topic] = matched
+        return matched
+
+    def _walk(self, node: _Node[ValueT], words: list[str], i: int, found: dict[ValueT, None]) -> None:
+        any_words = node.children.get(ANY_WORDS)
+        if any_words is not None:
+            for j in range(i, len(words) + 1):
+                self._walk(any_words, words, j, found)
+        if i == len(words):
+            found.update(node.values)
+            return
+        exact = node.children.get(words[i])
+        if exact is not None:
+            self._walk(exact, words, i + 1, found)
+        one_word = node.children.get(ONE_WORD)
+        if one_word is not None:
+            self._walk(one_word, words, i + 1, found)
+
+
+def compile_topics[ValueT](patterns: Iterable[str], value: ValueT) -> TopicTrie[ValueT]:
+    trie: TopicTrie[ValueT] = TopicTrie()
+    for pattern in patterns:
+        trie.add(pattern, value)
+    return trie
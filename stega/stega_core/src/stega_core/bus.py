@@ -1,11 +1,18 @@
 import asyncio
-from dataclasses import dataclass
+import zlib
+from collections import deque
+from collections.abc import Awaitable
+from dataclasses import dataclass, field
+from enum import Enum
+from time import monotonic, perf_counter
 from typing import cast
 
+from stega_core.cache import QueryCache, QueryCacheStats
+from stega_core.completion import CommandCompletion, CompletionRegistry
 from stega_core.di import (
     DependencyContainer,
+    DispatchPlan,
     DispatchScope,
-    MessageHandlerBinding,
 )
 from stega_core.domain import AppError
 from stega_core.message import (
@@ -22,54 +29,222 @@ from stega_core.message import (
     View,
     get_correlation_id,
 )
+from stega_core.metrics import BusMetrics, NoopBusMetrics, PrometheusText
+from stega_core.pool import HandlerPoolStats, HandlerProcessPool
 from stega_core.registry import (
     CommandRegistry,
     EventRegistry,
     QueryRegistry,
 )
+from stega_core.singleflight import SingleFlight
 from stega_core.uow import AbstractUnitOfWork
 
 
+class CommandOverflowPolicy(Enum):
+    QUEUE: str = "queue"
+    REJECT: str = "reject"
+    SHED_OLDEST: str = "shed_oldest"
+
+
 @dataclass(frozen=True)
 class BusConfig:
     event_worker_count: int = 1
     event_queue_maxsize: int = 0
     shutdown_timeout_seconds: float = 30.0
+    # run the bindings of a single event concurrently instead of one after another
+    concurrent_event_dispatch: bool = False
+    # max in-flight invocations per event binding (0 is unbounded), overridable by handler name
+    event_binding_concurrency: int = 0
+    event_binding_limits: dict[str, int] = field(default_factory=dict)
+    # bound on in-flight command tasks (0 is unbounded) and what happens to commands beyond it
+    max_inflight_commands: int = 0
+    command_overflow_policy: CommandOverflowPolicy = CommandOverflowPolicy.REJECT
+    command_queue_timeout_seconds: float = 1.0
+    command_retry_after_seconds: float = 1.0
+    # bound and time to live of the command completions tracked by correlation id
+    completion_maxsize: int = 10_000
+    completion_ttl_seconds: float = 300.0
+    # share one handler invocation between concurrent equal queries
+    coalesce_queries: bool = True
+
+
+@dataclass(frozen=True, kw_only=True)
+class EventPartitionStats:
+    partition: int
+    depth: int
+    lag_seconds: float
+
+
+class _EventPartition:
+    def __init__(self, index: int, maxsize: int) -> None:
+        self.index = index
+        # events paired with whether they were consumed from the service broker
+        self.queue: asyncio.Queue[tuple[Event, bool]] = asyncio.Queue(maxsize=maxsize)
+        self._enqueued_at: deque[float] = deque()
+
+    async def put(self, event: Event, *, external: bool) -> None:
+        await self.queue.put((event, external))
+        self._enqueued_at.append(monotonic())
+
+    async def get(self) -> tuple[Event, bool]:
+        item = await self.queue.get()
+        if self._enqueued_at:
+            self._enqueued_at.popleft()
+        return item
+
+    def stats(self) -> EventPartitionStats:
+        lag = monotonic() - self._enqueued_at[0] if self._enqueued_at else 0.0
+        return EventPartitionStats(
+            partition=self.index,
+            depth=self.queue.qsize(),
+            lag_seconds=lag,
+        )
 
 
 class MessageBus:
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         command_registry: CommandRegistry,
         query_registry: QueryRegistry,
         event_registry: EventRegistry,
         container: DependencyContainer,
         config: BusConfig | None = None,
+        *,
+        query_cache: QueryCache | None = None,
+        handler_pool: HandlerProcessPool | None = None,
+        metrics: BusMetrics | None = None,
     ) -> None:
         self._commands = command_registry
         self._queries = query_registry
         self._events = event_registry
         self._container = container
         self._config = config or BusConfig()
+        self._query_cache = query_cache
+        self._query_flights: SingleFlight[Query, QueryResponse] = SingleFlight()
+        self._handler_pool = handler_pool
+        self._metrics = metrics or NoopBusMetrics()
 
-        self._command_tasks: set[asyncio.Task] = set()
-        self._event_queue: asyncio.Queue[Event] = asyncio.Queue(
-            maxsize=self._config.event_queue_maxsize,
-        )
+        # compile dispatch plans once so handling a message never reflects on providers
+        self._command_plans: dict[type[Command], DispatchPlan] = {
+            msg_type: container.compile_plan(command_registry.get(msg_type))
+            for msg_type in command_registry.message_types
+        }
+        self._query_plans: dict[type[Query], DispatchPlan] = {
+            msg_type: container.compile_plan(query_registry.get(msg_type)) for msg_type in query_registry.message_types
+        }
+        self._event_plans: dict[type[Event], list[DispatchPlan]] = {
+            msg_type: [container.compile_plan(binding) for binding in event_registry.get(msg_type)]
+            for msg_type in event_registry.message_types
+        }
+        # an event consumed from the service broker must not be published back to it
+        self._external_event_plans: dict[type[Event], list[DispatchPlan]] = {
+            msg_type: [plan for plan in plans if not plan.binding.service_publish]
+            for msg_type, plans in self._event_plans.items()
+        }
+        plans = [
+            *self._command_plans.values(),
+            *self._query_plans.values(),
+            *(plan for event_plans in self._event_plans.values() for plan in event_plans),
+        ]
+        cpu_bound = [plan.handler.__qualname__ for plan in plans if plan.binding.cpu_bound]
+        if cpu_bound and handler_pool is None:
+            err_msg = f"Cpu bound handlers {cpu_bound} require a handler process pool"
+            raise RuntimeError(err_msg)
+
+        self._binding_semaphores: dict[DispatchPlan, asyncio.Semaphore] = {}
+        for plans in self._event_plans.values():
+            for plan in plans:
+                limit = self._config.event_binding_limits.get(
+                    plan.handler.__name__,
+                    self._config.event_binding_concurrency,
+                )
+                if limit > 0:
+                    self._binding_semaphores[plan] = asyncio.Semaphore(limit)
+
+        # one queue and worker per partition, events of an aggregate always land on the same partition
+        # running command tasks and their correlation ids, oldest first
+        self._command_tasks: dict[asyncio.Task, str] = {}
+        self._command_slots: asyncio.Semaphore | None = None
+        if self._config.max_inflight_commands > 0:
+            self._command_slots = asyncio.Semaphore(self._config.max_inflight_commands)
+        self._event_partitions: list[_EventPartition] = [
+            _EventPartition(i, self._config.event_queue_maxsize) for i in range(max(1, self._config.event_worker_count))
+        ]
         self._event_workers: list[asyncio.Task] = []
+        self._completions = CompletionRegistry(
+            maxsize=self._config.completion_maxsize,
+            ttl_seconds=self._config.completion_ttl_seconds,
+        )
         self._running = False
 
     @property
     def subscribed_topics(self) -> set[str]:
         return {event_type.topic for event_type in self._events.message_types}
 
+    @property
+    def consumed_topics(self) -> set[str]:
+        return {event_type.topic for event_type, plans in self._external_event_plans.items() if plans}
+
+    def event_partition_stats(self) -> list[EventPartitionStats]:
+        return [partition.stats() for partition in self._event_partitions]
+
+    def query_cache_stats(self) -> QueryCacheStats | None:
+        if self._query_cache is None:
+            return None
+        return self._query_cache.stats()
+
+    def handler_pool_stats(self) -> HandlerPoolStats | None:
+        if self._handler_pool is None:
+            return None
+        return self._handler_pool.stats()
+
+    def collect_metrics(self, out: PrometheusText) -> None:
+        self._metrics.collect_metrics(out)
+        partitions = self.event_partition_stats()
+        out.gauge(
+            "stega_bus_event_queue_depth",
+            "Events waiting in each partition queue.",
+            (({"partition": str(p.partition)}, p.depth) for p in partitions),
+        )
+        out.gauge(
+            "stega_bus_event_queue_lag_seconds",
+            "Age of the oldest event waiting in each partition queue.",
+            (({"partition": str(p.partition)}, p.lag_seconds) for p in partitions),
+        )
+        out.gauge("stega_bus_inflight_commands", "Command tasks still running.", [({}, len(self._command_tasks))])
+        out.gauge(
+            "stega_bus_tracked_completions", "Command completions held for lookup.", [({}, len(self._completions))]
+        )
+
+        cache_stats = self.query_cache_stats()
+        if cache_stats is not None:
+            out.counter("stega_query_cache_hits_total", "Queries answered from the cache.", [({}, cache_stats.hits)])
+            out.counter("stega_query_cache_misses_total", "Queries that ran their handler.", [({}, cache_stats.misses)])
+            out.counter(
+                "stega_query_cache_evictions_total",
+                "Cached results evicted by size or age.",
+                [({}, cache_stats.evictions)],
+            )
+            out.counter(
+                "stega_query_cache_invalidations_total",
+                "Cached results evicted by events.",
+                [({}, cache_stats.invalidations)],
+            )
+            out.gauge("stega_query_cache_entries", "Cached query results.", [({}, cache_stats.size)])
+
+    def completion(self, correlation_id: str) -> CommandCompletion | None:
+        return self._completions.get(correlation_id)
+
+    async def wait_for(self, correlation_id: str, timeout: float | None = None) -> CommandCompletion | None:  # noqa: ASYNC109
+        return await self._completions.wait_for(correlation_id, timeout)
+
     async def start(self) -> None:
         if self._running:
             return
         self._running = True
         self._event_workers = [
-            asyncio.create_task(self._event_worker_loop(), name=f"event-worker-{id}")
-            for i in range(self._config.event_worker_count)
+            asyncio.create_task(self._event_worker_loop(partition), name=f"event-worker-{partition.index}")
+            for partition in self._event_partitions
         ]
 
     async def stop(self) -> None:
@@ -81,12 +256,12 @@ class MessageBus:
         for task in self._command_tasks:
             task.cancel()
         await asyncio.gather(*self._command_tasks, return_exceptions=True)
-        self._command_tasks = set()
+        self._command_tasks = {}
 
         # wait for queue events to process or automatically shutdown after timeout
         try:
             await asyncio.wait_for(
-                self._event_queue.join(),
+                asyncio.gather(*(partition.queue.join() for partition in self._event_partitions)),
                 timeout=self._config.shutdown_timeout_seconds,
             )
         except TimeoutError:
@@ -101,26 +276,53 @@ class MessageBus:
     async def handle_command(self, command: Command) -> CommandResponse:
         correlation_id = get_correlation_id()
         cmd_type = type(command)
-        binding = self._commands.get(cmd_type)
-        if binding is None:
+        plan = self._command_plans.get(cmd_type)
+        if plan is None:
             return CommandResponse(
                 status=SubmissionStatus.FAILED,
+                correlation_id=correlation_id,
                 error=f"No handler registered for {cmd_type.__name__}",
             )
 
+        if not await self._admit_command():
+            error = f"Too many in-flight commands, {cmd_type.__name__} rejected"
+            self._completions.fail(correlation_id, error)
+            return CommandResponse(
+                status=SubmissionStatus.FAILED,
+                correlation_id=correlation_id,
+                error=error,
+                retry_after=self._config.command_retry_after_seconds,
+            )
+
         async def invoke_coro() -> None:
-            _, scope = await self._invoke(binding, command, type(None))
-            for event in self._drain_events(scope):
-                await self.handle_event(event)
+            try:
+                _, scope = await self._invoke(plan, command, type(None))
+            except Exception as exc:
+                self._completions.fail(correlation_id, f"{type(exc).__name__}: {exc}")
+                return
+            # the outcome is settled once the handler committed, dispatching its events is follow-up work
+            events = self._drain_events(scope)
+            # invalidate before the outcome is visible so a caller never reads its own write stale
+            for event in events:
+                self._invalidate_cached(event)
+            self._completions.succeed(correlation_id, [event.serialize() for event in events])
+            for event in events:
+                await self._route_event(event)
 
+        self._completions.begin(correlation_id)
         try:
-            task = asyncio.create_task(invoke_coro())
-            self._command_tasks.add(task)
-            task.add_done_callback(self._command_tasks.discard)
+            task = asyncio.create_task(invoke_coro(), name=cmd_type.__name__)
+            self._command_tasks[task] = correlation_id
+            task.add_done_callback(self._release_command)
         except Exception as exc:
+            if self._command_slots is not None:
+                self._command_slots.release()
+            error = f"{type(exc).__name__}: {exc}"
+            self._completions.fail(correlation_id, error)
             return CommandResponse(
                 status=SubmissionStatus.FAILED,
-                error=f"{type(exc).__name__}: {exc}",
+                correlation_id=correlation_id,
+                error=error,
             )
 
         return CommandResponse(
@@ -130,15 +332,62 @@ class MessageBus:
 
     async def handle_query[ViewT: View](self, query: Query[ViewT]) -> QueryResponse[ViewT]:
         query_type = type(query)
-        binding = self._queries.get(query_type)
-        if binding is None:
+        plan = self._query_plans.get(query_type)
+        if plan is None:
             return QueryResponse(
                 status=QueryStatus.FAILED,
                 error=f"No handler registered for {query_type.__name__}",
             )
 
+        cache = self._query_cache
+        if cache is not None and cache.caches(query):
+            cached = cache.get(query)
+            if cached is not None:
+                return cached
+            generation = cache.generation(query)
+        else:
+            cache = None
+
+        if self._config.coalesce_queries:
+            response = await self._query_flights.do(query, lambda: self._run_query(plan, query))
+        else:
+            response = await self._run_query(plan, query)
+
+        if cache is not None and response.status is QueryStatus.OK:
+            cache.put(query, response, generation)
+        return response
+
+    async def handle_event(self, event: Event, *, external: bool = False) -> None:
+        self._invalidate_cached(event)
+        await self._route_event(event, external=external)
+
+    async def _route_event(self, event: Event, *, external: bool = False) -> None:
+        if event.dispatch is EventDispatch.ASYNC:
+            await self._enqueue_event(event, external=external)
+            return
+
+        await self._dispatch_cascade(event, external=external)
+
+    async def _dispatch_cascade(self, event: Event, *, external: bool = False) -> None:
+        sync_queue: list[tuple[Event, int]] = [(event, 0)]
+        max_depth = 0
+        while sync_queue:
+            current, depth = sync_queue.pop(0)
+            max_depth = max(max_depth, depth)
+            # only the consumed event itself is external, events it cascades into are this service's own
+            cascaded = await self._dispatch_event_locally(current, external=external and depth == 0)
+            for next_event in cascaded:
+                self._invalidate_cached(next_event)
+                if next_event.dispatch is EventDispatch.ASYNC:
+                    await self._enqueue_event(next_event)
+                else:
+                    sync_queue.append((next_event, depth + 1))
+        if self._metrics.enabled:
+            self._metrics.observe_cascade(max_depth)
+
+    async def _run_query(self, plan: DispatchPlan, query: Query) -> QueryResponse:
         try:
-            response, _ = await self._invoke(binding, query, QueryResponse)
+            response, _ = await self._invoke(plan, query, QueryResponse)
         except AppError:
             raise
         except Exception as exc:
@@ -146,82 +395,116 @@ class MessageBus:
                 status=QueryStatus.FAILED,
                 error=f"{type(exc).__name__}: {exc}",
             )
-        else:
-            return response
+        return response
 
-    async def handle_event(self, event: Event) -> None:
-        if event.dispatch is EventDispatch.ASYNC:
-            await self._event_queue.put(event)
-            return
+    def _invalidate_cached(self, event: Event) -> None:
+        if self._query_cache is not None:
+            self._query_cache.invalidate(event)
 
-        sync_queue: list[Event] = [event]
-        while sync_queue:
-            current = sync_queue.pop(0)
-            cascaded = await self._dispatch_event_locally(current)
-            for next_event in cascaded:
-                if next_event.dispatch is EventDispatch.ASYNC:
-                    await self._event_queue.put(next_event)
-                else:
-                    sync_queue.append(next_event)
+    async def _admit_command(self) -> bool:
+        slots = self._command_slots
+        if slots is None:
+            return True
+        if not slots.locked():
+            await slots.acquire()
+            return True
+
+        policy = self._config.command_overflow_policy
+        if policy is CommandOverflowPolicy.QUEUE:
+            try:
+                await asyncio.wait_for(slots.acquire(), timeout=self._config.command_queue_timeout_seconds)
+            except TimeoutError:
+                return False
+            return True
+        if policy is CommandOverflowPolicy.SHED_OLDEST and self._command_tasks:
+            # the cancelled task frees its slot from its done callback
+            oldest = next(iter(self._command_tasks))
+            oldest.cancel()
+            await slots.acquire()
+            return True
+        return False
+
+    def _release_command(self, task: asyncio.Task) -> None:
+        correlation_id = self._command_tasks.pop(task, None)
+        if self._command_slots is not None:
+            self._command_slots.release()
+        # settled here, a task shed before its first step never runs its own except clause
+        if task.cancelled() and correlation_id is not None:
+            self._completions.fail(correlation_id, f"{task.get_name()} was cancelled")
 
     async def _invoke[MessageResponseT: MessageResponse](
         self,
-        binding: MessageHandlerBinding,
+        plan: DispatchPlan,
         message: Message,
         response_type: type[MessageResponseT],
     ) -> tuple[MessageResponseT, DispatchScope]:
-        scope = self._container.dispatch_scope()
-        deps = {name: scope.resolve(t) for name, t in binding.dep_types.items()}
-        result = await binding.handler(message, **deps)
+        deps, scope = plan.bind()
+        if plan.binding.cpu_bound:
+            call = self._handler_pool.run(plan.handler, message)
+        else:
+            call = plan.handler(message, **deps)
+        result = await (self._timed(call, type(message)) if self._metrics.enabled else call)
 
         if not isinstance(result, response_type):
             err_msg = (
-                f"Handler {binding.handler.__qualname__} returned {type(result).__name__}, "
+                f"Handler {plan.handler.__qualname__} returned {type(result).__name__}, "
                 f"expected {response_type.__name__}"
             )
             raise TypeError(err_msg)
 
         return cast("MessageResponseT", result), scope
 
-    async def _dispatch_event_locally(self, event: Event) -> list[Event]:
-        bindings = self._events.get(type(event))
-        if not bindings:
+    async def _timed[ResultT](self, call: Awaitable[ResultT], msg_type: type[Message]) -> ResultT:
+        started = perf_counter()
+        try:
+            result = await call
+        except Exception:
+            self._metrics.observe_dispatch(msg_type, perf_counter() - started, error=True)
+            raise
+        self._metrics.observe_dispatch(msg_type, perf_counter() - started, error=False)
+        return result
+
+    async def _dispatch_event_locally(self, event: Event, *, external: bool = False) -> list[Event]:
+        plans = (self._external_event_plans if external else self._event_plans).get(type(event))
+        if not plans:
             return []
 
-        cascaded: list[Event] = []
-        for binding in bindings:
-            try:
-                _result, scope = await self._invoke(binding, event, type(None))
-                cascaded.extend(self._drain_events(scope))
-            except Exception:
-                pass
-        return cascaded
+        # cascaded events are gathered per binding and flattened in registration order
+        if self._config.concurrent_event_dispatch and len(plans) > 1:
+            results = await asyncio.gather(*(self._dispatch_binding(plan, event) for plan in plans))
+        else:
+            results = [await self._dispatch_binding(plan, event) for plan in plans]
+        return [cascaded for result in results for cascaded in result]
 
-    def _drain_events(self, scope: DispatchScope) -> list[Event]:
-        uow = None
+    async def _dispatch_binding(self, plan: DispatchPlan, event: Event) -> list[Event]:
+        semaphore = self._binding_semaphores.get(plan)
         try:
-            uow = scope.resolve(AbstractUnitOfWork)
-        except KeyError:
-            pass
+            if semaphore is None:
+                _result, scope = await self._invoke(plan, event, type(None))
+            else:
+                async with semaphore:
+                    _result, scope = await self._invoke(plan, event, type(None))
+            return self._drain_events(scope)
+        except Exception:
+            return []
 
+    def _drain_events(self, scope: DispatchScope) -> list[Event]:
+        # only a unit of work the handler actually used can hold new events
+        uow = scope.resolved.get(AbstractUnitOfWork)
         if uow is None:
             return []
         return list(uow.collect_new_events())
 
-    async def _event_worker_loop(self) -> None:
+    async def _enqueue_event(self, event: Event, *, external: bool = False) -> None:
+        index = zlib.crc32(event.partition.encode()) % len(self._event_partitions)
+        await self._event_partitions[index].put(event, external=external)
+
+    async def _event_worker_loop(self, partition: _EventPartition) -> None:
         while True:
-            event = await self._event_queue.get()
+            event, external = await partition.get()
             try:
-                sync_queue: list[Event] = [event]
-                while sync_queue:
-                    current = sync_queue.pop(0)
-                    cascaded = await self._dispatch_event_locally(current)
-                    for next_event in cascaded:
-                        if next_event.dispatch is EventDispatch.ASYNC:
-                            await self._event_queue.put(next_event)
-                        else:
-                            sync_queue.append(next_event)
+                await self._dispatch_cascade(event, external=external)
             except Exception:
                 pass
             finally:
-                self._event_queue.task_done()
+                partition.queue.task_done()
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from time import monotonic
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from stega_core.message import Event, Query, QueryResponse
+
+
+@dataclass(frozen=True, kw_only=True)
+class CacheRule:
+    query_type: type[Query]
+    invalidated_by: tuple[type[Event], ...]
+    # narrows eviction to the cached queries an event affects, every query of the type is evicted when unset
+    match: Callable[[Query, Event], bool] | None = None
+
+
+@dataclass(frozen=True, kw_only=True)
+class QueryCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    size: int
+
+
+class QueryCache(ABC):
+    @abstractmethod
+    def caches(self, query: Query) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, query: Query) -> QueryResponse | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def generation(self, query: Query) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def put(self, query: Query, response: QueryResponse, generation: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def invalidate(self, event: Event) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stats(self) -> QueryCacheStats:
+        raise NotImplementedError
+
+
+class InMemoryQueryCache(QueryCache):
+    def __init__(
+        self,
+        rules: list[CacheRule],
+        maxsize: int = 1024,
+        ttl_seconds: float = 60.0,
+    ) -> None:
+        self._maxsize = maxsize
+        self._ttl_seconds = ttl_seconds
+        self._query_types = {rule.query_type for rule in rules}
+        self._rules_by_event: dict[type[Event], list[CacheRule]] = defaultdict(list)
+        for rule in rules:
+            for event_type in rule.invalidated_by:
+                self._rules_by_event[event_type].append(rule)
+
+        self._entries: OrderedDict[Query, tuple[QueryResponse, float]] = OrderedDict()
+        self._keys_by_type: dict[type[Query], set[Query]] = defaultdict(set)
+        # bumped on every invalidation so results computed before it are never stored
+        self._generations: dict[type[Query], int] = defaultdict(int)
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def caches(self, query: Query) -> bool:
+        if type(query) not in self._query_types:
+            return False
+        try:
+            hash(query)
+        except TypeError:
+            return False
+        return True
+
+    def get(self, query: Query) -> QueryResponse | None:
+        entry = self._entries.get(query)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        response, expires_at = entry
+        if expires_at <= monotonic():
+            self._remove(query)
+            self._evictions += 1
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(query)
+        self._hits += 1
+        return response
+
+    def generation(self, query: Query) -> int:
+        return self._generations[type(query)]
+
+    def put(self, query: Query, response: QueryResponse, generation: int) -> None:
+        if generation != self._generations[type(query)]:
+            return
+        self._entries[query] = (response, monotonic() + self._ttl_seconds)
+        self._entries.move_to_end(query)
+        self._keys_by_type[type(query)].add(query)
+        while len(self._entries) > self._maxsize:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
+
+    def invalidate(self, event: Event) -> int:
+        removed = 0
+        for rule in self._rules_by_event.get(type(event), ()):
+            self._generations[rule.query_type] += 1
+            for query in list(self._keys_by_type.get(rule.query_type, ())):
+                if rule.match is None or rule.match(query, event):
+                    self._remove(query)
+                    removed += 1
+        self._invalidations += removed
+        return removed
+
+    def stats(self) -> QueryCacheStats:
+        return QueryCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            invalidations=self._invalidations,
+            size=len(self._entries),
+        )
+
+    def _remove(self, query: Query) -> None:
+        self._entries.pop(query, None)
+        keys = self._keys_by_type.get(type(query))
+        if keys is not None:
+            keys.discard(query)
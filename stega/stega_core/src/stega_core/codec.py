@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import functools
+import json
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum, StrEnum
+from types import NoneType, UnionType
+from typing import Any, Union, get_args, get_origin, get_type_hints
+from uuid import UUID
+
+type Encoder = Callable[[Any], Any]
+
+# compiled once per dataclass type, views are encoded without reflecting on their fields again
+_ENCODERS: dict[type, Encoder] = {}
+_PLAIN = frozenset({str, int, float, bool, NoneType})
+
+
+def encode_default(obj: Any) -> Any:  # noqa: ANN401
+    encoder = _ENCODERS.get(type(obj))
+    if encoder is not None:
+        return encoder(obj)
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return compile_encoder(type(obj))(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    # the same text form on every codec, orjson already emits these natively as iso strings
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, (UUID, Decimal)):
+        return str(obj)
+    err_msg = f"Object of type {type(obj).__name__} is not serializable"
+    raise TypeError(err_msg)
+
+
+def compile_encoder(cls: type) -> Encoder:
+    encoder = _ENCODERS.get(cls)
+    if encoder is None:
+        encoder = _ENCODERS[cls] = _compile_dataclass(cls)
+    return encoder
+
+
+def _compile_dataclass(cls: type) -> Encoder:
+    hints = get_type_hints(cls)
+    steps = tuple((fld.name, _compile_value(hints.get(fld.name, Any))) for fld in fields(cls))
+
+    def encode(obj: Any) -> dict[str, Any]:  # noqa: ANN401
+        out = {}
+        for name, encoder in steps:
+            value = getattr(obj, name)
+            out[name] = value if encoder is None else encoder(value)
+        return out
+
+    encode.__qualname__ = f"encode_{cls.__name__}"
+    return encode
+
+
+def _compile_value(annotation: Any) -> Encoder | None:  # noqa: ANN401, C901, PLR0911
+    # None means the value is already plain data and is emitted as is
+    if annotation in _PLAIN:
+        return None
+    origin = get_origin(annotation)
+
+    # handle Optional[T] = T | None annotations
+    if origin in (Union, UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not NoneType]
+        if len(args) != 1:
+            return _encode_any
+        inner = _compile_value(args[0])
+        if inner is None:
+            return None
+        return lambda value: None if value is None else inner(value)
+
+    # handle list[T], tuple[T, ...] and set[T] annotations
+    if origin in (list, tuple, set, frozenset):
+        args = [arg for arg in get_args(annotation) if arg is not Ellipsis]
+        inner = _compile_value(args[0]) if len(set(args)) == 1 else _encode_any
+        if inner is None:
+            return None if origin is list else list
+        return lambda value: [inner(val) for val in value]
+
+    # handle dict[K, V] annotations, keys are plain
+    if origin is dict:
+        _, val_t = get_args(annotation) or (Any, Any)
+        inner = _compile_value(val_t)
+        if inner is None:
+            return None
+        return lambda value: {key: inner(val) for key, val in value.items()}
+
+    if isinstance(annotation, type):
+        if is_dataclass(annotation):
+            return _encode_dataclass
+        if issubclass(annotation, Enum):
+            return _encode_enum
+    return _encode_any
+
+
+def _encode_dataclass(value: Any) -> Any:  # noqa: ANN401
+    # looked up on the value, subclasses and self referencing views get their own encoder
+    encoder = _ENCODERS.get(type(value))
+    if encoder is None:
+        encoder = compile_encoder(type(value))
+    return encoder(value)
+
+
+def _encode_enum(value: Enum) -> Any:  # noqa: ANN401
+    return value.value
+
+
+def _encode_any(value: Any) -> Any:  # noqa: ANN401
+    if isinstance(value, (str, int, float, NoneType)):
+        return value
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_encode_any(val) for val in value]
+    if isinstance(value, dict):
+        return {key: _encode_any(val) for key, val in value.items()}
+    if is_dataclass(value) and not isinstance(value, type):
+        return _encode_dataclass(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+class EnvelopeCodecKind(StrEnum):
+    JSON = "json"
+    ORJSON = "orjson"
+    MSGPACK = "msgpack"
+
+
+class EnvelopeCodec(ABC):
+    kind: EnvelopeCodecKind
+    content_type: str
+    # identifies the wire format in socket frame headers, codecs sharing a format share a flag
+    frame_flag: int
+    # encoded bytes are utf-8 text and can be embedded in text protocols such as sse
+    text_safe: bool = False
+
+    def __init__(self, default: Callable[[Any], Any] | None = None) -> None:
+        self._default = encode_default if default is None else default
+
+    @abstractmethod
+    def encode(self, obj: Any) -> bytes: ...  # noqa: ANN401
+
+    @abstractmethod
+    def decode(self, data: bytes) -> Any: ...  # noqa: ANN401
+
+
+class JsonCodec(EnvelopeCodec):
+    kind = EnvelopeCodecKind.JSON
+    content_type = "application/json"
+    frame_flag = 0
+    text_safe = True
+
+    def encode(self, obj: Any) -> bytes:  # noqa: ANN401
+        return json.dumps(obj, default=self._default, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, data: bytes) -> Any:  # noqa: ANN401
+        return json.loads(data)
+
+
+class OrjsonCodec(EnvelopeCodec):
+    kind = EnvelopeCodecKind.ORJSON
+    content_type = "application/json"
+    frame_flag = 0
+    text_safe = True
+
+    def __init__(self, default: Callable[[Any], Any] | None = None) -> None:
+        super().__init__(default)
+        self._orjson = _require("orjson")
+
+    def encode(self, obj: Any) -> bytes:  # noqa: ANN401
+        # dataclass views are serialized natively by orjson, straight to bytes
+        return self._orjson.dumps(obj, default=self._default)
+
+    def decode(self, data: bytes) -> Any:  # noqa: ANN401
+        return self._orjson.loads(data)
+
+
+class MsgpackCodec(EnvelopeCodec):
+    kind = EnvelopeCodecKind.MSGPACK
+    content_type = "application/msgpack"
+    frame_flag = 1
+
+    def __init__(self, default: Callable[[Any], Any] | None = None) -> None:
+        super().__init__(default)
+        self._msgpack = _require("msgpack")
+
+    def encode(self, obj: Any) -> bytes:  # noqa: ANN401
+        return self._msgpack.packb(obj, default=self._default)
+
+    def decode(self, data: bytes) -> Any:  # noqa: ANN401
+        return self._msgpack.unpackb(data)
+
+
+_CODECS: dict[EnvelopeCodecKind, type[EnvelopeCodec]] = {
+    EnvelopeCodecKind.JSON: JsonCodec,
+    EnvelopeCodecKind.ORJSON: OrjsonCodec,
+    EnvelopeCodecKind.MSGPACK: MsgpackCodec,
+}
+
+JSON_CODEC: EnvelopeCodec = JsonCodec()
+
+
+def build_codec(kind: EnvelopeCodecKind | str, default: Callable[[Any], Any] | None = None) -> EnvelopeCodec:
+    return _CODECS[EnvelopeCodecKind(kind)](default)
+
+
+def codec_for_content_type(content_type: str | None, fallback: EnvelopeCodec) -> EnvelopeCodec:
+    mimetype = (content_type or "").partition(";")[0].strip().lower()
+    if not mimetype or mimetype == fallback.content_type:
+        return fallback
+    if mimetype == JSON_CODEC.content_type:
+        return JSON_CODEC
+    if mimetype in {MsgpackCodec.content_type, "application/x-msgpack"}:
+        return _shared_codec(EnvelopeCodecKind.MSGPACK)
+    err_msg = f"No codec for content type '{content_type}'"
+    raise ValueError(err_msg)
+
+
+def codec_for_frame_flag(flag: int, fallback: EnvelopeCodec) -> EnvelopeCodec:
+    if flag == fallback.frame_flag:
+        return fallback
+    if flag == JSON_CODEC.frame_flag:
+        return JSON_CODEC
+    if flag == MsgpackCodec.frame_flag:
+        return _shared_codec(EnvelopeCodecKind.MSGPACK)
+    err_msg = f"No codec for frame flag {flag}"
+    raise ValueError(err_msg)
+
+
+def text_codec(codec: EnvelopeCodec) -> EnvelopeCodec:
+    return codec if codec.text_safe else JSON_CODEC
+
+
+@functools.cache
+def _shared_codec(kind: EnvelopeCodecKind) -> EnvelopeCodec:
+    return build_codec(kind)
+
+
+def _require(module_name: str) -> Any:  # noqa: ANN401
+    try:
+        return __import__(module_name)
+    except ImportError as err:
+        err_msg = f"The {module_name} codec requires the '{module_name}' extra of stega_core"
+        raise RuntimeError(err_msg) from err
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+from time import monotonic
+from typing import Any
+
+
+class CompletionStatus(Enum):
+    PENDING: str = "pending"
+    SUCCEEDED: str = "succeeded"
+    FAILED: str = "failed"
+
+
+@dataclass(frozen=True, kw_only=True)
+class CommandCompletion:
+    correlation_id: str
+    status: CompletionStatus
+    error: str | None = None
+    events: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def done(self) -> bool:
+        return self.status is not CompletionStatus.PENDING
+
+    def serialize(self) -> dict[str, Any]:
+        return {
+            "correlation_id": self.correlation_id,
+            "status": self.status.value,
+            "error": self.error,
+            "events": self.events,
+        }
+
+
+class _CompletionEntry:
+    def __init__(self, completion: CommandCompletion, expires_at: float) -> None:
+        self.completion = completion
+        self.expires_at = expires_at
+        self.waiter: asyncio.Future[CommandCompletion] | None = None
+
+
+class CompletionRegistry:
+    def __init__(self, maxsize: int = 10_000, ttl_seconds: float = 300.0) -> None:
+        self._maxsize = maxsize
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, _CompletionEntry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, correlation_id: str) -> CommandCompletion | None:
+        self._evict()
+        entry = self._entries.get(correlation_id)
+        return None if entry is None else entry.completion
+
+    def begin(self, correlation_id: str) -> None:
+        self._update(CommandCompletion(correlation_id=correlation_id, status=CompletionStatus.PENDING))
+
+    def succeed(self, correlation_id: str, events: list[dict[str, Any]]) -> None:
+        self._update(
+            CommandCompletion(
+                correlation_id=correlation_id,
+                status=CompletionStatus.SUCCEEDED,
+                events=events,
+            )
+        )
+
+    def fail(self, correlation_id: str, error: str) -> None:
+        self._update(
+            CommandCompletion(
+                correlation_id=correlation_id,
+                status=CompletionStatus.FAILED,
+                error=error,
+            )
+        )
+
+    async def wait_for(self, correlation_id: str, timeout: float | None = None) -> CommandCompletion | None:  # noqa: ASYNC109
+        self._evict()
+        entry = self._entries.get(correlation_id)
+        # lookups never track ids, only submitted commands take a slot
+        if entry is None:
+            return None
+        if entry.completion.done:
+            return entry.completion
+
+        if entry.waiter is None:
+            entry.waiter = asyncio.get_running_loop().create_future()
+        try:
+            return await asyncio.wait_for(asyncio.shield(entry.waiter), timeout=timeout)
+        except TimeoutError:
+            return entry.completion
+
+    def _update(self, completion: CommandCompletion) -> None:
+        entry = self._entries.pop(completion.correlation_id, None)
+        expires_at = monotonic() + self._ttl_seconds
+        if entry is None:
+            entry = _CompletionEntry(completion, expires_at)
+        else:
+            entry.completion = completion
+            entry.expires_at = expires_at
+        self._entries[completion.correlation_id] = entry
+
+        if completion.done and entry.waiter is not None:
+            if not entry.waiter.done():
+                entry.waiter.set_result(completion)
+            entry.waiter = None
+        self._evict()
+
+    def _evict(self) -> None:
+        # entries are kept in update order, so expired ones are always at the front
+        now = monotonic()
+        while self._entries:
+            correlation_id, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now and len(self._entries) <= self._maxsize:
+                break
+            del self._entries[correlation_id]
+            # release waiters of evicted entries with the last known state
+            if entry.waiter is not None and not entry.waiter.done():
+                entry.waiter.set_result(entry.completion)
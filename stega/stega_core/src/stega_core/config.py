@@ -6,6 +6,8 @@ from stega_core.bootstrap import (
     RepositoryRuntime,
     ServiceBrokerRuntime,
 )
+from stega_core.broker import SlowConsumerPolicy
+from stega_core.codec import EnvelopeCodecKind
 
 
 class ServiceConfig:
@@ -15,6 +17,31 @@ class ServiceConfig:
     HOST: str = source("env", default="127.0.0.1")
     PORT: int = source("env", default=5000)
 
+    # serving processes share the port through SO_REUSEPORT, each runs its own service lifespan. more than one
+    # worker turns the query cache and command completions off and refuses an in-memory service broker, as that
+    # state is never shared between workers. the event log client broker has a single owner, so it is refused too
+    WORKERS: int = source("env", default=1)
+    KEEP_ALIVE: float = source("env", default=5.0)
+    BACKLOG: int = source("env", default=100)
+    UVLOOP: bool = source("env", default=False)
+
+    # cache query results in process until an event invalidates them, only with a single worker
+    QUERY_CACHE: bool = source(
+        "env",
+        default=True,
+        depends_on="WORKERS",
+        depends_value=1,
+    )
+    # track command outcomes for the /api/commands/<id> long-poll, only with a single worker
+    COMMAND_COMPLETIONS: bool = source(
+        "env",
+        default=True,
+        depends_on="WORKERS",
+        depends_value=1,
+    )
+
+    CODEC: EnvelopeCodecKind = source("env", default=EnvelopeCodecKind.JSON)
+
 
 class ServiceBrokerConfig:
     SERVICE_BROKER_RUNTIME: ServiceBrokerRuntime = source(
@@ -22,9 +49,10 @@ class ServiceBrokerConfig:
         default=ServiceBrokerRuntime.RABBITMQ,
     )
 
+    # a topic exchange, the direct exchange once declared as "events" cannot be redeclared in place
     SERVICE_BROKER_EXCHANGE_NAME: str = source(
         "env",
-        default="events",
+        default="stega.events",
         depends_on="SERVICE_BROKER_RUNTIME",
         depends_value=ServiceBrokerRuntime.RABBITMQ,
     )
@@ -50,6 +78,40 @@ class ServiceBrokerConfig:
         depends_on="SERVICE_BROKER_RUNTIME",
         depends_value=ServiceBrokerRuntime.RABBITMQ,
     )
+    SERVICE_BROKER_PUBLISH_CHANNELS: int = source(
+        "env",
+        default=1,
+        depends_on="SERVICE_BROKER_RUNTIME",
+        depends_value=ServiceBrokerRuntime.RABBITMQ,
+    )
+    SERVICE_BROKER_PUBLISH_BATCH_SIZE: int = source(
+        "env",
+        default=256,
+        depends_on="SERVICE_BROKER_RUNTIME",
+        depends_value=ServiceBrokerRuntime.RABBITMQ,
+    )
+    SERVICE_BROKER_PUBLISH_BUFFER_SIZE: int = source(
+        "env",
+        default=10_000,
+        depends_on="SERVICE_BROKER_RUNTIME",
+        depends_value=ServiceBrokerRuntime.RABBITMQ,
+    )
+    SERVICE_BROKER_PUBLISH_LINGER_SECONDS: float = source(
+        "env",
+        default=0.005,
+        depends_on="SERVICE_BROKER_RUNTIME",
+        depends_value=ServiceBrokerRuntime.RABBITMQ,
+    )
+    SERVICE_BROKER_PREFETCH: int = source(
+        "env",
+        default=256,
+        depends_on="SERVICE_BROKER_RUNTIME",
+        depends_value=ServiceBrokerRuntime.RABBITMQ,
+    )
+    SERVICE_BROKER_CONSUMER_CONCURRENCY: int = source(
+        "env",
+        default=64,
+    )
 
 
 class ClientBrokerConfig:
@@ -58,6 +120,43 @@ class ClientBrokerConfig:
         default=ClientBrokerRuntime.MEMORY,
     )
 
+    CLIENT_BROKER_BUFFER_SIZE: int = source(
+        "env",
+        default=1024,
+        depends_on="CLIENT_BROKER_RUNTIME",
+        depends_value=ClientBrokerRuntime.MEMORY,
+    )
+    CLIENT_BROKER_SLOW_CONSUMER_POLICY: SlowConsumerPolicy = source(
+        "env",
+        default=SlowConsumerPolicy.DROP_OLDEST,
+        depends_on="CLIENT_BROKER_RUNTIME",
+        depends_value=ClientBrokerRuntime.MEMORY,
+    )
+    CLIENT_BROKER_LOG_DIR: str = source(
+        "env",
+        default=".stega/client_broker_log",
+        depends_on="CLIENT_BROKER_RUNTIME",
+        depends_value=ClientBrokerRuntime.LOG,
+    )
+    CLIENT_BROKER_LOG_SEGMENT_BYTES: int = source(
+        "env",
+        default=16 * 1024 * 1024,
+        depends_on="CLIENT_BROKER_RUNTIME",
+        depends_value=ClientBrokerRuntime.LOG,
+    )
+    CLIENT_BROKER_LOG_RETENTION_BYTES: int = source(
+        "env",
+        default=1024 * 1024 * 1024,
+        depends_on="CLIENT_BROKER_RUNTIME",
+        depends_value=ClientBrokerRuntime.LOG,
+    )
+    CLIENT_BROKER_LOG_RETENTION_SECONDS: float = source(
+        "env",
+        default=7 * 24 * 3600.0,
+        depends_on="CLIENT_BROKER_RUNTIME",
+        depends_value=ClientBrokerRuntime.LOG,
+    )
+
 
 class RepositoryConfig:
     REPOSITORY_RUNTIME: RepositoryRuntime = source(
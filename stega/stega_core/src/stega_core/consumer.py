@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections import deque
+from dataclasses import dataclass
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from stega_core.context import set_context
+from stega_core.message import Event
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from stega_core.broker import Envelope, ServiceBroker
+    from stega_core.bus import MessageBus
+    from stega_core.metrics import PrometheusText
+
+
+@dataclass(frozen=True, kw_only=True)
+class EventConsumerStats:
+    topics: int
+    received: int
+    handled: int
+    failed: int
+    inflight: int
+    oldest_inflight_seconds: float
+    restarts: int
+
+
+class EventConsumer:
+    def __init__(
+        self,
+        bus: MessageBus,
+        broker: ServiceBroker,
+        *,
+        topics: Iterable[str] | None = None,
+        concurrency: int = 64,
+        restart_delay_seconds: float = 1.0,
+    ) -> None:
+        self._bus = bus
+        self._broker = broker
+        # by default every topic some handler of this service reacts to
+        self._topics = sorted(bus.consumed_topics if topics is None else set(topics))
+        self._concurrency = concurrency
+        self._restart_delay_seconds = restart_delay_seconds
+        self._task: asyncio.Task | None = None
+        self._received_at: deque[float] = deque()
+        self._received = 0
+        self._handled = 0
+        self._failed = 0
+        self._restarts = 0
+
+    @property
+    def topics(self) -> list[str]:
+        return list(self._topics)
+
+    async def start(self) -> None:
+        if self._task is not None or not self._topics:
+            return
+        self._task = asyncio.create_task(self._run(), name="event-consumer")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    def stats(self) -> EventConsumerStats:
+        oldest = monotonic() - self._received_at[0] if self._received_at else 0.0
+        return EventConsumerStats(
+            topics=len(self._topics),
+            received=self._received,
+            handled=self._handled,
+            failed=self._failed,
+            inflight=len(self._received_at),
+            oldest_inflight_seconds=oldest,
+            restarts=self._restarts,
+        )
+
+    def collect_metrics(self, out: PrometheusText) -> None:
+        stats = self.stats()
+        out.counter(
+            "stega_event_consumer_received_total",
+            "Envelopes received from the service broker.",
+            [({}, stats.received)],
+        )
+        out.counter(
+            "stega_event_consumer_handled_total",
+            "Consumed events handed to the bus.",
+            [({}, stats.handled)],
+        )
+        out.counter(
+            "stega_event_consumer_failed_total",
+            "Consumed envelopes that could not be handled.",
+            [({}, stats.failed)],
+        )
+        out.gauge("stega_event_consumer_inflight", "Consumed envelopes being handled.", [({}, stats.inflight)])
+        out.gauge(
+            "stega_event_consumer_oldest_inflight_seconds",
+            "Age of the oldest consumed envelope still being handled.",
+            [({}, stats.oldest_inflight_seconds)],
+        )
+        out.counter(
+            "stega_event_consumer_restarts_total",
+            "Times the broker subscription ended and was opened again.",
+            [({}, stats.restarts)],
+        )
+
+    async def _run(self) -> None:
+        while True:
+            # the subscription only ends when the broker dropped it, subscribe again
+            with contextlib.suppress(Exception):
+                await self._broker.consume(self._topics, self._handle, concurrency=self._concurrency)
+            self._restarts += 1
+            await asyncio.sleep(self._restart_delay_seconds)
+
+    async def _handle(self, envelope: Envelope[dict]) -> None:
+        received_at = monotonic()
+        self._received += 1
+        self._received_at.append(received_at)
+        try:
+            event = Event.deserialize(envelope.payload)
+            # handlers and the events they raise carry the correlation id of the consumed event
+            set_context({"correlation_id": event.correlation_id})
+            await self._bus.handle_event(event, external=True)
+        except Exception:
+            self._failed += 1
+            # raised so brokers with acknowledgements settle the envelope as failed
+            raise
+        else:
+            self._handled += 1
+        finally:
+            self._received_at.remove(received_at)
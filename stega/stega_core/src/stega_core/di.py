@@ -39,6 +39,8 @@ class Dependency[DepT]:
     scope: Scope
     provider: Callable[[], DepT]
     requires: tuple[type, ...] = ()
+    # bound on Lifecycle.start, falls back to the service default when unset
+    start_timeout_seconds: float | None = None
 
 
 class MessageHandler[MessageT: Message, MessageResponseT: MessageResponse](Protocol):
@@ -50,6 +52,10 @@ class MessageHandlerBinding[MessageT: Message, MessageResponseT: MessageResponse
     handler: MessageHandler[MessageT, MessageResponseT]
     msg_type: type[MessageT]
     dep_types: dict[str, type]
+    # run in the handler process pool instead of on the event loop
+    cpu_bound: bool = False
+    # publishes to the service broker, skipped for events consumed from it
+    service_publish: bool = False
 
 
 class DependencyContainer:
@@ -61,6 +67,11 @@ class DependencyContainer:
                 raise ValueError(err_msg)
             self._deps[d.dep_type] = d
 
+        # cache provider parameter types so dispatch never reflects on providers
+        self._params: dict[type, dict[str, type]] = {
+            dep_type: annotated_param_types(dep.provider) for dep_type, dep in self._deps.items()
+        }
+
         self._singletons: dict[type, object] = {}
         self._singletons[DependencyContainer] = self
         self._building: set[type] = set()
@@ -74,8 +85,36 @@ class DependencyContainer:
     def dispatch_scope(self) -> DispatchScope:
         return DispatchScope(self)
 
+    def compile_plan(self, binding: MessageHandlerBinding) -> DispatchPlan:
+        steps: list[_PlanStep] = []
+        planned: set[type] = set()
+
+        def visit(dep_type: type, path: tuple[type, ...]) -> None:
+            if dep_type in planned or self._is_singleton(dep_type):
+                return
+            if dep_type in path:
+                err_msg = f"Dispatch dependency cycle at {dep_type.__name__}"
+                raise RuntimeError(err_msg)
+            for req in self._params[dep_type].values():
+                visit(req, (*path, dep_type))
+            dep = self._deps[dep_type]
+            steps.append(self._plan_step(dep.provider, self._params[dep_type], dep_type))
+            planned.add(dep_type)
+
+        for dep_type in binding.dep_types.values():
+            visit(dep_type, ())
+
+        return DispatchPlan(
+            container=self,
+            binding=binding,
+            steps=tuple(steps),
+            handler_step=self._plan_step(binding.handler, binding.dep_types),
+        )
+
     def instantiate[DepT](self, dep: Dependency[DepT], resolve: Callable[[type], Any]) -> DepT:
-        param_types = annotated_param_types(dep.provider)
+        param_types = self._params.get(dep.dep_type)
+        if param_types is None:
+            param_types = annotated_param_types(dep.provider)
         if not param_types:
             return dep.provider()
         return dep.provider(**{name: resolve(t) for name, t in param_types.items()})
@@ -96,14 +135,26 @@ class DependencyContainer:
         self._singletons[dep_type] = instance
         return cast("DepT", instance)
 
+    def singletons(self) -> list[object]:
+        return [self.resolve_singleton(dep_type) for dep_type in self._singleton_start_order()]
+
     def lifecycle_singletons(self) -> list[Lifecycle]:
-        order = self._singleton_start_order()
-        resources: list[Lifecycle] = []
-        for dep_type in order:
+        return [instance for instance in self.singletons() if isinstance(instance, Lifecycle)]
+
+    def lifecycle_levels(self) -> list[list[tuple[Dependency, Lifecycle]]]:
+        # a singleton sits one level above the deepest singleton it requires, so each level only
+        # depends on earlier ones and its members can start concurrently
+        levels: dict[type, int] = {}
+        for dep_type in self._singleton_start_order():
+            reqs = self._singleton_requirements(self._deps[dep_type])
+            levels[dep_type] = 1 + max((levels[req] for req in reqs), default=-1)
+
+        grouped: list[list[tuple[Dependency, Lifecycle]]] = [[] for _ in range(max(levels.values(), default=-1) + 1)]
+        for dep_type, level in levels.items():
             instance = self.resolve_singleton(dep_type)
             if isinstance(instance, Lifecycle):
-                resources.append(instance)
-        return resources
+                grouped[level].append((self._deps[dep_type], instance))
+        return [level for level in grouped if level]
 
     def get_dependency[DepT](self, dep_type: type[DepT]) -> Dependency[DepT]:
         dep = self._deps.get(dep_type)
@@ -112,6 +163,41 @@ class DependencyContainer:
             raise KeyError(err_msg)
         return cast("Dependency[DepT]", dep)
 
+    def _is_singleton(self, dep_type: type) -> bool:
+        if dep_type in self._singletons:
+            return True
+        return self.get_dependency(dep_type).scope is Scope.SINGLETON
+
+    def _plan_step(
+        self,
+        provider: Callable[..., Any],
+        param_types: dict[str, type],
+        dep_type: type | None = None,
+    ) -> _PlanStep:
+        static: dict[str, object] = {}
+        deferred: list[tuple[str, type]] = []
+        scoped: list[tuple[str, type]] = []
+        for name, param_type in param_types.items():
+            if not self._is_singleton(param_type):
+                scoped.append((name, param_type))
+            elif param_type in self._singletons:
+                static[name] = self._singletons[param_type]
+            else:
+                # singleton not built yet (e.g. it depends on the bus), resolve lazily on dispatch
+                deferred.append((name, param_type))
+        return _PlanStep(
+            dep_type=dep_type,
+            provider=provider,
+            static=static,
+            deferred=tuple(deferred),
+            scoped=tuple(scoped),
+        )
+
+    def _singleton_requirements(self, dep: Dependency) -> set[type]:
+        # explicit ordering constraints plus the singletons its provider is built from
+        reqs = {*dep.requires, *self._params[dep.dep_type].values()}
+        return {req for req in reqs if req is not dep.dep_type and req in self._deps and self._is_singleton(req)}
+
     def _singleton_start_order(self) -> list[type]:
         singletons = [d for d in self._deps.values() if d.scope is Scope.SINGLETON]
         index = {d.dep_type: i for i, d in enumerate(singletons)}
@@ -119,9 +205,7 @@ class DependencyContainer:
         adj: dict[type, list[type]] = {d.dep_type: [] for d in singletons}
 
         for dep in singletons:
-            for req in dep.requires:
-                if req not in indegree:
-                    continue
+            for req in self._singleton_requirements(dep):
                 adj[req].append(dep.dep_type)
                 indegree[dep.dep_type] += 1
 
@@ -167,9 +251,58 @@ class DispatchScope:
         return cast("DepT", instance)
 
 
+@dataclass(frozen=True, kw_only=True)
+class _PlanStep:
+    dep_type: type | None
+    provider: Callable[..., Any]
+    static: dict[str, object]
+    deferred: tuple[tuple[str, type], ...]
+    scoped: tuple[tuple[str, type], ...]
+
+    def kwargs(self, container: DependencyContainer, resolved: dict[type, object]) -> dict[str, object]:
+        kwargs = dict(self.static)
+        for name, dep_type in self.deferred:
+            kwargs[name] = container.resolve_singleton(dep_type)
+        for name, dep_type in self.scoped:
+            kwargs[name] = resolved[dep_type]
+        return kwargs
+
+
+class DispatchPlan:
+    def __init__(
+        self,
+        container: DependencyContainer,
+        binding: MessageHandlerBinding,
+        steps: tuple[_PlanStep, ...],
+        handler_step: _PlanStep,
+    ) -> None:
+        self._container = container
+        self._steps = steps
+        self._handler_step = handler_step
+        self.binding = binding
+
+    @property
+    def handler(self) -> MessageHandler:
+        return self.binding.handler
+
+    def bind(self) -> tuple[dict[str, object], DispatchScope]:
+        scope = DispatchScope(self._container)
+        resolved = scope.resolved
+        for step in self._steps:
+            resolved[step.dep_type] = step.provider(**step.kwargs(self._container, resolved))
+        return self._handler_step.kwargs(self._container, resolved), scope
+
+
+def cpu_bound[HandlerT: MessageHandler](handler: HandlerT) -> HandlerT:
+    handler.__stega_cpu_bound__ = True
+    return handler
+
+
 def bind_handler[MessageT, MessageResponseT](
     handler: MessageHandler[MessageT, MessageResponseT],
     expected_msg_base: type[MessageT],
+    *,
+    cpu_bound: bool | None = None,
 ) -> MessageHandlerBinding[MessageT, MessageResponseT]:
     sig = inspect.signature(handler)
     hints = get_type_hints(handler)
@@ -194,10 +327,22 @@ def bind_handler[MessageT, MessageResponseT](
     # resolve parameter types by their annotations
     required_types = annotated_param_types(handler, skip=1)
 
+    # cpu bound handlers are pickled by reference into a worker process with only their message
+    if cpu_bound is None:
+        cpu_bound = getattr(handler, "__stega_cpu_bound__", False)
+    if cpu_bound and required_types:
+        err_msg = f"{handler.__qualname__} is cpu bound and cannot take injected dependencies"
+        raise TypeError(err_msg)
+    if cpu_bound and "<locals>" in handler.__qualname__:
+        err_msg = f"{handler.__qualname__} is cpu bound and must be defined at module level"
+        raise TypeError(err_msg)
+
     return MessageHandlerBinding(
         handler=handler,
         msg_type=msg_type,
         dep_types=required_types,
+        cpu_bound=cpu_bound,
+        service_publish=getattr(handler, "__stega_service_publish__", False),
     )
 
 
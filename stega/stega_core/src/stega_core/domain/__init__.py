@@ -1,11 +1,12 @@
 from stega_core.domain.aggregate import Aggregate
 from stega_core.domain.entity import DomainEntity
-from stega_core.domain.error import AppError, ConflictError, ResourceNotFoundError
+from stega_core.domain.error import AppError, ConflictError, OverloadedError, ResourceNotFoundError
 
 __all__ = [
     "Aggregate",
     "AppError",
     "ConflictError",
     "DomainEntity",
+    "OverloadedError",
     "ResourceNotFoundError",
 ]
@@ -8,3 +8,11 @@ class ConflictError(AppError):
 
 class ResourceNotFoundError(AppError):
     """Exception raised when a requested resource is not found in the service."""
+
+
+class OverloadedError(AppError):
+    """Exception raised when the service sheds load and the request should be retried later."""
+
+    def __init__(self, msg: str, retry_after: float) -> None:
+        super().__init__(msg)
+        self.retry_after = retry_after
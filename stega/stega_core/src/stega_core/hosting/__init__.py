@@ -1,7 +1,13 @@
+from stega_core.hosting.hub import (
+    TopicHub,
+    TopicHubStats,
+)
 from stega_core.hosting.hypercorn import (
+    run_hypercorn,
     serve_hypercorn,
 )
 from stega_core.hosting.marshal import (
+    compile_decoder,
     marshal,
 )
 from stega_core.hosting.quart import (
@@ -16,16 +22,32 @@ from stega_core.hosting.sse import (
     ServerSentEvent,
     decode,
 )
+from stega_core.hosting.stream import (
+    SseEncoding,
+    SseStream,
+    SseStreams,
+    SseStreamStats,
+    negotiate_encoding,
+)
 
 __all__ = [
     "Binding",
     "Origin",
     "Route",
     "ServerSentEvent",
+    "SseEncoding",
     "SseRoute",
+    "SseStream",
+    "SseStreamStats",
+    "SseStreams",
+    "TopicHub",
+    "TopicHubStats",
     "Wire",
     "build_quart_app",
+    "compile_decoder",
     "decode",
     "marshal",
+    "negotiate_encoding",
+    "run_hypercorn",
     "serve_hypercorn",
 ]
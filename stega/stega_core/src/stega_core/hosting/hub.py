@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from stega_core.hosting.sse import ServerSentEvent
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+    from stega_core.broker import Envelope, MessageBroker
+    from stega_core.codec import EnvelopeCodec
+    from stega_core.metrics import PrometheusText
+
+# comment frames keep idle connections open through proxies, clients ignore them
+HEARTBEAT = b": heartbeat\n\n"
+
+
+@dataclass(frozen=True, kw_only=True)
+class TopicHubStats:
+    topics: int
+    connections: int
+    fanned_out: int
+    dropped_connections: int
+    replayed: int
+
+
+@dataclass(eq=False, kw_only=True)
+class _Connection:
+    queue: asyncio.Queue[bytes | None]
+    dropped: bool = False
+
+
+@dataclass(eq=False, kw_only=True)
+class _TopicFeed:
+    replay: deque[tuple[int, bytes]]
+    task: asyncio.Task | None = None
+    connections: set[_Connection] = field(default_factory=set)
+    release: asyncio.TimerHandle | None = None
+
+
+class TopicHub:
+    def __init__(
+        self,
+        broker: MessageBroker,
+        codec: EnvelopeCodec,
+        connection_buffer: int = 256,
+        *,
+        replay_size: int = 1024,
+        linger_seconds: float = 30.0,
+    ) -> None:
+        self._broker = broker
+        self._codec = codec
+        self._connection_buffer = connection_buffer
+        self._replay_size = replay_size
+        self._linger_seconds = linger_seconds
+        self._feeds: dict[str, _TopicFeed] = {}
+        # last event id per topic, kept across feeds so ids never repeat while the hub runs
+        self._last_ids: dict[str, int] = {}
+        self._fanned_out = 0
+        self._dropped_connections = 0
+        self._replayed = 0
+
+    async def stop(self) -> None:
+        feeds, self._feeds = self._feeds, {}
+        for feed in feeds.values():
+            if feed.release is not None:
+                feed.release.cancel()
+            for connection in feed.connections:
+                _close(connection)
+            if feed.task is not None:
+                feed.task.cancel()
+        await asyncio.gather(*(f.task for f in feeds.values() if f.task is not None), return_exceptions=True)
+
+    async def stream(
+        self,
+        topic: str,
+        *,
+        last_event_id: int | None = None,
+        heartbeat_seconds: float | None = None,
+    ) -> AsyncIterator[bytes]:
+        connection = _Connection(queue=asyncio.Queue(maxsize=self._connection_buffer))
+        feed = self._feeds.get(topic)
+        if feed is None:
+            # the first connection for a topic opens its only upstream subscription
+            feed = self._feeds[topic] = _TopicFeed(replay=deque(maxlen=self._replay_size))
+            feed.task = asyncio.create_task(self._pump(topic, feed), name=f"topic-hub-{topic}")
+        elif feed.release is not None:
+            feed.release.cancel()
+            feed.release = None
+
+        # taken without yielding to the loop, live events queue up behind the missed ones
+        missed = [] if last_event_id is None else [chunk for i, chunk in feed.replay if i > last_event_id]
+        feed.connections.add(connection)
+        self._replayed += len(missed)
+
+        try:
+            for chunk in missed:
+                yield chunk
+            while not connection.dropped:
+                try:
+                    chunk = await asyncio.wait_for(connection.queue.get(), heartbeat_seconds)
+                except TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            feed.connections.discard(connection)
+            if not feed.connections and self._feeds.get(topic) is feed:
+                # the last connection left, the feed lingers for clients about to reconnect
+                if self._linger_seconds > 0:
+                    loop = asyncio.get_running_loop()
+                    feed.release = loop.call_later(self._linger_seconds, self._release, topic, feed)
+                else:
+                    self._release(topic, feed)
+
+    def stats(self) -> TopicHubStats:
+        return TopicHubStats(
+            topics=len(self._feeds),
+            connections=sum(len(f.connections) for f in self._feeds.values()),
+            fanned_out=self._fanned_out,
+            dropped_connections=self._dropped_connections,
+            replayed=self._replayed,
+        )
+
+    def collect_metrics(self, out: PrometheusText) -> None:
+        stats = self.stats()
+        out.gauge("stega_topic_hub_topics", "Topics with an upstream subscription.", [({}, stats.topics)])
+        out.gauge("stega_topic_hub_connections", "Connected sse clients.", [({}, stats.connections)])
+        out.counter(
+            "stega_topic_hub_fanned_out_total",
+            "Encoded events handed to sse connections.",
+            [({}, stats.fanned_out)],
+        )
+        out.counter(
+            "stega_topic_hub_dropped_connections_total",
+            "Sse connections dropped for falling behind.",
+            [({}, stats.dropped_connections)],
+        )
+        out.counter(
+            "stega_topic_hub_replayed_total",
+            "Missed events sent to reconnecting sse clients.",
+            [({}, stats.replayed)],
+        )
+
+    def encode(self, envelope: Envelope, sse_id: int | None = None) -> bytes:
+        event = ServerSentEvent(
+            data=self._codec.encode(envelope.payload).decode("utf-8"),
+            event=envelope.topic,
+            sse_id=sse_id,
+        )
+        return event.encode()
+
+    def _next_id(self, topic: str, envelope: Envelope) -> int:
+        # log brokers number envelopes durably, otherwise ids continue from the clock at startup
+        if envelope.offset is not None:
+            event_id = envelope.offset
+        else:
+            event_id = self._last_ids.get(topic, time.time_ns() // 1000) + 1
+        self._last_ids[topic] = event_id
+        return event_id
+
+    def _release(self, topic: str, feed: _TopicFeed) -> None:
+        feed.release = None
+        if feed.connections or self._feeds.get(topic) is not feed:
+            return
+        del self._feeds[topic]
+        if feed.task is not None:
+            feed.task.cancel()
+
+    async def _pump(self, topic: str, feed: _TopicFeed) -> None:
+        try:
+            async for envelope in self._broker.subscribe(topic):
+                # encoded once, every connection queues the same bytes
+                event_id = self._next_id(topic, envelope)
+                chunk = self.encode(envelope, event_id)
+                feed.replay.append((event_id, chunk))
+                for connection in list(feed.connections):
+                    try:
+                        connection.queue.put_nowait(chunk)
+                    except asyncio.QueueFull:
+                        self._dropped_connections += 1
+                        feed.connections.discard(connection)
+                        _close(connection)
+                self._fanned_out += len(feed.connections)
+        finally:
+            # the upstream ended, close every stream so clients reconnect to a fresh feed
+            if self._feeds.get(topic) is feed:
+                del self._feeds[topic]
+            if feed.release is not None:
+                feed.release.cancel()
+            for connection in feed.connections:
+                _close(connection)
+
+
+def _close(connection: _Connection) -> None:
+    connection.dropped = True
+    with contextlib.suppress(asyncio.QueueFull):
+        connection.queue.put_nowait(None)
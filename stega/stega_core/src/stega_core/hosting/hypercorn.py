@@ -1,16 +1,33 @@
+import asyncio
+import contextlib
 import logging
+import multiprocessing
+import signal
+import socket
+import time
+from collections.abc import Callable
+from multiprocessing.connection import wait
+from multiprocessing.process import BaseProcess
+from typing import Any
 
 from hypercorn.asyncio import serve
 from hypercorn.config import Config as HypercornConfig
 from hypercorn.logging import Logger as HypercornLogger
 from quart import Quart
 
+_WORKER_RESTART_DELAY_SECONDS = 1.0
 
-async def serve_hypercorn(
+
+async def serve_hypercorn(  # noqa: PLR0913
     app: Quart,
     log_level: int = logging.INFO,
     host: str = "127.0.0.1",
     port: int = 5000,
+    *,
+    keep_alive: float = 5.0,
+    backlog: int = 100,
+    fd: int | None = None,
+    worker_id: int = 0,
 ) -> None:
     # override hypercorn logging to stay consistent with app logging
     class CustomLogger(HypercornLogger):
@@ -27,10 +44,122 @@ async def serve_hypercorn(
                     logger.setLevel(log_level)
                     logger.propagate = True
 
-    # create hypercorn config for serving
+    # create hypercorn config for serving, workers listen on the socket they bound themselves
     hc_config = HypercornConfig()
-    hc_config.bind = [f"{host}:{port}"]
+    hc_config.bind = [f"{host}:{port}" if fd is None else f"fd://{fd}"]
+    hc_config.keep_alive_timeout = keep_alive
+    hc_config.backlog = backlog
     hc_config.logger_class = CustomLogger
 
     # create and serve app
+    app.config["WORKER_ID"] = worker_id
     await serve(app, hc_config)
+
+
+def run_hypercorn(  # noqa: PLR0913
+    app_factory: Callable[[], Quart],
+    log_level: int = logging.INFO,
+    host: str = "127.0.0.1",
+    port: int = 5000,
+    *,
+    workers: int = 1,
+    keep_alive: float = 5.0,
+    backlog: int = 100,
+    use_uvloop: bool = False,
+) -> None:
+    options = {"log_level": log_level, "host": host, "port": port, "keep_alive": keep_alive, "backlog": backlog}
+    if workers <= 1:
+        _run(serve_hypercorn(app_factory(), **options), use_uvloop=use_uvloop)
+        return
+    if not hasattr(socket, "SO_REUSEPORT"):
+        err_msg = "Serving with multiple workers requires SO_REUSEPORT"
+        raise RuntimeError(err_msg)
+    if use_uvloop:
+        _require_uvloop()
+
+    # forked workers inherit the configured process and build their own app and service lifespan
+    ctx = multiprocessing.get_context("fork")
+
+    def spawn(worker_id: int) -> BaseProcess:
+        process = ctx.Process(
+            target=_run_worker,
+            args=(app_factory, worker_id, use_uvloop, options),
+            name=f"hypercorn-worker-{worker_id}",
+        )
+        process.start()
+        return process
+
+    _supervise(spawn, workers)
+
+
+def _supervise(spawn: Callable[[int], BaseProcess], workers: int) -> None:
+    stopping = False
+
+    def stop(*_: Any) -> None:  # noqa: ANN401
+        nonlocal stopping
+        stopping = True
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+
+    processes = {worker_id: spawn(worker_id) for worker_id in range(workers)}
+    previous = {sig: signal.signal(sig, stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+    logger = logging.getLogger(__name__)
+    try:
+        while processes:
+            wait([process.sentinel for process in processes.values()])
+            for worker_id, process in list(processes.items()):
+                if process.is_alive():
+                    continue
+                process.join()
+                del processes[worker_id]
+                if stopping:
+                    continue
+                # a crashed worker is replaced, the others keep serving meanwhile
+                logger.error("Worker %d exited with code %s, restarting", worker_id, process.exitcode)
+                time.sleep(_WORKER_RESTART_DELAY_SECONDS)
+                if not stopping:
+                    processes[worker_id] = spawn(worker_id)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+
+def _run_worker(
+    app_factory: Callable[[], Quart],
+    worker_id: int,
+    use_uvloop: bool,  # noqa: FBT001
+    options: dict[str, Any],
+) -> None:
+    # the supervisor's handlers are replaced by hypercorn's graceful shutdown handlers
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, signal.SIG_DFL)
+    fd = _bind_reuse_port(options["host"], options["port"])
+    coro = serve_hypercorn(app_factory(), **options, fd=fd, worker_id=worker_id)
+    with contextlib.suppress(KeyboardInterrupt):
+        _run(coro, use_uvloop=use_uvloop)
+
+
+def _bind_reuse_port(host: str, port: int) -> int:
+    # every worker binds the same address and the kernel balances connections across them
+    host = host.strip("[]")
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind((host, port))
+    # hypercorn takes ownership of the descriptor
+    return sock.detach()
+
+
+def _run(coro: Any, *, use_uvloop: bool) -> None:  # noqa: ANN401
+    loop_factory = _require_uvloop().new_event_loop if use_uvloop else None
+    asyncio.run(coro, loop_factory=loop_factory)
+
+
+def _require_uvloop() -> Any:  # noqa: ANN401
+    try:
+        return __import__("uvloop")
+    except ImportError as err:
+        err_msg = "UVLOOP requires the 'uvloop' extra of stega_core"
+        raise RuntimeError(err_msg) from err
@@ -1,67 +1,130 @@
+from collections.abc import Callable
 from dataclasses import MISSING, fields
 from types import UnionType
 from typing import Any, Union, get_args, get_origin, get_type_hints
 
 from stega_core.message import Message
 
+type Coercer = Callable[[Any], Any]
+type Decoder[MessageT: Message] = Callable[[dict[str, Any]], MessageT]
 
-def marshal(msg_type: type[Message], data: dict[str, Any]) -> Message:
-    hints = get_type_hints(msg_type)
-    kwargs = {}
-    missing = []
-    for fld in fields(msg_type):
-        if fld.name in data:
-            kwargs[fld.name] = coerce(data[fld.name], hints[fld.name])
-        elif fld.default is not MISSING or fld.default_factory is not MISSING:
-            continue
-        else:
-            missing.append(fld.name)
-    if missing:
-        err_msg = f"missing required fields: {', '.join(missing)}"
-        raise ValueError(err_msg)
-    return msg_type(**kwargs)
-
-
-def coerce(  # noqa: PLR0911, C901
+# compiled once per message type and annotation, decoding never reflects on the message again
+_DECODERS: dict[type[Message], Decoder] = {}
+_COERCERS: dict[Any, Coercer] = {}
+
+
+def marshal[MessageT: Message](msg_type: type[MessageT], data: dict[str, Any]) -> MessageT:
+    decoder = _DECODERS.get(msg_type)
+    if decoder is None:
+        decoder = _DECODERS[msg_type] = compile_decoder(msg_type)
+    return decoder(data)
+
+
+def coerce(
     value: Any,  # noqa: ANN401
     annotation: type,
 ) -> Any:  # noqa: ANN401
+    return compile_coercer(annotation)(value)
+
+
+def compile_decoder[MessageT: Message](msg_type: type[MessageT]) -> Decoder[MessageT]:
+    hints = get_type_hints(msg_type)
+    plan: list[tuple[str, Coercer | None, bool]] = []
+    for fld in fields(msg_type):
+        coercer = compile_coercer(hints[fld.name])
+        has_default = fld.default is not MISSING or fld.default_factory is not MISSING
+        plan.append((fld.name, None if coercer is _identity else coercer, has_default))
+    steps = tuple(plan)
+
+    def decode(data: dict[str, Any]) -> MessageT:
+        kwargs = {}
+        missing = []
+        for name, coercer, has_default in steps:
+            if name in data:
+                kwargs[name] = data[name] if coercer is None else coercer(data[name])
+            elif not has_default:
+                missing.append(name)
+        if missing:
+            err_msg = f"missing required fields: {', '.join(missing)}"
+            raise ValueError(err_msg)
+        return msg_type(**kwargs)
+
+    decode.__qualname__ = f"decode_{msg_type.__name__}"
+    return decode
+
+
+def compile_coercer(annotation: type) -> Coercer:
+    try:
+        coercer = _COERCERS.get(annotation)
+    except TypeError:
+        # unhashable annotations are compiled without caching
+        return _compile_coercer(annotation)
+    if coercer is None:
+        coercer = _COERCERS[annotation] = _compile_coercer(annotation)
+    return coercer
+
+
+def _compile_coercer(annotation: type) -> Coercer:  # noqa: C901
     origin = get_origin(annotation)
 
     # handle Optional[T] = T | None annotations
     if origin in (Union, UnionType):
-        if value is None:
-            return None
         args = [arg for arg in get_args(annotation) if arg is not type(None)]
-        return coerce(value, args[0])
+        inner = compile_coercer(args[0])
+
+        def coerce_optional(value: Any) -> Any:  # noqa: ANN401
+            return None if value is None else inner(value)
+
+        return coerce_optional
 
     # handle list[T] annotations
     if origin is list:
-        (inner,) = get_args(annotation) or (Any,)
-        if not isinstance(value, list):
-            err_msg = f"expected list, got {type(value).__name__}"
-            raise TypeError(err_msg)
-        return [coerce(val, inner) for val in value]
+        (inner_t,) = get_args(annotation) or (Any,)
+        inner = compile_coercer(inner_t)
+
+        def coerce_list(value: Any) -> Any:  # noqa: ANN401
+            if not isinstance(value, list):
+                err_msg = f"expected list, got {type(value).__name__}"
+                raise TypeError(err_msg)
+            return [inner(val) for val in value]
+
+        return coerce_list
 
     # handle dict[K, V] annotations
     if origin is dict:
         key_t, val_t = get_args(annotation) or (Any, Any)
-        if not isinstance(value, dict):
-            err_msg = f"expected dict, got {type(value).__name__}"
-            raise TypeError(err_msg)
-        return {coerce(k, key_t): coerce(v, val_t) for k, v in value.items()}
+        key, val = compile_coercer(key_t), compile_coercer(val_t)
+
+        def coerce_dict(value: Any) -> Any:  # noqa: ANN401
+            if not isinstance(value, dict):
+                err_msg = f"expected dict, got {type(value).__name__}"
+                raise TypeError(err_msg)
+            return {key(k): val(v) for k, v in value.items()}
+
+        return coerce_dict
 
     # handle any/None
     if annotation is Any or annotation is None:
-        return value
+        return _identity
 
     # handle booleans
     if annotation is bool:
-        if isinstance(value, bool):
-            return value
-        return str(value).strip().lower() in {"1", "true", "yes", "on"}
+        return _coerce_bool
 
     # primitive coercion
-    if isinstance(value, annotation):
+    def coerce_primitive(value: Any) -> Any:  # noqa: ANN401
+        if isinstance(value, annotation):
+            return value
+        return annotation(value)
+
+    return coerce_primitive
+
+
+def _identity(value: Any) -> Any:  # noqa: ANN401
+    return value
+
+
+def _coerce_bool(value: Any) -> bool:  # noqa: ANN401
+    if isinstance(value, bool):
         return value
-    return annotation(value)
+    return str(value).strip().lower() in {"1", "true", "yes", "on"}
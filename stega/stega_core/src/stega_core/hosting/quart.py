@@ -1,24 +1,36 @@
+import contextlib
 import functools
-import json
 import logging
+import math
+import os
 from collections.abc import AsyncIterator, Awaitable, Callable
 from dataclasses import dataclass, field
 from enum import StrEnum
 from typing import Any, TypedDict
 
+from flask.json.provider import DefaultJSONProvider
 from quart import Quart, Request, Response, current_app, make_response, request
 
 from stega_core.bootstrap import Service
+from stega_core.broker.topic import topic_matches
 from stega_core.bus import MessageBus
+from stega_core.codec import EnvelopeCodec, codec_for_content_type, text_codec
+from stega_core.completion import CompletionStatus
 from stega_core.context import current_context, set_context
 from stega_core.domain import (
     AppError,
     ConflictError,
+    OverloadedError,
     ResourceNotFoundError,
 )
+from stega_core.hosting.hub import TopicHub
 from stega_core.hosting.marshal import marshal
 from stega_core.hosting.sse import ServerSentEvent
-from stega_core.message import Command, Message, MessageResponse, Query
+from stega_core.hosting.stream import SseEncoding, SseStreams, negotiate_encoding
+from stega_core.message import Command, CommandResponse, EncodedView, Message, MessageResponse, Query
+
+_COMPLETION_TIMEOUT_SECONDS = 25.0
+_MAX_COMPLETION_TIMEOUT_SECONDS = 60.0
 
 
 class Wire(StrEnum):
@@ -52,6 +64,7 @@ class ResponsePayload(TypedDict):
 
 
 type AppResponse = tuple[ResponsePayload, int]
+type AppResponseWithHeaders = tuple[ResponsePayload, int, dict[str, str]]
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -68,6 +81,15 @@ class Route:
 class SseRoute:
     path: str
     prefix: str | None = None
+    # reconnection delay suggested to clients and the idle time before a heartbeat comment
+    retry_ms: int = 3000
+    heartbeat_seconds: float = 15.0
+    # events arriving within the window share one write, none waits longer than the max latency
+    coalesce_window_seconds: float = 0.005
+    max_latency_seconds: float = 0.05
+    max_batch_bytes: int = 64 * 1024
+    # gzip or deflate the stream for clients that accept it
+    compression: bool = True
 
 
 async def deserialize(route: Route, request: Request) -> tuple[Message, dict[str, Any]]:
@@ -94,6 +116,33 @@ async def deserialize(route: Route, request: Request) -> tuple[Message, dict[str
     return marshal(route.msg_type, raw), ctx
 
 
+class CodecJSONProvider(DefaultJSONProvider):
+    def __init__(self, app: Quart, codec: EnvelopeCodec) -> None:
+        super().__init__(app)
+        self._codec = codec
+        self._text_codec = text_codec(codec)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:  # noqa: ANN401
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._text_codec.encode(obj).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:  # noqa: ANN401
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self._text_codec.decode(s.encode("utf-8") if isinstance(s, str) else s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:  # noqa: ANN401
+        obj = self._prepare_response_obj(args, kwargs)
+        codec = self.negotiate()
+        return self._app.response_class(codec.encode(obj), mimetype=codec.content_type)
+
+    def negotiate(self) -> EnvelopeCodec:
+        # binary codecs are only used for clients that asked for them
+        accepted = request.accept_mimetypes.best_match([self._text_codec.content_type, self._codec.content_type])
+        return self._codec if accepted == self._codec.content_type else self._text_codec
+
+
 def get_service() -> Service:
     return current_app.extensions["service"]
 
@@ -118,7 +167,7 @@ def make_app_response(
 async def handle_request(
     route: Route,
     **_: Any,  # noqa: ANN401
-) -> AppResponse:
+) -> AppResponse | Response:
     # deserialize raw request into message and context vars
     message, ctxvars = await deserialize(route, request)
 
@@ -145,12 +194,32 @@ async def handle_request(
         raise AppError(err_msg)
 
     if not resp.ok:
+        if isinstance(resp, CommandResponse) and resp.retry_after is not None:
+            raise OverloadedError(resp.error, retry_after=resp.retry_after)
         raise AppError(resp.error)
 
+    if isinstance(result, EncodedView):
+        # an upstream response in the codec the client asked for is returned byte for byte
+        codec: EnvelopeCodec = current_app.json.negotiate()
+        content_type = result.content_type.partition(";")[0].strip().lower()
+        if content_type == codec.content_type:
+            return current_app.response_class(result.body, status=return_code, mimetype=codec.content_type)
+        result = codec_for_content_type(result.content_type, codec).decode(result.body)["result"]
+
     return make_app_response(resp.ok, route.msg_callback(resp), result, return_code)
 
 
-def app_exception_handler(exc: Exception, logger: logging.Logger) -> AppResponse:
+def app_exception_handler(exc: Exception, logger: logging.Logger) -> AppResponse | AppResponseWithHeaders:
+    if isinstance(exc, OverloadedError):
+        logger.warning(exc)
+        payload, return_code = make_app_response(
+            ok=False,
+            msg=str(exc),
+            result=None,
+            return_code=429,
+        )
+        return payload, return_code, {"Retry-After": str(math.ceil(exc.retry_after))}
+
     return_code = 500
     if isinstance(exc, ConflictError):
         return_code = 409
@@ -169,13 +238,49 @@ def app_exception_handler(exc: Exception, logger: logging.Logger) -> AppResponse
     )
 
 
-def make_sse_handler() -> Callable[..., Awaitable[Response]]:
+async def handle_command_completion(correlation_id: str) -> AppResponse:
+    try:
+        timeout = float(request.args.get("timeout", _COMPLETION_TIMEOUT_SECONDS))
+    except ValueError as err:
+        err_msg = f"Invalid timeout '{request.args['timeout']}'"
+        raise AppError(err_msg) from err
+    timeout = min(max(timeout, 0.0), _MAX_COMPLETION_TIMEOUT_SECONDS)
+
+    completion = await get_bus().wait_for(correlation_id, timeout)
+    if completion is None:
+        err_msg = f"Command '{correlation_id}' is unknown or expired"
+        raise ResourceNotFoundError(err_msg)
+    if not completion.done:
+        return make_app_response(
+            ok=True,
+            msg=f"Command '{correlation_id}' is still pending",
+            result=completion.serialize(),
+            return_code=202,
+        )
+    return make_app_response(
+        ok=completion.status is CompletionStatus.SUCCEEDED,
+        msg=f"Command '{correlation_id}' {completion.status.value}",
+        result=completion.serialize(),
+        return_code=200,
+    )
+
+
+async def handle_metrics() -> tuple[str, int, dict[str, str]]:
+    collectors = [current_app.extensions.get(name) for name in ("topic_hub", "sse_streams")]
+    metrics = get_service().render_metrics(*(c for c in collectors if c is not None))
+    return metrics, 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+
+def make_sse_handler(sse_route: SseRoute) -> Callable[..., Awaitable[Response]]:
+    retry = ServerSentEvent(retry=sse_route.retry_ms).encode()
+
     async def handle_sse(
         topic: str,
         **_: Any,  # noqa: ANN401
     ) -> Response:
         service = get_service()
-        if topic not in service.bus.subscribed_topics:
+        # a topic or a pattern following at least one client event, only those reach the client broker
+        if not _follows_client_topic(topic, service.client_topics):
             return make_app_response(
                 ok=False,
                 msg=f"No topic found for '{topic}'!",
@@ -183,28 +288,73 @@ def make_sse_handler() -> Callable[..., Awaitable[Response]]:
                 return_code=400,
             )
 
-        client_broker = service.client_broker
+        hub: TopicHub = current_app.extensions["topic_hub"]
+        streams: SseStreams = current_app.extensions["sse_streams"]
+        # browsers send the id of the last event they saw when reconnecting
+        last_event_id = _parse_event_id(request.headers.get("Last-Event-ID"))
 
         async def send_events() -> AsyncIterator[bytes]:
-            async for envelope in client_broker.subscribe(topic):
-                event = ServerSentEvent(
-                    data=json.dumps(envelope.payload),
-                    event=envelope.topic,
-                )
-                yield event.encode()
+            yield retry
+            stream = hub.stream(
+                topic,
+                last_event_id=last_event_id,
+                heartbeat_seconds=sse_route.heartbeat_seconds,
+            )
+            async for chunk in stream:
+                yield chunk
+
+        encoding = SseEncoding.IDENTITY
+        if sse_route.compression:
+            encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+        output = streams.open(
+            send_events(),
+            topic=topic,
+            encoding=encoding,
+            window_seconds=sse_route.coalesce_window_seconds,
+            max_latency_seconds=sse_route.max_latency_seconds,
+            max_batch_bytes=sse_route.max_batch_bytes,
+        )
+
+        async def write_events() -> AsyncIterator[bytes]:
+            try:
+                # closed with the response so the upstream subscription is released right away
+                async with contextlib.aclosing(aiter(output)) as chunks:
+                    async for chunk in chunks:
+                        yield chunk
+            finally:
+                streams.close(output)
 
         headers = {
             "Content-Type": "text/event-stream",
             "Cache-Control": "no-cache",
             "Transfer-Encoding": "chunked",
+            "Vary": "Accept-Encoding",
         }
-        response = await make_response(send_events(), headers)
+        if encoding is not SseEncoding.IDENTITY:
+            headers["Content-Encoding"] = encoding.value
+        response = await make_response(write_events(), headers)
         response.timeout = None
         return response
 
     return handle_sse
 
 
+def _parse_event_id(value: str | None) -> int | None:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _follows_client_topic(pattern: str, client_topics: frozenset[str]) -> bool:
+    try:
+        return any(topic_matches(pattern, topic) for topic in client_topics)
+    except ValueError:
+        return False
+
+
 def build_quart_app(
     service: Service,
     routes: list[Route],
@@ -214,6 +364,7 @@ def build_quart_app(
         sse_routes = []
 
     app = Quart(__name__)
+    app.json = CodecJSONProvider(app, service.codec)
 
     # setup service lifespan
     app.extensions = getattr(app, "extensions", {})
@@ -222,9 +373,19 @@ def build_quart_app(
     async def _manage_service() -> Awaitable[None]:
         async with service.lifespan():
             app.extensions["service"] = service
+            # sse connections share one upstream subscription per topic
+            hub = None
+            if sse_routes:
+                # sse frames are text, binary codecs fall back to json
+                hub = app.extensions["topic_hub"] = TopicHub(service.client_broker, text_codec(service.codec))
+                app.extensions["sse_streams"] = SseStreams()
             try:
                 yield
             finally:
+                if hub is not None:
+                    await hub.stop()
+                app.extensions.pop("topic_hub", None)
+                app.extensions.pop("sse_streams", None)
                 app.extensions.pop("service", None)
 
     # register routes
@@ -243,7 +404,7 @@ def build_quart_app(
 
     # register sse routes
     for sse_route in sse_routes:
-        handler = make_sse_handler()
+        handler = make_sse_handler(sse_route)
         rule = sse_route.path if sse_route.prefix is None else f"{sse_route.prefix}{sse_route.path}"
         app.add_url_rule(
             rule=rule,
@@ -252,13 +413,30 @@ def build_quart_app(
             methods=["GET"],
         )
 
+    # add command completion long-poll route
+    app.add_url_rule(
+        rule="/api/commands/<string:correlation_id>",
+        endpoint="command_completion",
+        view_func=handle_command_completion,
+        methods=["GET"],
+    )
+
+    # add metrics route
+    app.add_url_rule(
+        rule="/api/metrics",
+        endpoint="metrics",
+        view_func=handle_metrics,
+        methods=["GET"],
+    )
+
     # add health route
     @app.route("/api/health", methods=["GET"])
     async def health() -> AppResponse:
+        # workers share the listening address, the pid tells which one answered
         return make_app_response(
             ok=True,
             msg="Service is healthy!",
-            result=None,
+            result={"pid": os.getpid(), "worker_id": app.config.get("WORKER_ID", 0)},
             return_code=200,
         )
 
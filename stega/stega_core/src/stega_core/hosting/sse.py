@@ -9,7 +9,7 @@ if TYPE_CHECKING:
 
 @dataclass
 class ServerSentEvent:
-    data: str
+    data: str | None = None
     event: str | None = None
     sse_id: int | None = None
     retry: int | None = None
@@ -22,7 +22,8 @@ class ServerSentEvent:
             lines.append(f"id: {self.sse_id}")
         if self.retry is not None:
             lines.append(f"retry: {self.retry}")
-        lines.append(f"data: {self.data}")
+        if self.data is not None:
+            lines.append(f"data: {self.data}")
         return ("\n".join(lines) + "\n\n").encode("utf-8")
 
 
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import zlib
+from dataclasses import dataclass
+from enum import StrEnum
+from time import monotonic
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+    from stega_core.metrics import PrometheusText
+
+
+class SseEncoding(StrEnum):
+    IDENTITY = "identity"
+    GZIP = "gzip"
+    DEFLATE = "deflate"
+
+
+# zlib window bits selecting the gzip and zlib (http "deflate") containers
+_WBITS = {SseEncoding.GZIP: 16 + zlib.MAX_WBITS, SseEncoding.DEFLATE: zlib.MAX_WBITS}
+
+
+def negotiate_encoding(accept_encoding: str | None) -> SseEncoding:
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                with contextlib.suppress(ValueError):
+                    quality = float(value)
+        accepted[name.strip().lower()] = quality
+    for encoding in (SseEncoding.GZIP, SseEncoding.DEFLATE):
+        if accepted.get(encoding, 0.0) > 0:
+            return encoding
+    return SseEncoding.IDENTITY
+
+
+@dataclass(frozen=True, kw_only=True)
+class SseStreamStats:
+    stream_id: int
+    topic: str
+    encoding: SseEncoding
+    events: int
+    flushes: int
+    bytes_in: int
+    bytes_out: int
+    seconds: float
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes_out / self.seconds if self.seconds > 0 else 0.0
+
+
+class SseStream:
+    def __init__(  # noqa: PLR0913
+        self,
+        chunks: AsyncIterator[bytes],
+        *,
+        topic: str,
+        stream_id: int = 0,
+        encoding: SseEncoding = SseEncoding.IDENTITY,
+        window_seconds: float = 0.005,
+        max_latency_seconds: float = 0.05,
+        max_batch_bytes: int = 64 * 1024,
+    ) -> None:
+        self._chunks = chunks
+        self._topic = topic
+        self._stream_id = stream_id
+        self._encoding = encoding
+        self._window_seconds = window_seconds
+        self._max_latency_seconds = max_latency_seconds
+        self._max_batch_bytes = max_batch_bytes
+        self._compressor = zlib.compressobj(wbits=_WBITS[encoding]) if encoding in _WBITS else None
+        self._pending: list[bytes] = []
+        self._pending_bytes = 0
+        self._pending_since = 0.0
+        self._ready = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._ended = False
+        self._started_at = monotonic()
+        self._events = 0
+        self._flushes = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+
+    @property
+    def encoding(self) -> SseEncoding:
+        return self._encoding
+
+    def stats(self) -> SseStreamStats:
+        return SseStreamStats(
+            stream_id=self._stream_id,
+            topic=self._topic,
+            encoding=self._encoding,
+            events=self._events,
+            flushes=self._flushes,
+            bytes_in=self._bytes_in,
+            bytes_out=self._bytes_out,
+            seconds=monotonic() - self._started_at,
+        )
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        pump = asyncio.create_task(self._pump(), name=f"sse-stream-{self._stream_id}")
+        try:
+            while True:
+                await self._ready.wait()
+                await self._coalesce()
+                batch = self._take()
+                if batch:
+                    yield self._write(batch)
+                if self._ended and not self._pending:
+                    if self._compressor is not None:
+                        yield self._finish()
+                    break
+        finally:
+            pump.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await pump
+
+    async def _pump(self) -> None:
+        try:
+            async for chunk in self._chunks:
+                # a client that reads slower than events arrive holds the upstream back
+                while self._pending_bytes >= self._max_batch_bytes:
+                    self._drained.clear()
+                    await self._drained.wait()
+                if not self._pending:
+                    self._pending_since = monotonic()
+                self._pending.append(chunk)
+                self._pending_bytes += len(chunk)
+                self._ready.set()
+        finally:
+            self._ended = True
+            self._ready.set()
+
+    async def _coalesce(self) -> None:
+        # keep waiting while events still arrive within a window, bounded by the max latency
+        while not self._ended and self._pending_bytes < self._max_batch_bytes:
+            remaining = self._pending_since + self._max_latency_seconds - monotonic()
+            if remaining <= 0:
+                return
+            count = len(self._pending)
+            await asyncio.sleep(min(self._window_seconds, remaining))
+            if len(self._pending) == count:
+                return
+
+    def _take(self) -> list[bytes]:
+        batch, self._pending, self._pending_bytes = self._pending, [], 0
+        self._ready.clear()
+        self._drained.set()
+        return batch
+
+    def _write(self, batch: list[bytes]) -> bytes:
+        data = b"".join(batch)
+        out = data
+        if self._compressor is not None:
+            # a sync flush ends every write on a byte boundary the client can decode right away
+            out = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        self._events += len(batch)
+        self._flushes += 1
+        self._bytes_in += len(data)
+        self._bytes_out += len(out)
+        return out
+
+    def _finish(self) -> bytes:
+        # the gzip and zlib containers end with a trailer, without it clients see a truncated body
+        out = self._compressor.flush()
+        self._bytes_out += len(out)
+        return out
+
+
+class SseStreams:
+    def __init__(self) -> None:
+        self._ids = itertools.count(1)
+        self._open: set[SseStream] = set()
+        # totals of closed streams, open streams add their own when collected
+        self._closed = 0
+        self._events = 0
+        self._flushes = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+
+    def open(self, chunks: AsyncIterator[bytes], **options: Any) -> SseStream:  # noqa: ANN401
+        stream = SseStream(chunks, stream_id=next(self._ids), **options)
+        self._open.add(stream)
+        return stream
+
+    def close(self, stream: SseStream) -> None:
+        if stream not in self._open:
+            return
+        self._open.discard(stream)
+        stats = stream.stats()
+        self._closed += 1
+        self._events += stats.events
+        self._flushes += stats.flushes
+        self._bytes_in += stats.bytes_in
+        self._bytes_out += stats.bytes_out
+
+    def stats(self) -> list[SseStreamStats]:
+        return sorted((s.stats() for s in self._open), key=lambda s: s.stream_id)
+
+    def collect_metrics(self, out: PrometheusText) -> None:
+        stats = self.stats()
+        out.counter(
+            "stega_sse_streams_closed_total",
+            "Sse streams that ended.",
+            [({}, self._closed)],
+        )
+        out.counter(
+            "stega_sse_events_total",
+            "Sse frames written to clients.",
+            [({}, self._events + sum(s.events for s in stats))],
+        )
+        out.counter(
+            "stega_sse_flushes_total",
+            "Coalesced writes to sse clients.",
+            [({}, self._flushes + sum(s.flushes for s in stats))],
+        )
+        out.counter(
+            "stega_sse_bytes_in_total",
+            "Sse bytes before compression.",
+            [({}, self._bytes_in + sum(s.bytes_in for s in stats))],
+        )
+        out.counter(
+            "stega_sse_bytes_out_total",
+            "Sse bytes written to clients.",
+            [({}, self._bytes_out + sum(s.bytes_out for s in stats))],
+        )
+        out.gauge(
+            "stega_sse_stream_bytes_per_second",
+            "Average write rate of each open sse stream.",
+            [(_labels(s), s.bytes_per_second) for s in stats],
+        )
+        out.gauge(
+            "stega_sse_stream_flushes",
+            "Writes made by each open sse stream.",
+            [(_labels(s), s.flushes) for s in stats],
+        )
+
+
+def _labels(stats: SseStreamStats) -> dict[str, str]:
+    return {"stream": str(stats.stream_id), "topic": stats.topic, "encoding": stats.encoding.value}
@@ -13,7 +13,7 @@ from stega_core.message.response import (
     Response,
     SubmissionStatus,
 )
-from stega_core.message.view import View
+from stega_core.message.view import EncodedView, View
 
 type Message = Command | Event | Query
 type MessageResponse = Response | None
@@ -22,6 +22,7 @@ type MessageResponse = Response | None
 __all__ = [
     "Command",
     "CommandResponse",
+    "EncodedView",
     "Event",
     "EventDispatch",
     "Message",
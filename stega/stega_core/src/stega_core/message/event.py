@@ -38,6 +38,10 @@ class EventDispatch(Enum):
 class Event(ABC):
     topic: ClassVar[str]
     dispatch: ClassVar[EventDispatch] = EventDispatch.ASYNC
+    # field holding the aggregate id, events sharing it are processed in order
+    partition_key: ClassVar[str | None] = None
+    # payload fields kept from clients when the event is relayed to the client broker
+    internal_fields: ClassVar[frozenset[str]] = frozenset()
     _registry: ClassVar[dict[str, type[Event]]] = {}
 
     correlation_id: str = field(default_factory=get_correlation_id)
@@ -54,6 +58,10 @@ class Event(ABC):
         if not hasattr(cls, "topic") or not isinstance(cls.topic, str):
             err_msg = f"{cls.__name__} must define a class-level `topic: ClassVar[str]`"
             raise TypeError(err_msg)
+        # wildcards are for subscribing, an event is published under one concrete topic
+        if any(word in {"", "*", "#"} for word in cls.topic.split(".")):
+            err_msg = f"{cls.__name__} topic '{cls.topic}' must be dot separated words without wildcards"
+            raise TypeError(err_msg)
 
         # register event type
         if cls.topic in Event._registry:
@@ -66,6 +74,12 @@ class Event(ABC):
                 raise ValueError(err_msg)
         Event._registry[cls.topic] = cls
 
+    @property
+    def partition(self) -> str:
+        if self.partition_key is None:
+            return self.correlation_id
+        return str(getattr(self, self.partition_key))
+
     @classmethod
     def for_topic(cls, topic: str) -> type[Event]:
         try:
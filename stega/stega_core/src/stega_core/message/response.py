@@ -27,6 +27,8 @@ class Response:
 class CommandResponse(Response):
     status: SubmissionStatus
     correlation_id: str
+    # seconds a rejected submitter should wait before retrying
+    retry_after: float | None = None
 
 
 @dataclass(frozen=True, kw_only=True)
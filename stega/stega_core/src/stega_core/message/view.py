@@ -1,2 +1,12 @@
+from dataclasses import dataclass
+
+
 class View:
     pass
+
+
+@dataclass(frozen=True, kw_only=True)
+class EncodedView(View):
+    # an upstream response body kept in its wire format, decoded only when it has to be transformed
+    body: bytes
+    content_type: str
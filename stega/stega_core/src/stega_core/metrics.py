@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import defaultdict
+from typing import TYPE_CHECKING, Protocol, runtime_checkable
+
+from stega_core.message import Command, Query
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from stega_core.message import Message
+
+type Labels = dict[str, str]
+
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+CASCADE_BUCKETS: tuple[float, ...] = (0, 1, 2, 3, 5, 8, 13)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class PrometheusText:
+    def __init__(self) -> None:
+        self._lines: list[str] = []
+
+    def counter(self, name: str, doc: str, samples: Iterable[tuple[Labels, float]]) -> None:
+        self._metric(name, doc, "counter", samples)
+
+    def gauge(self, name: str, doc: str, samples: Iterable[tuple[Labels, float]]) -> None:
+        self._metric(name, doc, "gauge", samples)
+
+    def histogram(self, name: str, doc: str, samples: Iterable[tuple[Labels, Histogram]]) -> None:
+        self._header(name, doc, "histogram")
+        for labels, hist in samples:
+            cumulative = 0
+            for bound, count in zip((*hist.buckets, float("inf")), hist.counts, strict=True):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                self._sample(f"{name}_bucket", {**labels, "le": le}, cumulative)
+            self._sample(f"{name}_sum", labels, hist.total)
+            self._sample(f"{name}_count", labels, hist.count)
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+    def _metric(self, name: str, doc: str, kind: str, samples: Iterable[tuple[Labels, float]]) -> None:
+        self._header(name, doc, kind)
+        for labels, value in samples:
+            self._sample(name, labels, value)
+
+    def _header(self, name: str, doc: str, kind: str) -> None:
+        self._lines.append(f"# HELP {name} {doc}")
+        self._lines.append(f"# TYPE {name} {kind}")
+
+    def _sample(self, name: str, labels: Labels, value: float) -> None:
+        if labels:
+            rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            self._lines.append(f"{name}{{{rendered}}} {_format_value(value)}")
+        else:
+            self._lines.append(f"{name} {_format_value(value)}")
+
+
+@runtime_checkable
+class MetricsCollector(Protocol):
+    def collect_metrics(self, out: PrometheusText) -> None: ...
+
+
+class BusMetrics(ABC):
+    # checked by the bus before taking any timings, so a disabled sink costs a single attribute read
+    enabled: bool = True
+
+    @abstractmethod
+    def observe_dispatch(self, msg_type: type[Message], seconds: float, *, error: bool) -> None: ...
+
+    @abstractmethod
+    def observe_cascade(self, depth: int) -> None: ...
+
+    @abstractmethod
+    def collect_metrics(self, out: PrometheusText) -> None: ...
+
+
+class NoopBusMetrics(BusMetrics):
+    enabled = False
+
+    def observe_dispatch(self, msg_type: type[Message], seconds: float, *, error: bool) -> None:
+        pass
+
+    def observe_cascade(self, depth: int) -> None:
+        pass
+
+    def collect_metrics(self, out: PrometheusText) -> None:
+        pass
+
+
+class InMemoryBusMetrics(BusMetrics):
+    def __init__(
+        self,
+        latency_buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        cascade_buckets: tuple[float, ...] = CASCADE_BUCKETS,
+    ) -> None:
+        self._latency_buckets = latency_buckets
+        self._dispatches: dict[type[Message], int] = defaultdict(int)
+        self._errors: dict[type[Message], int] = defaultdict(int)
+        self._latencies: dict[type[Message], Histogram] = {}
+        self._cascades = Histogram(cascade_buckets)
+
+    def observe_dispatch(self, msg_type: type[Message], seconds: float, *, error: bool) -> None:
+        self._dispatches[msg_type] += 1
+        if error:
+            self._errors[msg_type] += 1
+        hist = self._latencies.get(msg_type)
+        if hist is None:
+            hist = self._latencies[msg_type] = Histogram(self._latency_buckets)
+        hist.observe(seconds)
+
+    def observe_cascade(self, depth: int) -> None:
+        self._cascades.observe(depth)
+
+    def collect_metrics(self, out: PrometheusText) -> None:
+        out.counter(
+            "stega_bus_dispatch_total",
+            "Handler invocations by message type.",
+            ((_message_labels(t), n) for t, n in self._dispatches.items()),
+        )
+        out.counter(
+            "stega_bus_dispatch_errors_total",
+            "Handler invocations that raised, by message type.",
+            ((_message_labels(t), n) for t, n in self._errors.items()),
+        )
+        out.histogram(
+            "stega_bus_dispatch_seconds",
+            "Handler latency by message type.",
+            ((_message_labels(t), h) for t, h in self._latencies.items()),
+        )
+        out.histogram(
+            "stega_bus_cascade_depth",
+            "Depth of synchronously cascaded events per dispatched event.",
+            [({}, self._cascades)],
+        )
+
+
+def _message_labels(msg_type: type[Message]) -> Labels:
+    if issubclass(msg_type, Command):
+        kind = "command"
+    elif issubclass(msg_type, Query):
+        kind = "query"
+    else:
+        kind = "event"
+    return {"kind": kind, "message": msg_type.__name__}
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
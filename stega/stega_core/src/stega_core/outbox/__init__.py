@@ -0,0 +1,10 @@
+from stega_core.outbox.relay import OutboxRelay, OutboxRelayStats
+from stega_core.outbox.sqlalchemy import OutboxRecord, SqlAlchemyOutbox, build_outbox_table
+
+__all__ = [
+    "OutboxRecord",
+    "OutboxRelay",
+    "OutboxRelayStats",
+    "SqlAlchemyOutbox",
+    "build_outbox_table",
+]
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from stega_core.broker import Envelope
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from stega_core.broker import ServiceBroker
+    from stega_core.metrics import PrometheusText
+    from stega_core.outbox.sqlalchemy import SqlAlchemyOutbox
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, kw_only=True)
+class OutboxRelayStats:
+    published: int
+    batches: int
+    failures: int
+
+
+class OutboxRelay:
+    def __init__(  # noqa: PLR0913
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        outbox: SqlAlchemyOutbox,
+        broker: ServiceBroker,
+        *,
+        batch_size: int = 100,
+        poll_interval_seconds: float = 1.0,
+        retention_seconds: float = 3600.0,
+    ) -> None:
+        self._session_factory = session_factory
+        self._outbox = outbox
+        self._broker = broker
+        self._batch_size = batch_size
+        self._poll_interval_seconds = poll_interval_seconds
+        self._retention_seconds = retention_seconds
+        self._task: asyncio.Task | None = None
+        self._next_purge = 0.0
+        self._published = 0
+        self._batches = 0
+        self._failures = 0
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run(), name="outbox-relay")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+        # flush whatever was committed while shutting down, the broker is still running
+        with contextlib.suppress(Exception):
+            while await self.relay_once() == self._batch_size:
+                pass
+
+    async def relay_once(self) -> int:
+        async with self._session_factory() as session, session.begin():
+            records = await self._outbox.fetch_pending(session, self._batch_size)
+            if not records:
+                return 0
+            # rows stay pending until the broker accepted the whole batch
+            await self._broker.publish_many([Envelope(topic=r.topic, payload=r.payload) for r in records])
+            await self._outbox.mark_sent(session, [r.record_id for r in records])
+
+        self._published += len(records)
+        self._batches += 1
+        return len(records)
+
+    def stats(self) -> OutboxRelayStats:
+        return OutboxRelayStats(
+            published=self._published,
+            batches=self._batches,
+            failures=self._failures,
+        )
+
+    def collect_metrics(self, out: PrometheusText) -> None:
+        stats = self.stats()
+        out.counter("stega_outbox_published_total", "Outbox rows published to the broker.", [({}, stats.published)])
+        out.counter("stega_outbox_batches_total", "Outbox batches published to the broker.", [({}, stats.batches)])
+        out.counter("stega_outbox_failures_total", "Outbox relay passes that failed.", [({}, stats.failures)])
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                sent = await self.relay_once()
+                if sent < self._batch_size:
+                    await self._purge()
+            except Exception:
+                self._failures += 1
+                logger.exception("Outbox relay pass failed, rows stay pending")
+                sent = 0
+            # a full batch means more rows are likely pending, keep draining
+            if sent < self._batch_size:
+                await self._outbox.wait_staged(self._poll_interval_seconds)
+
+    async def _purge(self) -> None:
+        now = monotonic()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self._retention_seconds / 10
+        before = datetime.now(UTC) - timedelta(seconds=self._retention_seconds)
+        async with self._session_factory() as session, session.begin():
+            await self._outbox.purge_sent(session, before)
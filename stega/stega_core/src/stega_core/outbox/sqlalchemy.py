@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    Table,
+    delete,
+    insert,
+    select,
+    update,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from sqlalchemy import MetaData
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from stega_core.message import Event
+
+
+@dataclass(frozen=True, kw_only=True)
+class OutboxRecord:
+    record_id: int
+    topic: str
+    payload: dict[str, Any]
+
+
+def build_outbox_table(metadata: MetaData, name: str = "outbox") -> Table:
+    return Table(
+        name,
+        metadata,
+        Column(
+            "_id",
+            BigInteger().with_variant(Integer, "sqlite"),
+            primary_key=True,
+            autoincrement=True,
+        ),
+        Column("topic", String, nullable=False),
+        Column("payload", JSON, nullable=False),
+        Column("created_at", DateTime(timezone=True), nullable=False),
+        Column("sent_at", DateTime(timezone=True), nullable=True),
+        Index(f"ix_{name}_sent_at", "sent_at", "_id"),
+    )
+
+
+class SqlAlchemyOutbox:
+    def __init__(self, table: Table) -> None:
+        self._table = table
+        self._staged = asyncio.Event()
+
+    @property
+    def table(self) -> Table:
+        return self._table
+
+    async def stage(self, session: AsyncSession, events: Iterable[Event]) -> None:
+        now = datetime.now(UTC)
+        rows = [{"topic": e.topic, "payload": e.serialize(), "created_at": now} for e in events]
+        if rows:
+            await session.execute(insert(self._table), rows)
+
+    def notify(self) -> None:
+        self._staged.set()
+
+    async def wait_staged(self, timeout: float) -> None:  # noqa: ASYNC109
+        try:
+            await asyncio.wait_for(self._staged.wait(), timeout=timeout)
+        except TimeoutError:
+            pass
+        self._staged.clear()
+
+    async def fetch_pending(self, session: AsyncSession, limit: int) -> list[OutboxRecord]:
+        t = self._table
+        stmt = (
+            select(t.c["_id"], t.c.topic, t.c.payload)
+            .where(t.c.sent_at.is_(None))
+            .order_by(t.c["_id"])
+            .limit(limit)
+            # concurrent relays skip rows another relay is publishing
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(stmt)
+        return [OutboxRecord(record_id=row[0], topic=row[1], payload=row[2]) for row in result.all()]
+
+    async def mark_sent(self, session: AsyncSession, record_ids: list[int]) -> None:
+        t = self._table
+        await session.execute(update(t).where(t.c["_id"].in_(record_ids)).values(sent_at=datetime.now(UTC)))
+
+    async def purge_sent(self, session: AsyncSession, before: datetime) -> None:
+        t = self._table
+        await session.execute(delete(t).where(t.c.sent_at.is_not(None), t.c.sent_at < before))
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from stega_core.di import MessageHandler
+    from stega_core.message import Message, MessageResponse
+    from stega_core.metrics import PrometheusText
+
+
+@dataclass(frozen=True, kw_only=True)
+class HandlerPoolStats:
+    max_workers: int
+    busy: int
+    queued: int
+    completed: int
+    failed: int
+
+    @property
+    def utilisation(self) -> float:
+        return self.busy / self.max_workers if self.max_workers else 0.0
+
+
+def _run_handler(handler: MessageHandler, message: Message) -> MessageResponse | None:
+    result = handler(message)
+    if inspect.iscoroutine(result):
+        return asyncio.run(result)
+    return result
+
+
+class HandlerProcessPool:
+    def __init__(self, max_workers: int | None = None, start_method: str = "spawn") -> None:
+        self._max_workers = max_workers or os.cpu_count() or 1
+        # spawn avoids forking a process that is running an event loop and its threads
+        self._mp_context = multiprocessing.get_context(start_method)
+        self._executor: ProcessPoolExecutor | None = None
+        self._inflight = 0
+        self._completed = 0
+        self._failed = 0
+
+    async def start(self) -> None:
+        if self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(max_workers=self._max_workers, mp_context=self._mp_context)
+
+    async def stop(self) -> None:
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def run(self, handler: MessageHandler, message: Message) -> MessageResponse | None:
+        if self._executor is None:
+            err_msg = f"{type(self).__name__} must be started before running handlers"
+            raise RuntimeError(err_msg)
+
+        loop = asyncio.get_running_loop()
+        self._inflight += 1
+        try:
+            result = await loop.run_in_executor(self._executor, _run_handler, handler, message)
+        except Exception:
+            self._failed += 1
+            raise
+        else:
+            self._completed += 1
+            return result
+        finally:
+            self._inflight -= 1
+
+    def stats(self) -> HandlerPoolStats:
+        return HandlerPoolStats(
+            max_workers=self._max_workers,
+            busy=min(self._inflight, self._max_workers),
+            queued=max(0, self._inflight - self._max_workers),
+            completed=self._completed,
+            failed=self._failed,
+        )
+
+    def collect_metrics(self, out: PrometheusText) -> None:
+        stats = self.stats()
+        out.gauge("stega_handler_pool_workers", "Worker processes in the handler pool.", [({}, stats.max_workers)])
+        out.gauge("stega_handler_pool_busy", "Handler pool workers running a handler.", [({}, stats.busy)])
+        out.gauge("stega_handler_pool_queued", "Handlers waiting for a free pool worker.", [({}, stats.queued)])
+        out.counter(
+            "stega_handler_pool_completed_total",
+            "Handlers the pool ran to completion.",
+            [({}, stats.completed)],
+        )
+        out.counter("stega_handler_pool_failed_total", "Handlers that raised in the pool.", [({}, stats.failed)])
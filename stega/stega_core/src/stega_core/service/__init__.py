@@ -18,6 +18,7 @@ from stega_core.service.port import (
 from stega_core.service.socket import (
     UnixSocketChannel,
     UnixSocketTransport,
+    read_codec_frame,
     read_frame,
     write_frame,
 )
@@ -48,6 +49,7 @@ __all__ = [
     "UnixSocketChannel",
     "UnixSocketServiceSpec",
     "UnixSocketTransport",
+    "read_codec_frame",
     "read_frame",
     "write_frame",
 ]
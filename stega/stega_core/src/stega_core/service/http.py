@@ -4,13 +4,15 @@ from typing import Any
 
 import httpx
 
+from stega_core.codec import JSON_CODEC, EnvelopeCodec, codec_for_content_type, text_codec
 from stega_core.context import current_context
 from stega_core.hosting import Origin, Route, Wire
-from stega_core.message import Message
+from stega_core.message import EncodedView, Message, Query
 from stega_core.service.channel import Channel
 from stega_core.service.transport import AbstractTransport, ServiceResult
 
 _PATH_PARAM = re.compile(r"<(?:[^:<>]+:)?([^<>]+)>")
+_COMPLETION_GRACE_SECONDS = 5.0
 
 
 class HttpChannel(Channel):
@@ -18,9 +20,14 @@ class HttpChannel(Channel):
         self,
         base_url: str,
         routes: dict[type[Message], Route],
+        codec: EnvelopeCodec = JSON_CODEC,
+        *,
+        passthrough: bool = False,
     ) -> None:
         self._base_url = base_url
         self.routes = routes
+        self.codec = codec
+        self.passthrough = passthrough
         self.session: httpx.AsyncClient | None = None
 
     async def open(self) -> None:
@@ -36,17 +43,46 @@ class HttpTransport(AbstractTransport[HttpChannel]):
     async def dispatch(self, message: Message) -> ServiceResult:
         route = self._channel.routes[type(message)]
         path, headers, params, body = self._render(route, message, current_context())
-        kwargs = {}
-        if headers:
-            kwargs["headers"] = headers
+        codec = self._channel.codec
+        # services answer in the requested codec when they have it configured, json otherwise
+        headers["Accept"] = f"{codec.content_type}, application/json;q=0.5"
+        kwargs = {"headers": headers}
         if params:
             kwargs["params"] = params
         if body:
-            kwargs["json"] = body
+            body_codec = text_codec(codec)
+            headers["Content-Type"] = body_codec.content_type
+            kwargs["content"] = body_codec.encode(body)
         client = self._channel.session
         request = client.build_request(route.method, path, **kwargs)
         resp = await client.send(request)
-        data = resp.json()
+        if self._channel.passthrough and isinstance(message, Query) and resp.is_success:
+            # the body is forwarded as is, it is only decoded if the caller needs another codec
+            return ServiceResult(
+                ok=True,
+                msg="OK",
+                result=EncodedView(body=resp.content, content_type=resp.headers.get("Content-Type", "")),
+            )
+        data = codec_for_content_type(resp.headers.get("Content-Type"), codec).decode(resp.content)
+        return ServiceResult(
+            ok=data["ok"],
+            msg=data["msg"],
+            result=data["result"],
+        )
+
+    async def completion(self, correlation_id: str, timeout: float) -> ServiceResult | None:  # noqa: ASYNC109
+        codec = self._channel.codec
+        client = self._channel.session
+        resp = await client.get(
+            f"/api/commands/{correlation_id}",
+            params={"timeout": timeout},
+            headers={"Accept": f"{codec.content_type}, application/json;q=0.5"},
+            # the service holds the request for up to the long-poll timeout
+            timeout=timeout + _COMPLETION_GRACE_SECONDS,
+        )
+        if resp.status_code == httpx.codes.NOT_FOUND:
+            return None
+        data = codec_for_content_type(resp.headers.get("Content-Type"), codec).decode(resp.content)
         return ServiceResult(
             ok=data["ok"],
             msg=data["msg"],
@@ -1,4 +1,5 @@
 from stega_core.bus import MessageBus
+from stega_core.completion import CompletionStatus
 from stega_core.message import Command, Message, Query
 from stega_core.service.channel import Channel
 from stega_core.service.transport import AbstractTransport, ServiceResult
@@ -17,3 +18,13 @@ class InMemoryTransport(AbstractTransport[InMemoryChannel]):
         elif isinstance(message, Query):
             resp = await bus.handle_query(message)
         return ServiceResult(resp.ok, msg="", result=resp.result)
+
+    async def completion(self, correlation_id: str, timeout: float) -> ServiceResult | None:  # noqa: ASYNC109
+        completion = await self._channel.bus.wait_for(correlation_id, timeout)
+        if completion is None:
+            return None
+        return ServiceResult(
+            ok=completion.status is not CompletionStatus.FAILED,
+            msg=f"Command '{correlation_id}' {completion.status.value}",
+            result=completion.serialize(),
+        )
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Self
+from time import monotonic
+from typing import TYPE_CHECKING, ClassVar, Self
 
+from stega_core.completion import CompletionStatus
 from stega_core.domain import AppError
+from stega_core.message import Query
+from stega_core.singleflight import SingleFlight
 
 if TYPE_CHECKING:
     from collections.abc import Callable
@@ -13,6 +17,9 @@ if TYPE_CHECKING:
 
 
 class StegaServicePort:
+    # shared by every port instance so concurrent dispatches collapse into one upstream query
+    _query_flights: ClassVar[SingleFlight[tuple[type[StegaServicePort], Query], ServiceResult]] = SingleFlight()
+
     def __init__(
         self,
         channel_factory: Callable[[], Channel],
@@ -37,14 +44,47 @@ class StegaServicePort:
             self._channel = None
             self._transport = None
 
-    async def _dispatch(self, message: Message) -> ServiceResult:
+    def _require_transport(self) -> AbstractTransport:
         if self._transport is None:
             err_msg = f"{type(self).__name__} must be used within `async with`"
             raise RuntimeError(err_msg)
-        result = await self._transport.dispatch(message)
+        return self._transport
+
+    async def _dispatch(self, message: Message) -> ServiceResult:
+        return _checked(await self._require_transport().dispatch(message))
+
+    async def _dispatch_shared(self, message: Message) -> ServiceResult:
+        # a shared call owns its channel, the caller that started it may leave before it finishes
+        channel = self._channel_factory()
+        await channel.open()
+        try:
+            result = await self._transport_type(channel).dispatch(message)
+        finally:
+            await channel.close()
+        return _checked(result)
+
+    async def forward(self, message: Message) -> ServiceResult:
+        if isinstance(message, Query):
+            self._require_transport()
+            return await self._query_flights.do((type(self), message), lambda: self._dispatch_shared(message))
+        return await self._dispatch(message)
+
+    async def wait_for_completion(self, correlation_id: str, timeout: float = 5.0) -> ServiceResult | None:  # noqa: ASYNC109
+        transport = self._require_transport()
+        # long-poll the owning service until the command it accepted settles, still pending once the wait runs out
+        deadline = monotonic() + timeout
+        while True:
+            result = await transport.completion(correlation_id, max(deadline - monotonic(), 0.0))
+            if result is None:
+                return None
+            if result.result["status"] != CompletionStatus.PENDING.value or monotonic() >= deadline:
+                break
         if not result.ok:
             raise AppError(result.msg)
         return result
 
-    async def forward(self, message: Message) -> ServiceResult:
-        return await self._dispatch(message)
+
+def _checked(result: ServiceResult) -> ServiceResult:
+    if not result.ok:
+        raise AppError(result.msg)
+    return result
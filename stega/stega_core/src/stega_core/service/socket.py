@@ -1,35 +1,50 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import struct
 from dataclasses import asdict
 from typing import TYPE_CHECKING, Any
 
+from stega_core.codec import JSON_CODEC, EnvelopeCodec, codec_for_frame_flag
 from stega_core.service.channel import Channel
 from stega_core.service.transport import AbstractTransport, ServiceResult
 
 if TYPE_CHECKING:
     from stega_core.message import Message
 
-_HEADER = struct.Struct("!I")
+# codec flag and payload length, so each side decodes whatever format its peer chose
+_HEADER = struct.Struct("!BI")
 
 
-async def write_frame(writer: asyncio.StreamWriter, data: dict[str, Any]) -> None:
-    payload = json.dumps(data).encode("utf-8")
-    writer.write(_HEADER.pack(len(payload)) + payload)
+async def write_frame(
+    writer: asyncio.StreamWriter,
+    data: dict[str, Any],
+    codec: EnvelopeCodec = JSON_CODEC,
+) -> None:
+    payload = codec.encode(data)
+    writer.write(_HEADER.pack(codec.frame_flag, len(payload)) + payload)
     await writer.drain()
 
 
-async def read_frame(reader: asyncio.StreamReader) -> dict[str, Any]:
-    (length,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+async def read_codec_frame(
+    reader: asyncio.StreamReader,
+    codec: EnvelopeCodec = JSON_CODEC,
+) -> tuple[EnvelopeCodec, dict[str, Any]]:
+    flag, length = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    frame_codec = codec_for_frame_flag(flag, codec)
     payload = await reader.readexactly(length)
-    return json.loads(payload.decode("utf-8"))
+    return frame_codec, frame_codec.decode(payload)
+
+
+async def read_frame(reader: asyncio.StreamReader, codec: EnvelopeCodec = JSON_CODEC) -> dict[str, Any]:
+    _, data = await read_codec_frame(reader, codec)
+    return data
 
 
 class UnixSocketChannel(Channel):
-    def __init__(self, socket_path: str) -> None:
+    def __init__(self, socket_path: str, codec: EnvelopeCodec = JSON_CODEC) -> None:
         self._socket_path = socket_path
+        self.codec = codec
         self.reader: asyncio.StreamReader | None = None
         self.writer: asyncio.StreamWriter | None = None
 
@@ -49,8 +64,9 @@ class UnixSocketTransport(AbstractTransport[UnixSocketChannel]):
         await write_frame(
             self._channel.writer,
             {"msg_type": type(message).__name__, "payload": asdict(message)},
+            self._channel.codec,
         )
-        data = await read_frame(self._channel.reader)
+        data = await read_frame(self._channel.reader, self._channel.codec)
         return ServiceResult(
             ok=data["ok"],
             msg=data["msg"],
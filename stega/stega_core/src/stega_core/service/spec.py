@@ -4,6 +4,7 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
+from stega_core.codec import EnvelopeCodecKind, build_codec
 from stega_core.service.http import HttpChannel, HttpTransport
 from stega_core.service.memory import InMemoryChannel, InMemoryTransport
 from stega_core.service.socket import UnixSocketChannel, UnixSocketTransport
@@ -37,11 +38,16 @@ class HttpServiceSpec(ServiceSpec):
     runtime: RuntimeFlag
     base_url_field: str
     routes: list[Route]
+    codec: EnvelopeCodecKind = EnvelopeCodecKind.JSON
+    # forward successful query responses without decoding them
+    passthrough: bool = False
 
     def channel_factory(self, config: BaseConfig) -> Callable[[], Channel]:
         base_url = getattr(config, self.base_url_field)
         routes = {r.msg_type: r for r in self.routes}
-        return lambda: HttpChannel(base_url, routes)
+        codec = build_codec(self.codec)
+        passthrough = self.passthrough
+        return lambda: HttpChannel(base_url, routes, codec, passthrough=passthrough)
 
     @property
     def transport_type(self) -> type[AbstractTransport]:
@@ -66,10 +72,12 @@ class InMemoryServiceSpec(ServiceSpec):
 class UnixSocketServiceSpec(ServiceSpec):
     runtime: RuntimeFlag
     socket_path_field: str
+    codec: EnvelopeCodecKind = EnvelopeCodecKind.JSON
 
     def channel_factory(self, config: BaseConfig) -> Callable[[], Channel]:
         socket_path = getattr(config, self.socket_path_field)
-        return lambda: UnixSocketChannel(socket_path)
+        codec = build_codec(self.codec)
+        return lambda: UnixSocketChannel(socket_path, codec)
 
     @property
     def transport_type(self) -> type[AbstractTransport]:
@@ -23,3 +23,7 @@ class AbstractTransport[ChannelT: Channel](ABC):
 
     @abstractmethod
     async def dispatch(self, message: Message) -> ServiceResult: ...
+
+    async def completion(self, correlation_id: str, timeout: float) -> ServiceResult | None:  # noqa: ARG002, ASYNC109
+        # transports without completion tracking only report the submission
+        return None
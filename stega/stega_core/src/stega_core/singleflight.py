@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Hashable
+
+
+class SingleFlight[KeyT: Hashable, ResultT]:
+    def __init__(self) -> None:
+        self._calls: dict[KeyT, asyncio.Task[ResultT]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: KeyT, fn: Callable[[], Awaitable[ResultT]]) -> ResultT:
+        try:
+            task = self._calls.get(key)
+        except TypeError:
+            # unhashable keys can never be shared
+            return await fn()
+
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        # a cancelled caller must not cancel the call for everyone else waiting on it
+        return await asyncio.shield(task)
+
+    def _forget(self, key: KeyT, task: asyncio.Task[ResultT]) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # every caller may have gone away, retrieve the error so it is never reported as unhandled
+        if not task.cancelled():
+            task.exception()
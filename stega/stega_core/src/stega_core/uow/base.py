@@ -17,6 +17,7 @@ class AbstractUnitOfWork[SessionT](ABC):
     def __init__(self, repo_factory_registry: RepositoryRegistry[SessionT]) -> None:
         self._repo_factory_registry = repo_factory_registry
         self._repos: dict[type[AbstractRepository], AbstractRepository] = {}
+        self._collected: list[Event] = []
         self._entered: bool = False
 
     def repo[RepoT: AbstractRepository](self, repo_type: type[RepoT]) -> RepoT:
@@ -27,6 +28,11 @@ class AbstractUnitOfWork[SessionT](ABC):
         return cast("RepoT", repo)
 
     def collect_new_events(self) -> Iterator[Event]:
+        while self._collected:
+            yield self._collected.pop(0)
+        yield from self._collect_repo_events()
+
+    def _collect_repo_events(self) -> Iterator[Event]:
         for repo in self._repos.values():
             for aggregate in repo.seen:
                 while aggregate.events:
@@ -49,6 +55,9 @@ class AbstractUnitOfWork[SessionT](ABC):
         try:
             if exc_type is not None:
                 await self.rollback()
+            else:
+                # keep events collectable by the bus once the repos are released
+                self._collected.extend(self._collect_repo_events())
         finally:
             self._entered = False
             self._repos.clear()
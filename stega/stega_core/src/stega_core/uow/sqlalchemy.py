@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from stega_core.uow.base import AbstractUnitOfWork
 
 if TYPE_CHECKING:
+    from stega_core.outbox import SqlAlchemyOutbox
     from stega_core.registry import RepositoryRegistry
 
 
@@ -15,10 +16,12 @@ class SqlAlchemyUnitOfWork(AbstractUnitOfWork[AsyncSession]):
         self,
         session_factory: async_sessionmaker[AsyncSession],
         repo_factory_registry: RepositoryRegistry[AsyncSession],
+        outbox: SqlAlchemyOutbox | None = None,
     ) -> None:
         super().__init__(repo_factory_registry)
         self._session_factory = session_factory
         self._session: AsyncSession | None = None
+        self._outbox = outbox
 
     async def _begin(self) -> AsyncSession:
         self._session = self._session_factory()
@@ -30,8 +33,19 @@ class SqlAlchemyUnitOfWork(AbstractUnitOfWork[AsyncSession]):
             self._session = None
 
     async def commit(self) -> None:
-        if self._session is not None:
+        if self._session is None:
+            return
+        if self._outbox is None:
             await self._session.commit()
+            return
+
+        # events are written in the same transaction as the state change that raised them
+        events = list(self._collect_repo_events())
+        await self._outbox.stage(self._session, events)
+        await self._session.commit()
+        self._collected.extend(events)
+        if events:
+            self._outbox.notify()
 
     async def rollback(self) -> None:
         if self._session is not None:
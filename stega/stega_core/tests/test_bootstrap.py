@@ -0,0 +1,59 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+
+import pytest
+from stega_config import BaseConfig
+from stega_core.bootstrap import ServiceBuilder
+from stega_core.config import ServiceConfig
+from stega_core.context import set_context
+from stega_core.message import Command
+
+
+@dataclass(frozen=True)
+class Ping(Command):
+    pass
+
+
+async def handle_ping(cmd: Ping) -> None:
+    pass
+
+
+@dataclass(frozen=True, kw_only=True)
+class WorkersConfig:
+    WORKERS: int = 2
+    COMMAND_COMPLETIONS: bool = True
+
+
+def test_workers_reject_command_completions() -> None:
+    builder = ServiceBuilder(WorkersConfig()).with_command_handlers([handle_ping])
+
+    with pytest.raises(RuntimeError, match="command completions"):
+        builder.build(logging.getLogger(__name__))
+
+
+@pytest.mark.anyio
+async def test_workers_build_without_command_completions() -> None:
+    builder = ServiceBuilder(WorkersConfig(COMMAND_COMPLETIONS=False)).with_command_handlers([handle_ping])
+    bus = builder.build(logging.getLogger(__name__)).bus
+
+    set_context({"correlation_id": "ping"})
+    response = await bus.handle_command(Ping())
+    await asyncio.sleep(0.01)
+
+    assert response.ok
+    assert bus.completion("ping") is None
+
+
+def test_workers_turn_process_local_state_off_by_default(monkeypatch: pytest.MonkeyPatch) -> None:
+    class Config(BaseConfig, ServiceConfig):
+        pass
+
+    monkeypatch.setenv("WORKERS", "2")
+    monkeypatch.setenv("COMMAND_COMPLETIONS", "true")
+    config = Config()
+
+    # both only apply to a single worker, whatever the environment asks for
+    assert not config.QUERY_CACHE
+    assert not config.COMMAND_COMPLETIONS
+    ServiceBuilder(config).with_command_handlers([handle_ping]).build(logging.getLogger(__name__))
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import ClassVar
+
+import pytest
+from stega_core.bootstrap import ServiceBuilder
+from stega_core.bus import BusConfig, CommandOverflowPolicy, MessageBus
+from stega_core.completion import CompletionStatus
+from stega_core.context import set_context
+from stega_core.message import Command, CommandResponse, Event, SubmissionStatus
+
+# with two partitions "a" lands on partition 1 and "d" on partition 0
+SAME_PARTITION = "a"
+OTHER_PARTITION = "d"
+
+
+@dataclass(frozen=True, kw_only=True)
+class Moved(Event):
+    topic: ClassVar[str] = "test.bus.moved"
+    partition_key: ClassVar[str] = "key"
+    key: str
+    n: int
+
+
+class Gate:
+    started: ClassVar[list[tuple[str, int]]] = []
+    finished: ClassVar[list[tuple[str, int]]] = []
+    release: ClassVar[asyncio.Event] = asyncio.Event()
+
+
+async def handle_moved(event: Moved) -> None:
+    Gate.started.append((event.key, event.n))
+    if event.key == SAME_PARTITION:
+        await Gate.release.wait()
+    Gate.finished.append((event.key, event.n))
+
+
+@pytest.fixture(autouse=True)
+def reset_gate() -> None:
+    Gate.started = []
+    Gate.finished = []
+    Gate.release = asyncio.Event()
+
+
+async def until(predicate: object, timeout: float = 1.0) -> None:  # noqa: ASYNC109
+    async with asyncio.timeout(timeout):
+        while not predicate():  # noqa: ASYNC110
+            await asyncio.sleep(0.001)
+
+
+def build_bus() -> MessageBus:
+    builder = (
+        ServiceBuilder(object())
+        .with_event_handlers([handle_moved])
+        .with_bus_config(BusConfig(event_worker_count=2, shutdown_timeout_seconds=1.0))
+    )
+    return builder.build(logging.getLogger(__name__)).bus
+
+
+@pytest.mark.anyio
+async def test_events_of_one_partition_are_handled_in_order() -> None:
+    set_context({"correlation_id": "moved"})
+    bus = build_bus()
+    await bus.start()
+
+    for n in range(3):
+        await bus.handle_event(Moved(key=SAME_PARTITION, n=n))
+    await until(lambda: len(Gate.started) == 1)
+    await asyncio.sleep(0.01)
+
+    # the next event of the key waits for the blocked one
+    assert Gate.started == [(SAME_PARTITION, 0)]
+    Gate.release.set()
+    await until(lambda: len(Gate.finished) == 3)  # noqa: PLR2004
+    assert Gate.finished == [(SAME_PARTITION, n) for n in range(3)]
+    await bus.stop()
+
+
+@pytest.mark.anyio
+async def test_events_of_other_partitions_run_concurrently() -> None:
+    set_context({"correlation_id": "moved"})
+    bus = build_bus()
+    await bus.start()
+
+    await bus.handle_event(Moved(key=SAME_PARTITION, n=0))
+    await bus.handle_event(Moved(key=OTHER_PARTITION, n=0))
+
+    # the other key finishes while the first one is still blocked
+    await until(lambda: (OTHER_PARTITION, 0) in Gate.finished)
+    assert Gate.finished == [(OTHER_PARTITION, 0)]
+    Gate.release.set()
+    await until(lambda: len(Gate.finished) == 2)  # noqa: PLR2004
+    await bus.stop()
+
+
+@dataclass(frozen=True)
+class Work(Command):
+    pass
+
+
+class Slot:
+    release: ClassVar[asyncio.Event] = asyncio.Event()
+
+
+async def handle_work(cmd: Work) -> None:  # noqa: ARG001
+    await Slot.release.wait()
+
+
+@pytest.fixture(autouse=True)
+def reset_slot() -> None:
+    Slot.release = asyncio.Event()
+
+
+async def start_command_bus(policy: CommandOverflowPolicy, **config: float) -> MessageBus:
+    bus_config = BusConfig(max_inflight_commands=1, command_overflow_policy=policy, **config)
+    builder = ServiceBuilder(object()).with_command_handlers([handle_work]).with_bus_config(bus_config)
+    bus = builder.build(logging.getLogger(__name__)).bus
+    await bus.start()
+    return bus
+
+
+async def submit(bus: MessageBus, correlation_id: str) -> CommandResponse:
+    set_context({"correlation_id": correlation_id})
+    return await bus.handle_command(Work())
+
+
+@pytest.mark.anyio
+async def test_reject_policy_fails_commands_beyond_the_bound() -> None:
+    bus = await start_command_bus(CommandOverflowPolicy.REJECT, command_retry_after_seconds=2.0)
+
+    assert (await submit(bus, "first")).ok
+    rejected = await submit(bus, "second")
+
+    assert rejected.status is SubmissionStatus.FAILED
+    assert rejected.retry_after == 2.0  # noqa: PLR2004
+    assert bus.completion("second").status is CompletionStatus.FAILED
+    Slot.release.set()
+    await bus.stop()
+
+
+@pytest.mark.anyio
+async def test_queue_policy_admits_once_a_slot_frees() -> None:
+    bus = await start_command_bus(CommandOverflowPolicy.QUEUE, command_queue_timeout_seconds=1.0)
+
+    assert (await submit(bus, "first")).ok
+    queued = asyncio.create_task(submit(bus, "second"))
+    await asyncio.sleep(0.01)
+    assert not queued.done()
+
+    Slot.release.set()
+    assert (await queued).ok
+    await bus.stop()
+
+
+@pytest.mark.anyio
+async def test_queue_policy_rejects_after_the_queue_timeout() -> None:
+    bus = await start_command_bus(CommandOverflowPolicy.QUEUE, command_queue_timeout_seconds=0.01)
+
+    assert (await submit(bus, "first")).ok
+    rejected = await submit(bus, "second")
+
+    assert rejected.status is SubmissionStatus.FAILED
+    assert rejected.retry_after is not None
+    Slot.release.set()
+    await bus.stop()
+
+
+@pytest.mark.anyio
+async def test_shed_oldest_policy_cancels_the_oldest_command() -> None:
+    bus = await start_command_bus(CommandOverflowPolicy.SHED_OLDEST)
+
+    assert (await submit(bus, "first")).ok
+    assert (await submit(bus, "second")).ok
+    await asyncio.sleep(0.01)
+
+    shed = bus.completion("first")
+    assert shed.status is CompletionStatus.FAILED
+    assert "cancelled" in shed.error
+    assert bus.completion("second").status is CompletionStatus.PENDING
+    Slot.release.set()
+    await bus.stop()
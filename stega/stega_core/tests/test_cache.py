@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import ClassVar
+
+import pytest
+from stega_core.bootstrap import ServiceBuilder
+from stega_core.bus import BusConfig, MessageBus
+from stega_core.cache import CacheRule, InMemoryQueryCache
+from stega_core.context import set_context
+from stega_core.message import Event, Query, QueryResponse, QueryStatus, View
+
+
+@dataclass(frozen=True, kw_only=True)
+class Account(View):
+    account_id: str
+    version: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class GetAccount(Query[Account]):
+    account_id: str
+
+
+@dataclass(frozen=True, kw_only=True)
+class AccountUpdated(Event):
+    topic: ClassVar[str] = "test.cache.account_updated"
+    account_id: str
+
+
+CACHE_RULES = [
+    CacheRule(
+        query_type=GetAccount,
+        invalidated_by=(AccountUpdated,),
+        match=lambda query, event: query.account_id == event.account_id,
+    ),
+]
+
+
+class Store:
+    versions: ClassVar[dict[str, int]] = {}
+    calls: ClassVar[int] = 0
+    # set to hold a query inside its handler
+    gate: ClassVar[asyncio.Event | None] = None
+
+
+async def get_account(query: GetAccount) -> QueryResponse[Account]:
+    Store.calls += 1
+    version = Store.versions.get(query.account_id, 0)
+    if Store.gate is not None:
+        await Store.gate.wait()
+    return QueryResponse(status=QueryStatus.OK, result=Account(account_id=query.account_id, version=version))
+
+
+@pytest.fixture(autouse=True)
+def reset_store() -> None:
+    Store.versions = {}
+    Store.calls = 0
+    Store.gate = None
+
+
+def build_bus() -> MessageBus:
+    builder = (
+        ServiceBuilder(object())
+        .with_query_handlers([get_account])
+        .with_query_cache(InMemoryQueryCache(CACHE_RULES))
+        .with_bus_config(BusConfig(coalesce_queries=False))
+    )
+    return builder.build(logging.getLogger(__name__)).bus
+
+
+async def version_of(bus: MessageBus, account_id: str) -> int:
+    return (await bus.handle_query(GetAccount(account_id=account_id))).result.version
+
+
+@pytest.mark.anyio
+async def test_handled_event_evicts_the_matching_query() -> None:
+    set_context({"correlation_id": "cache"})
+    bus = build_bus()
+    assert await version_of(bus, "a") == 0
+    assert await version_of(bus, "b") == 0
+
+    Store.versions = {"a": 1, "b": 1}
+    assert await version_of(bus, "a") == 0
+    await bus.handle_event(AccountUpdated(account_id="a"))
+
+    # only the query the event matches is evicted
+    assert await version_of(bus, "a") == 1
+    assert await version_of(bus, "b") == 0
+    assert bus.query_cache_stats().invalidations == 1
+
+
+@pytest.mark.anyio
+async def test_result_computed_before_an_invalidation_is_not_stored() -> None:
+    set_context({"correlation_id": "cache"})
+    bus = build_bus()
+    Store.gate = asyncio.Event()
+
+    stale = asyncio.create_task(version_of(bus, "a"))
+    await asyncio.sleep(0.01)
+    Store.versions = {"a": 1}
+    await bus.handle_event(AccountUpdated(account_id="a"))
+    Store.gate.set()
+
+    assert await stale == 0
+    # the stale result was dropped, so the next query runs the handler again
+    assert await version_of(bus, "a") == 1
+    assert Store.calls == 2  # noqa: PLR2004
@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from datetime import UTC, date, datetime
+from decimal import Decimal
+from enum import Enum
+from uuid import UUID
+
+import pytest
+from stega_core.codec import EnvelopeCodecKind, build_codec
+
+
+class Side(Enum):
+    BUY = "buy"
+    SELL = "sell"
+
+
+@dataclass(frozen=True, kw_only=True)
+class TradeView:
+    trade_id: UUID
+    side: Side
+    price: Decimal
+    executed_at: datetime
+    settles_on: date
+
+
+@dataclass(frozen=True, kw_only=True)
+class TradeListView:
+    trades: list[TradeView]
+
+
+TRADE = TradeView(
+    trade_id=UUID("12345678-1234-5678-1234-567812345678"),
+    side=Side.BUY,
+    price=Decimal("101.25"),
+    executed_at=datetime(2025, 3, 4, 5, 6, 7, tzinfo=UTC),
+    settles_on=date(2025, 3, 6),
+)
+
+ENCODED = {
+    "trade_id": "12345678-1234-5678-1234-567812345678",
+    "side": "buy",
+    "price": "101.25",
+    "executed_at": "2025-03-04T05:06:07+00:00",
+    "settles_on": "2025-03-06",
+}
+
+
+@pytest.mark.parametrize("kind", list(EnvelopeCodecKind))
+def test_codecs_encode_views_the_same_way(kind: EnvelopeCodecKind) -> None:
+    codec = build_codec(kind)
+
+    assert codec.decode(codec.encode(TRADE)) == ENCODED
+    assert codec.decode(codec.encode({"result": TradeListView(trades=[TRADE])})) == {"result": {"trades": [ENCODED]}}
+
+
+def test_unknown_types_are_rejected() -> None:
+    codec = build_codec(EnvelopeCodecKind.JSON)
+
+    with pytest.raises(TypeError, match="not serializable"):
+        codec.encode({"value": object()})
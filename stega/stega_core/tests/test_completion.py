@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+from stega_core.completion import CompletionRegistry, CompletionStatus
+
+
+@pytest.mark.anyio
+async def test_wait_for_unknown_id_does_not_track_it() -> None:
+    registry = CompletionRegistry(maxsize=4)
+
+    for i in range(100):
+        assert await registry.wait_for(f"unknown-{i}", timeout=0) is None
+
+    assert len(registry) == 0
+
+
+@pytest.mark.anyio
+async def test_wait_for_returns_completion_once_settled() -> None:
+    registry = CompletionRegistry()
+    registry.begin("cmd")
+
+    waiter = asyncio.create_task(registry.wait_for("cmd", timeout=1.0))
+    await asyncio.sleep(0)
+    registry.succeed("cmd", [{"event": "done"}])
+    completion = await waiter
+
+    assert completion.status is CompletionStatus.SUCCEEDED
+    assert completion.events == [{"event": "done"}]
+
+
+@pytest.mark.anyio
+async def test_wait_for_times_out_as_pending() -> None:
+    registry = CompletionRegistry()
+    registry.begin("cmd")
+
+    completion = await registry.wait_for("cmd", timeout=0.01)
+
+    assert completion.status is CompletionStatus.PENDING
+
+
+@pytest.mark.anyio
+async def test_registry_is_bounded_and_releases_evicted_waiters() -> None:
+    maxsize = 2
+    registry = CompletionRegistry(maxsize=maxsize)
+    registry.begin("first")
+    waiter = asyncio.create_task(registry.wait_for("first"))
+    await asyncio.sleep(0)
+
+    registry.begin("second")
+    registry.begin("third")
+
+    assert len(registry) == maxsize
+    assert registry.get("first") is None
+    completion = await asyncio.wait_for(waiter, timeout=1.0)
+    assert completion.status is CompletionStatus.PENDING
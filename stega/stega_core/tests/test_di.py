@@ -0,0 +1,58 @@
+from stega_core.di import Dependency, DependencyContainer, Scope, bind_handler
+from stega_core.message import Command
+
+
+class DoWork(Command):
+    pass
+
+
+class Bus:
+    def __init__(self, container: DependencyContainer) -> None:
+        # the bus compiles its handler plans while the container is still building it
+        self.plan = container.compile_plan(bind_handler(handle_do_work, Command))
+
+
+class Notifier:
+    def __init__(self, bus: Bus) -> None:
+        self.bus = bus
+
+
+async def handle_do_work(cmd: DoWork, notifier: Notifier) -> Notifier:  # noqa: ARG001
+    return notifier
+
+
+def make_bus(container: DependencyContainer) -> Bus:
+    return Bus(container)
+
+
+def make_notifier(bus: Bus) -> Notifier:
+    return Notifier(bus)
+
+
+def test_singleton_depending_on_bus_resolves_on_dispatch() -> None:
+    container = DependencyContainer(
+        [
+            Dependency(dep_type=Bus, scope=Scope.SINGLETON, provider=make_bus),
+            Dependency(dep_type=Notifier, scope=Scope.SINGLETON, provider=make_notifier),
+        ],
+    )
+
+    bus = container.resolve_singleton(Bus)
+    kwargs, _ = bus.plan.bind()
+
+    assert kwargs["notifier"] is container.resolve_singleton(Notifier)
+    assert kwargs["notifier"].bus is bus
+
+
+def test_built_singletons_are_bound_statically() -> None:
+    container = DependencyContainer(
+        [
+            Dependency(dep_type=Notifier, scope=Scope.SINGLETON, provider=make_notifier),
+            Dependency(dep_type=Bus, scope=Scope.SINGLETON, provider=make_bus),
+        ],
+    )
+
+    plan = container.compile_plan(bind_handler(handle_do_work, Command))
+    kwargs, _ = plan.bind()
+
+    assert kwargs["notifier"] is container.resolve_singleton(Notifier)
@@ -0,0 +1,123 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from stega_core.broker.base import Envelope
+from stega_core.broker.log import EventLogBroker, EventLogOptions
+
+
+def make_broker(directory: Path) -> EventLogBroker:
+    return EventLogBroker(directory, EventLogOptions(consumer_name="svc", commit_interval=1))
+
+
+async def until(predicate: object, timeout: float = 1.0) -> None:  # noqa: ASYNC109
+    async with asyncio.timeout(timeout):
+        while not predicate():  # noqa: ASYNC110
+            await asyncio.sleep(0.001)
+
+
+async def stop_consuming(task: asyncio.Task) -> None:
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+@pytest.mark.anyio
+async def test_consume_resumes_from_the_committed_offset(tmp_path: Path) -> None:
+    broker = make_broker(tmp_path)
+    await broker.start()
+    seen: list[int] = []
+
+    async def handle(envelope: Envelope[dict]) -> None:
+        seen.append(envelope.payload["n"])
+
+    consuming = asyncio.create_task(broker.consume("events.*", handle))
+    await asyncio.sleep(0)
+    await broker.publish_many([Envelope(topic="events.a", payload={"n": n}) for n in range(2)])
+    await until(lambda: len(seen) == 2)  # noqa: PLR2004
+    await stop_consuming(consuming)
+    # published while the consumer is down
+    await broker.publish(Envelope(topic="events.a", payload={"n": 2}))
+    await broker.stop()
+
+    broker = make_broker(tmp_path)
+    await broker.start()
+    consuming = asyncio.create_task(broker.consume("events.*", handle))
+    await until(lambda: len(seen) == 3)  # noqa: PLR2004
+    await stop_consuming(consuming)
+    await broker.stop()
+
+    assert seen == [0, 1, 2]
+    assert broker.committed("svc") == 3  # noqa: PLR2004
+
+
+@pytest.mark.anyio
+async def test_commit_waits_for_earlier_envelopes(tmp_path: Path) -> None:
+    broker = make_broker(tmp_path)
+    await broker.start()
+    release = asyncio.Event()
+    handled: list[int] = []
+
+    async def handle(envelope: Envelope[dict]) -> None:
+        if envelope.offset == 0:
+            await release.wait()
+        handled.append(envelope.offset)
+
+    consuming = asyncio.create_task(broker.consume("events.*", handle, concurrency=4))
+    await asyncio.sleep(0)
+    await broker.publish_many([Envelope(topic="events.a", payload={}) for _ in range(3)])
+    await until(lambda: len(handled) == 2)  # noqa: PLR2004
+
+    # offsets 1 and 2 are done but 0 is not, nothing past it is committed
+    assert broker.committed("svc") == 0
+
+    release.set()
+    await until(lambda: broker.committed("svc") == 3)  # noqa: PLR2004
+    await stop_consuming(consuming)
+    await broker.stop()
+
+
+@pytest.mark.anyio
+async def test_unfinished_envelopes_are_delivered_again(tmp_path: Path) -> None:
+    broker = make_broker(tmp_path)
+    await broker.start()
+    started = asyncio.Event()
+
+    async def hang(_: Envelope[dict]) -> None:
+        started.set()
+        await asyncio.Event().wait()
+
+    consuming = asyncio.create_task(broker.consume("events.*", hang))
+    await asyncio.sleep(0)
+    await broker.publish(Envelope(topic="events.a", payload={"n": 0}))
+    await asyncio.wait_for(started.wait(), timeout=1.0)
+    await stop_consuming(consuming)
+    await broker.stop()
+
+    broker = make_broker(tmp_path)
+    await broker.start()
+    replayed: list[Envelope[dict]] = []
+
+    async def handle(envelope: Envelope[dict]) -> None:
+        replayed.append(envelope)
+
+    consuming = asyncio.create_task(broker.consume("events.*", handle))
+    await until(lambda: replayed)
+    await stop_consuming(consuming)
+    await broker.stop()
+
+    assert [e.payload for e in replayed] == [{"n": 0}]
+
+
+@pytest.mark.anyio
+async def test_a_second_broker_cannot_open_the_same_directory(tmp_path: Path) -> None:
+    owner = make_broker(tmp_path)
+    await owner.start()
+
+    with pytest.raises(RuntimeError, match="already open"):
+        await make_broker(tmp_path).start()
+
+    await owner.stop()
+    # the directory is free again once its owner stops
+    reopened = make_broker(tmp_path)
+    await reopened.start()
+    await reopened.stop()
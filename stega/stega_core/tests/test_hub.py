@@ -0,0 +1,92 @@
+import asyncio
+import re
+from collections.abc import AsyncIterator
+
+import pytest
+from stega_core.broker import Envelope, InMemoryBroker
+from stega_core.codec import JSON_CODEC
+from stega_core.hosting.hub import HEARTBEAT, TopicHub
+
+_ID = re.compile(rb"^id: (\d+)$", re.MULTILINE)
+_DATA = re.compile(rb"^data: (.*)$", re.MULTILINE)
+
+
+def frame_id(chunk: bytes) -> int:
+    return int(_ID.search(chunk).group(1))
+
+
+def frame_data(chunk: bytes) -> bytes:
+    return _DATA.search(chunk).group(1)
+
+
+async def take(stream: AsyncIterator[bytes], count: int) -> list[bytes]:
+    async with asyncio.timeout(1.0):
+        return [await anext(stream) for _ in range(count)]
+
+
+async def publish(broker: InMemoryBroker, *values: int) -> None:
+    for value in values:
+        await broker.publish(Envelope(topic="portfolio.created", payload={"n": value}))
+
+
+@pytest.fixture
+async def broker() -> AsyncIterator[InMemoryBroker]:
+    broker = InMemoryBroker()
+    await broker.start()
+    yield broker
+    await broker.stop()
+
+
+@pytest.mark.anyio
+async def test_reconnect_replays_only_missed_events(broker: InMemoryBroker) -> None:
+    hub = TopicHub(broker, JSON_CODEC)
+    first = aiter(hub.stream("portfolio.created"))
+    reading = asyncio.ensure_future(take(first, 2))
+    await asyncio.sleep(0.01)
+    await publish(broker, 0, 1)
+    seen = await reading
+    await first.aclose()
+
+    # published while the client is away, the feed lingers and keeps them
+    await publish(broker, 2, 3)
+    await asyncio.sleep(0.01)
+    second = aiter(hub.stream("portfolio.created", last_event_id=frame_id(seen[-1])))
+    replayed = await take(second, 2)
+    await second.aclose()
+    await hub.stop()
+
+    assert [frame_data(c) for c in [*seen, *replayed]] == [b'{"n":0}', b'{"n":1}', b'{"n":2}', b'{"n":3}']
+    ids = [frame_id(c) for c in [*seen, *replayed]]
+    assert ids == sorted(set(ids))
+    assert hub.stats().replayed == len(replayed)
+
+
+def test_log_offsets_are_the_event_ids() -> None:
+    hub = TopicHub(InMemoryBroker(), JSON_CODEC)
+
+    # every worker tailing the same log hands out the same ids
+    assert hub._next_id("t", Envelope(topic="t", payload={}, offset=41)) == 41  # noqa: SLF001, PLR2004
+
+
+@pytest.mark.anyio
+async def test_idle_stream_sends_heartbeats(broker: InMemoryBroker) -> None:
+    hub = TopicHub(broker, JSON_CODEC)
+    stream = aiter(hub.stream("portfolio.created", heartbeat_seconds=0.01))
+
+    assert await take(stream, 1) == [HEARTBEAT]
+
+    await stream.aclose()
+    await hub.stop()
+
+
+@pytest.mark.anyio
+async def test_feed_is_released_after_the_linger(broker: InMemoryBroker) -> None:
+    hub = TopicHub(broker, JSON_CODEC, linger_seconds=0.01)
+    stream = aiter(hub.stream("portfolio.created", heartbeat_seconds=0.01))
+    await take(stream, 1)
+    await stream.aclose()
+
+    assert hub.stats().topics == 1
+    await asyncio.sleep(0.05)
+    assert hub.stats().topics == 0
+    await hub.stop()
@@ -0,0 +1,96 @@
+from dataclasses import MISSING, dataclass, field, fields
+from types import UnionType
+from typing import Any, Union, get_args, get_origin, get_type_hints
+
+import pytest
+from stega_core.hosting.marshal import compile_decoder, marshal
+from stega_core.message import Command
+
+
+@dataclass(frozen=True, kw_only=True)
+class Rebalance(Command):
+    portfolio_id: int
+    note: str | None = None
+    tickers: list[str] = field(default_factory=list)
+    weights: dict[str, float] = field(default_factory=dict)
+    dry_run: bool = False
+
+
+# the reflective marshal the compiled decoders replaced, kept as the reference they must agree with
+def reflective_marshal(msg_type: type, data: dict[str, Any]) -> object:
+    hints = get_type_hints(msg_type)
+    kwargs = {}
+    missing = []
+    for fld in fields(msg_type):
+        if fld.name in data:
+            kwargs[fld.name] = reflective_coerce(data[fld.name], hints[fld.name])
+        elif fld.default is not MISSING or fld.default_factory is not MISSING:
+            continue
+        else:
+            missing.append(fld.name)
+    if missing:
+        err_msg = f"missing required fields: {', '.join(missing)}"
+        raise ValueError(err_msg)
+    return msg_type(**kwargs)
+
+
+def reflective_coerce(value: Any, annotation: type) -> Any:  # noqa: ANN401, C901, PLR0911
+    origin = get_origin(annotation)
+    if origin in (Union, UnionType):
+        if value is None:
+            return None
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return reflective_coerce(value, args[0])
+    if origin is list:
+        (inner,) = get_args(annotation) or (Any,)
+        if not isinstance(value, list):
+            err_msg = f"expected list, got {type(value).__name__}"
+            raise TypeError(err_msg)
+        return [reflective_coerce(val, inner) for val in value]
+    if origin is dict:
+        key_t, val_t = get_args(annotation) or (Any, Any)
+        if not isinstance(value, dict):
+            err_msg = f"expected dict, got {type(value).__name__}"
+            raise TypeError(err_msg)
+        return {reflective_coerce(k, key_t): reflective_coerce(v, val_t) for k, v in value.items()}
+    if annotation is Any or annotation is None:
+        return value
+    if annotation is bool:
+        if isinstance(value, bool):
+            return value
+        return str(value).strip().lower() in {"1", "true", "yes", "on"}
+    if isinstance(value, annotation):
+        return value
+    return annotation(value)
+
+
+def outcome(decode: object, data: dict[str, Any]) -> object:
+    try:
+        return decode(data)
+    except Exception as exc:
+        return type(exc), str(exc)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        pytest.param({"portfolio_id": "7"}, id="defaults"),
+        pytest.param({"portfolio_id": 7, "note": None}, id="optional-none"),
+        pytest.param({"portfolio_id": 7, "note": 12}, id="optional-value"),
+        pytest.param({"portfolio_id": 7, "tickers": ["A", 1]}, id="list"),
+        pytest.param({"portfolio_id": 7, "weights": {"A": "0.5", 2: 1}}, id="dict"),
+        pytest.param({"portfolio_id": 7, "dry_run": "yes"}, id="bool-truthy"),
+        pytest.param({"portfolio_id": 7, "dry_run": "off"}, id="bool-falsy"),
+        pytest.param({"portfolio_id": 7, "dry_run": 1}, id="bool-int"),
+        pytest.param({"note": "x"}, id="missing-field"),
+        pytest.param({"portfolio_id": "seven"}, id="wrong-primitive"),
+        pytest.param({"portfolio_id": 7, "tickers": "A"}, id="wrong-list"),
+        pytest.param({"portfolio_id": 7, "weights": ["A"]}, id="wrong-dict"),
+        pytest.param({"portfolio_id": 7, "weights": {"A": "heavy"}}, id="wrong-dict-value"),
+    ],
+)
+def test_compiled_decoder_matches_the_reflective_marshal(data: dict[str, Any]) -> None:
+    expected = outcome(lambda d: reflective_marshal(Rebalance, d), data)
+
+    assert outcome(compile_decoder(Rebalance), data) == expected
+    assert outcome(lambda d: marshal(Rebalance, d), data) == expected
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from stega_core.broker import Envelope, InMemoryBroker, SlowConsumerPolicy
+
+BUFFER_SIZE = 2
+
+
+async def collect(broker: InMemoryBroker, topics: str | list[str], received: list[int]) -> None:
+    async for envelope in broker.subscribe(topics):
+        received.append(envelope.payload["n"])  # noqa: PERF401
+
+
+async def subscribed(broker: InMemoryBroker, topics: str | list[str]) -> tuple[asyncio.Task, list[int]]:
+    received: list[int] = []
+    task = asyncio.create_task(collect(broker, topics, received))
+    # the subscription registers its cursors once the generator first runs
+    await asyncio.sleep(0)
+    return task, received
+
+
+async def publish(broker: InMemoryBroker, topic: str, *ns: int) -> None:
+    for n in ns:
+        await broker.publish(Envelope(topic=topic, payload={"n": n}))
+
+
+async def until(predicate: object, timeout: float = 1.0) -> None:  # noqa: ASYNC109
+    async with asyncio.timeout(timeout):
+        while not predicate():  # noqa: ASYNC110
+            await asyncio.sleep(0.001)
+
+
+@pytest.mark.anyio
+async def test_drop_oldest_skips_a_lapped_cursor_to_the_oldest_slot() -> None:
+    broker = InMemoryBroker(buffer_size=BUFFER_SIZE, policy=SlowConsumerPolicy.DROP_OLDEST)
+    task, received = await subscribed(broker, "t.a")
+
+    # published without yielding, so the subscriber is lapped before it reads
+    await publish(broker, "t.a", 0, 1, 2, 3)
+    await until(lambda: len(received) == BUFFER_SIZE)
+
+    assert received == [2, 3]
+    assert broker.stats().dropped == 2  # noqa: PLR2004
+    task.cancel()
+    await broker.stop()
+
+
+@pytest.mark.anyio
+async def test_disconnect_ends_a_lapped_subscription() -> None:
+    broker = InMemoryBroker(buffer_size=BUFFER_SIZE, policy=SlowConsumerPolicy.DISCONNECT)
+    task, received = await subscribed(broker, "t.a")
+
+    await publish(broker, "t.a", 0, 1, 2)
+    await asyncio.wait_for(task, timeout=1.0)
+
+    assert received == []
+    stats = broker.stats()
+    assert stats.disconnected == 1
+    assert stats.subscribers == 0
+    await broker.stop()
+
+
+@pytest.mark.anyio
+async def test_block_holds_the_publisher_until_the_subscriber_reads() -> None:
+    broker = InMemoryBroker(buffer_size=BUFFER_SIZE, policy=SlowConsumerPolicy.BLOCK)
+    task, received = await subscribed(broker, "t.a")
+
+    await asyncio.wait_for(publish(broker, "t.a", 0, 1, 2, 3, 4), timeout=1.0)
+    await until(lambda: len(received) == 5)  # noqa: PLR2004
+
+    # nothing is dropped, the publisher waited instead
+    assert received == [0, 1, 2, 3, 4]
+    stats = broker.stats()
+    assert stats.dropped == 0
+    assert stats.blocked_publishes > 0
+    task.cancel()
+    await broker.stop()
+
+
+@pytest.mark.anyio
+async def test_envelope_matching_several_patterns_is_delivered_once() -> None:
+    broker = InMemoryBroker()
+    task, received = await subscribed(broker, ["t.*", "t.a", "#"])
+
+    await publish(broker, "t.a", 0)
+    await publish(broker, "t.b", 1)
+    await publish(broker, "u.a", 2)
+    await until(lambda: len(received) == 3)  # noqa: PLR2004
+    await asyncio.sleep(0.01)
+
+    # in publish order, once each however many patterns matched
+    assert received == [0, 1, 2]
+    task.cancel()
+    await broker.stop()
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import ClassVar
+
+import pytest
+from sqlalchemy import MetaData, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from stega_core.broker import Envelope
+from stega_core.domain import Aggregate
+from stega_core.message import Event
+from stega_core.outbox import OutboxRelay, SqlAlchemyOutbox, build_outbox_table
+from stega_core.registry import RepositoryRegistry
+from stega_core.repository import AbstractRepository
+from stega_core.uow import SqlAlchemyUnitOfWork
+
+BATCH_SIZE = 2
+
+
+@dataclass(frozen=True, kw_only=True)
+class Opened(Event):
+    topic: ClassVar[str] = "test.outbox.opened"
+    account_id: str
+
+
+class Account(Aggregate):
+    __id_attr__ = "account_id"
+
+    def __init__(self, account_id: str) -> None:
+        super().__init__()
+        self.account_id = account_id
+        self.record(Opened(correlation_id="outbox", account_id=account_id))
+
+
+class AccountRepository(AbstractRepository[Account]):
+    # state is irrelevant here, only the events the aggregates record reach the outbox
+    def __init__(self, _: AsyncSession) -> None:
+        super().__init__()
+
+    async def _add(self, aggregate: Account) -> None:
+        pass
+
+    async def _get(self, aggregate_id: object) -> Account | None:  # noqa: ARG002
+        return None
+
+    async def _update(self, aggregate: Account) -> None:
+        pass
+
+    async def _delete(self, aggregate: Account) -> None:
+        pass
+
+    async def _list(self) -> Iterable[Account]:
+        return []
+
+
+class FakeBroker:
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+        self.fail = False
+
+    async def publish_many(self, envelopes: Iterable[Envelope]) -> None:
+        if self.fail:
+            err_msg = "broker down"
+            raise RuntimeError(err_msg)
+        self.batches.append([envelope.payload["payload"]["account_id"] for envelope in envelopes])
+
+
+@dataclass(frozen=True, kw_only=True)
+class Db:
+    session_factory: async_sessionmaker[AsyncSession]
+    outbox: SqlAlchemyOutbox
+
+    def unit_of_work(self) -> SqlAlchemyUnitOfWork:
+        registry = RepositoryRegistry()
+        registry.register(AccountRepository, AccountRepository)
+        return SqlAlchemyUnitOfWork(self.session_factory, registry, self.outbox)
+
+    async def open_accounts(self, *account_ids: str) -> None:
+        async with self.unit_of_work() as uow:
+            for account_id in account_ids:
+                await uow.repo(AccountRepository).add(Account(account_id))
+            await uow.commit()
+
+    async def open_and_fail(self, account_id: str) -> None:
+        async with self.unit_of_work() as uow:
+            await uow.repo(AccountRepository).add(Account(account_id))
+            err_msg = "handler failed"
+            raise RuntimeError(err_msg)
+
+    async def pending(self) -> int:
+        table = self.outbox.table
+        async with self.session_factory() as session:
+            stmt = select(func.count()).select_from(table).where(table.c.sent_at.is_(None))
+            return (await session.execute(stmt)).scalar_one()
+
+
+@pytest.fixture
+async def db(tmp_path: Path) -> AsyncIterator[Db]:
+    metadata = MetaData()
+    table = build_outbox_table(metadata)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'outbox.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+    yield Db(session_factory=async_sessionmaker(engine, expire_on_commit=False), outbox=SqlAlchemyOutbox(table))
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_events_are_staged_in_the_unit_of_work_transaction(db: Db) -> None:
+    await db.open_accounts("a", "b")
+    assert await db.pending() == 2  # noqa: PLR2004
+
+    # a unit of work that rolls back stages nothing
+    with pytest.raises(RuntimeError, match="handler failed"):
+        await db.open_and_fail("c")
+    assert await db.pending() == 2  # noqa: PLR2004
+
+
+@pytest.mark.anyio
+async def test_relay_publishes_in_batches_and_marks_rows_sent(db: Db) -> None:
+    for account_id in ("a", "b", "c"):
+        await db.open_accounts(account_id)
+    broker = FakeBroker()
+    relay = OutboxRelay(db.session_factory, db.outbox, broker, batch_size=BATCH_SIZE)
+
+    assert await relay.relay_once() == BATCH_SIZE
+    assert await relay.relay_once() == 1
+    assert await relay.relay_once() == 0
+
+    assert broker.batches == [["a", "b"], ["c"]]
+    assert await db.pending() == 0
+    assert relay.stats().published == 3  # noqa: PLR2004
+
+
+@pytest.mark.anyio
+async def test_rows_stay_pending_while_the_broker_fails(db: Db, caplog: pytest.LogCaptureFixture) -> None:
+    await db.open_accounts("a")
+    broker = FakeBroker()
+    broker.fail = True
+    relay = OutboxRelay(db.session_factory, db.outbox, broker, batch_size=BATCH_SIZE, poll_interval_seconds=0.01)
+
+    with caplog.at_level(logging.ERROR, logger="stega_core.outbox.relay"):
+        await relay.start()
+        async with asyncio.timeout(1.0):
+            while relay.stats().failures == 0:  # noqa: ASYNC110
+                await asyncio.sleep(0.001)
+        assert await db.pending() == 1
+        assert "Outbox relay pass failed" in caplog.text
+
+        # the rows go out once the broker recovers
+        broker.fail = False
+        await relay.stop()
+    assert broker.batches == [["a"]]
+    assert await db.pending() == 0
@@ -0,0 +1,73 @@
+import logging
+import os
+from dataclasses import dataclass
+
+import pytest
+from stega_core.bootstrap import Service, ServiceBuilder
+from stega_core.di import bind_handler, cpu_bound
+from stega_core.message import Query, QueryResponse, QueryStatus, View
+
+
+@dataclass(frozen=True, kw_only=True)
+class Checksum(View):
+    value: int
+    pid: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class ComputeChecksum(Query[Checksum]):
+    data: bytes
+
+
+@cpu_bound
+def compute_checksum(query: ComputeChecksum) -> QueryResponse[Checksum]:
+    return QueryResponse(status=QueryStatus.OK, result=Checksum(value=sum(query.data), pid=os.getpid()))
+
+
+def build_service() -> Service:
+    builder = ServiceBuilder(object()).with_query_handlers([compute_checksum]).with_handler_pool(max_workers=1)
+    return builder.build(logging.getLogger(__name__))
+
+
+@pytest.mark.anyio
+async def test_cpu_bound_handler_round_trips_through_a_worker_process() -> None:
+    service = build_service()
+    async with service.lifespan():
+        response = await service.bus.handle_query(ComputeChecksum(data=bytes(range(10))))
+
+    assert response.ok
+    assert response.result.value == sum(range(10))
+    assert response.result.pid != os.getpid()
+    assert service.bus.handler_pool_stats().completed == 1
+
+
+@pytest.mark.anyio
+async def test_pool_stops_with_the_service_lifespan() -> None:
+    service = build_service()
+    async with service.lifespan():
+        pass
+
+    response = await service.bus.handle_query(ComputeChecksum(data=b"x"))
+
+    assert response.status is QueryStatus.FAILED
+    assert "must be started" in response.error
+
+
+class Hasher:
+    pass
+
+
+def test_cpu_bound_handler_cannot_take_dependencies() -> None:
+    @cpu_bound
+    def with_deps(query: ComputeChecksum, hasher: Hasher) -> None: ...
+
+    with pytest.raises(TypeError, match="cannot take injected dependencies"):
+        bind_handler(with_deps, Query)
+
+
+def test_cpu_bound_handler_must_be_module_level() -> None:
+    @cpu_bound
+    def local(query: ComputeChecksum) -> None: ...
+
+    with pytest.raises(TypeError, match="must be defined at module level"):
+        bind_handler(local, Query)
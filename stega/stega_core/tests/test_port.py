@@ -0,0 +1,102 @@
+import asyncio
+from dataclasses import dataclass
+
+import pytest
+from stega_core.message import Message, Query, View
+from stega_core.service.channel import Channel
+from stega_core.service.port import StegaServicePort
+from stega_core.service.transport import AbstractTransport, ServiceResult
+
+
+@dataclass(frozen=True, kw_only=True)
+class GetThing(Query[View]):
+    thing_id: str
+
+
+class FakeChannel(Channel):
+    opened: list["FakeChannel"] = []  # noqa: RUF012
+    release = asyncio.Event()
+
+    def __init__(self) -> None:
+        self.is_open = False
+
+    async def open(self) -> None:
+        self.is_open = True
+        self.opened.append(self)
+
+    async def close(self) -> None:
+        self.is_open = False
+
+
+class FakeTransport(AbstractTransport[FakeChannel]):
+    async def dispatch(self, message: Message) -> ServiceResult:
+        await FakeChannel.release.wait()
+        if not self._channel.is_open:
+            err_msg = "channel closed under the call"
+            raise RuntimeError(err_msg)
+        return ServiceResult(ok=True, msg="OK", result=message.thing_id)
+
+    async def completion(self, correlation_id: str, timeout: float) -> ServiceResult | None:  # noqa: ASYNC109
+        await asyncio.sleep(timeout)
+        return ServiceResult(ok=True, msg="pending", result={"correlation_id": correlation_id, "status": "pending"})
+
+
+class ThingServicePort(StegaServicePort):
+    def __init__(self) -> None:
+        super().__init__(FakeChannel, FakeTransport)
+
+
+@pytest.fixture(autouse=True)
+def reset_channels() -> None:
+    FakeChannel.opened = []
+    FakeChannel.release = asyncio.Event()
+
+
+async def fetch(query: GetThing) -> ServiceResult:
+    async with ThingServicePort() as port:
+        return await port.forward(query)
+
+
+@pytest.mark.anyio
+async def test_concurrent_queries_share_one_call() -> None:
+    query = GetThing(thing_id="a")
+    callers = [asyncio.create_task(fetch(query)) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    FakeChannel.release.set()
+    results = await asyncio.gather(*callers)
+
+    assert [r.result for r in results] == ["a"] * 5
+    # one channel per caller scope plus the one owned by the shared call
+    assert len(FakeChannel.opened) == len(callers) + 1
+
+
+@pytest.mark.anyio
+async def test_cancelled_leader_does_not_break_followers() -> None:
+    query = GetThing(thing_id="a")
+    leader = asyncio.create_task(fetch(query))
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(fetch(query))
+    await asyncio.sleep(0.01)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    FakeChannel.release.set()
+    result = await asyncio.wait_for(follower, timeout=1.0)
+
+    assert result.result == "a"
+    assert not any(channel.is_open for channel in FakeChannel.opened)
+
+
+@pytest.mark.anyio
+async def test_forward_requires_an_open_port() -> None:
+    with pytest.raises(RuntimeError, match="async with"):
+        await ThingServicePort().forward(GetThing(thing_id="a"))
+
+
+@pytest.mark.anyio
+async def test_wait_for_completion_returns_pending_once_the_wait_runs_out() -> None:
+    async with ThingServicePort() as port:
+        result = await asyncio.wait_for(port.wait_for_completion("cmd", timeout=0.01), timeout=1.0)
+
+    assert result.result["status"] == "pending"
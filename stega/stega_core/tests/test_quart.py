@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+
+import pytest
+from quart import Quart
+from stega_core.bootstrap import ServiceBuilder
+from stega_core.bus import BusConfig, CommandOverflowPolicy
+from stega_core.hosting.quart import Binding, Origin, Route, Wire, build_quart_app
+from stega_core.message import Command, MessageResponse
+
+
+@dataclass(frozen=True)
+class Hold(Command):
+    pass
+
+
+release = asyncio.Event()
+
+
+async def handle_hold(cmd: Hold) -> None:  # noqa: ARG001
+    await release.wait()
+
+
+def held(_: MessageResponse) -> str:
+    return "Held"
+
+
+def build_app() -> Quart:
+    bus_config = BusConfig(
+        max_inflight_commands=1,
+        command_overflow_policy=CommandOverflowPolicy.REJECT,
+        command_retry_after_seconds=1.5,
+    )
+    service = ServiceBuilder(object()).with_command_handlers([handle_hold]).with_bus_config(bus_config)
+    route = Route(
+        method="POST",
+        path="/api/hold",
+        msg_type=Hold,
+        msg_callback=held,
+        bindings=[Binding(key="correlation_id", wire=Wire.HEADER, origin=Origin.CONTEXT, wire_key="X-Request-Id")],
+    )
+    return build_quart_app(service.build(logging.getLogger(__name__)), [route])
+
+
+@pytest.mark.anyio
+async def test_rejected_command_maps_to_429_with_retry_after() -> None:
+    app = build_app()
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+
+        accepted = await client.post("/api/hold", headers={"X-Request-Id": "first"})
+        rejected = await client.post("/api/hold", headers={"X-Request-Id": "second"})
+        release.set()
+
+    assert accepted.status_code == 201  # noqa: PLR2004
+    assert rejected.status_code == 429  # noqa: PLR2004
+    # whole seconds, rounded up
+    assert rejected.headers["Retry-After"] == "2"
+    assert (await rejected.get_json())["ok"] is False
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from stega_core.broker.base import Envelope
+from stega_core.broker.rabbitmq import (
+    RabbitMqBroker,
+    RabbitMqConnectionParameters,
+    RabbitMqPublishOptions,
+)
+
+
+class FakeExchange:
+    def __init__(self) -> None:
+        self.published: list[str] = []
+
+    async def publish(self, message: object, routing_key: str, timeout: float) -> None:  # noqa: ARG002, ASYNC109
+        self.published.append(routing_key)
+
+
+class FlakyExchange(FakeExchange):
+    def __init__(self, fail: str) -> None:
+        super().__init__()
+        self.fail = fail
+
+    async def publish(self, message: object, routing_key: str, timeout: float) -> None:  # noqa: ASYNC109
+        if routing_key == self.fail:
+            self.fail = ""
+            err_msg = "nacked"
+            raise RuntimeError(err_msg)
+        await super().publish(message, routing_key, timeout)
+
+
+def make_broker(**options: float) -> RabbitMqBroker:
+    return RabbitMqBroker(
+        RabbitMqConnectionParameters(host="localhost", port=5672, username="guest", password="guest"),  # noqa: S106
+        "stega",
+        publish_options=RabbitMqPublishOptions(channels=1, **options),
+    )
+
+
+def start_publishing(broker: RabbitMqBroker, exchange: FakeExchange) -> None:
+    # wire the publish path without a connection, as start does once its channels are open
+    broker._idle_exchanges = asyncio.Queue()  # noqa: SLF001
+    broker._idle_exchanges.put_nowait(exchange)  # noqa: SLF001
+    broker._buffer = asyncio.Queue()  # noqa: SLF001
+    broker._flusher = asyncio.create_task(broker._flush_loop())  # noqa: SLF001
+
+
+@pytest.mark.anyio
+async def test_stop_flushes_buffered_envelopes() -> None:
+    broker = make_broker()
+    exchange = FakeExchange()
+    start_publishing(broker, exchange)
+
+    await broker.publish_many([Envelope(topic=f"t.{i}", payload={"i": i}) for i in range(10)])
+    await broker.stop()
+
+    assert exchange.published == [f"t.{i}" for i in range(10)]
+    assert broker.publish_stats().published == len(exchange.published)
+
+
+@pytest.mark.anyio
+async def test_stop_during_linger_fails_the_lingering_batch() -> None:
+    broker = make_broker(linger_seconds=10.0, confirm_timeout_seconds=0.05)
+    exchange = FakeExchange()
+    start_publishing(broker, exchange)
+
+    publisher = asyncio.create_task(broker.publish(Envelope(topic="t", payload={})))
+    await asyncio.sleep(0.01)
+    await asyncio.wait_for(broker.stop(), timeout=1.0)
+
+    with pytest.raises(RuntimeError, match="Broker stopped"):
+        await asyncio.wait_for(publisher, timeout=1.0)
+    assert exchange.published == []
+
+
+@pytest.mark.anyio
+async def test_retry_resends_only_the_failed_envelope() -> None:
+    broker = make_broker(retry_backoff_seconds=0.0)
+    exchange = FlakyExchange(fail="t.0")
+    start_publishing(broker, exchange)
+
+    await broker.publish_many([Envelope(topic=f"t.{i}", payload={"i": i}) for i in range(2)])
+    await broker.stop()
+
+    # t.1 was confirmed in the first round, so only t.0 goes out again
+    assert exchange.published == ["t.1", "t.0"]
+    assert exchange.published.count("t.1") == 1
+    stats = broker.publish_stats()
+    assert stats.published == 2  # noqa: PLR2004
+    assert stats.retries == 1
+
+
+@pytest.mark.anyio
+async def test_exhausted_envelope_fails_without_holding_back_the_rest() -> None:
+    broker = make_broker(retry_backoff_seconds=0.0, max_retries=0)
+    exchange = FlakyExchange(fail="t.0")
+    start_publishing(broker, exchange)
+
+    results = await asyncio.gather(
+        broker.publish(Envelope(topic="t.0", payload={})),
+        broker.publish(Envelope(topic="t.1", payload={})),
+        return_exceptions=True,
+    )
+    await broker.stop()
+
+    assert isinstance(results[0], RuntimeError)
+    assert results[1] is None
+    assert exchange.published == ["t.1"]
+    assert broker.publish_stats().failed == 1
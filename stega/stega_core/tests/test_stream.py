@@ -0,0 +1,114 @@
+import asyncio
+import zlib
+from collections.abc import AsyncIterator
+
+import pytest
+from stega_core.hosting.stream import SseEncoding, SseStream, SseStreams, negotiate_encoding
+from stega_core.metrics import PrometheusText
+
+
+def frame(n: int) -> bytes:
+    return f'id: {n}\ndata: {{"n":{n}}}\n\n'.encode()
+
+
+async def burst(count: int) -> AsyncIterator[bytes]:
+    for n in range(count):
+        yield frame(n)
+
+
+async def trickle(count: int, gap_seconds: float) -> AsyncIterator[bytes]:
+    for n in range(count):
+        yield frame(n)
+        await asyncio.sleep(gap_seconds)
+
+
+async def collect(stream: SseStream) -> list[bytes]:
+    async with asyncio.timeout(2.0):
+        return [chunk async for chunk in stream]
+
+
+@pytest.mark.parametrize(
+    ("header", "encoding"),
+    [
+        (None, SseEncoding.IDENTITY),
+        ("br", SseEncoding.IDENTITY),
+        ("gzip, deflate", SseEncoding.GZIP),
+        ("gzip;q=0, deflate", SseEncoding.DEFLATE),
+        ("GZIP;q=0.5", SseEncoding.GZIP),
+    ],
+)
+def test_negotiate_encoding(header: str | None, encoding: SseEncoding) -> None:
+    assert negotiate_encoding(header) is encoding
+
+
+@pytest.mark.anyio
+async def test_burst_is_coalesced_into_few_writes() -> None:
+    count = 500
+    stream = SseStream(burst(count), topic="t")
+
+    writes = await collect(stream)
+
+    assert b"".join(writes) == b"".join(frame(n) for n in range(count))
+    assert len(writes) < count // 10
+    assert stream.stats().events == count
+
+
+@pytest.mark.anyio
+async def test_writes_respect_the_batch_size() -> None:
+    max_batch_bytes = 1024
+    stream = SseStream(burst(500), topic="t", max_batch_bytes=max_batch_bytes)
+
+    writes = await collect(stream)
+
+    # a batch closes once it reaches the bound, so it overshoots by at most one frame
+    assert max(len(w) for w in writes) < max_batch_bytes + len(frame(500))
+
+
+@pytest.mark.anyio
+async def test_slow_events_are_not_held_past_the_max_latency() -> None:
+    stream = SseStream(trickle(5, 0.03), topic="t", window_seconds=0.005, max_latency_seconds=0.01)
+
+    writes = await collect(stream)
+
+    assert writes == [frame(n) for n in range(5)]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("encoding", [SseEncoding.GZIP, SseEncoding.DEFLATE])
+async def test_compressed_writes_decode_as_they_arrive(encoding: SseEncoding) -> None:
+    wbits = 16 + zlib.MAX_WBITS if encoding is SseEncoding.GZIP else zlib.MAX_WBITS
+    stream = SseStream(trickle(3, 0.03), topic="t", encoding=encoding, max_latency_seconds=0.01)
+    decoder = zlib.decompressobj(wbits=wbits)
+
+    # every write is flushed to a byte boundary, a client decodes each one without waiting for more
+    decoded = [decoder.decompress(chunk) async for chunk in stream]
+
+    # the last write only carries the trailer that completes the body
+    assert decoded == [*(frame(n) for n in range(3)), b""]
+    assert decoder.eof
+    stats = stream.stats()
+    assert stats.bytes_in == sum(len(frame(n)) for n in range(3))
+    assert stats.flushes == len(decoded) - 1
+
+
+@pytest.mark.anyio
+async def test_closed_streams_keep_counting_in_the_totals() -> None:
+    streams = SseStreams()
+    stream = streams.open(burst(10), topic="t")
+    await collect(stream)
+    streams.close(stream)
+
+    out = PrometheusText()
+    streams.collect_metrics(out)
+
+    assert streams.stats() == []
+    assert "stega_sse_events_total 10" in out.render()
+
+
+@pytest.mark.anyio
+async def test_gzip_stream_decodes_as_a_complete_body() -> None:
+    stream = SseStream(burst(50), topic="t", encoding=SseEncoding.GZIP)
+
+    body = b"".join(await collect(stream))
+
+    assert zlib.decompress(body, wbits=16 + zlib.MAX_WBITS) == b"".join(frame(n) for n in range(50))
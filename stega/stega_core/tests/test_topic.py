@@ -0,0 +1,78 @@
+import pytest
+from stega_core.broker.topic import TopicTrie, topic_matches
+
+
+@pytest.mark.parametrize(
+    ("pattern", "topic", "expected"),
+    [
+        ("portfolio.created", "portfolio.created", True),
+        ("portfolio.created", "portfolio.updated", False),
+        ("portfolio.*", "portfolio.created", True),
+        ("portfolio.*", "portfolio", False),
+        ("portfolio.*", "portfolio.lot.created", False),
+        ("*.created", "portfolio.created", True),
+        ("portfolio.#", "portfolio", True),
+        ("portfolio.#", "portfolio.lot.created", True),
+        ("#.created", "portfolio.lot.created", True),
+        ("#.created", "portfolio.lot.updated", False),
+        ("#", "portfolio.created", True),
+        ("portfolio.#.created", "portfolio.created", True),
+        ("portfolio.#.created", "portfolio.lot.created", True),
+        ("portfolio.*.#", "portfolio", False),
+    ],
+)
+def test_topic_matches(pattern: str, topic: str, *, expected: bool) -> None:
+    assert topic_matches(pattern, topic) is expected
+
+
+@pytest.mark.parametrize("pattern", ["portfolio..created", "portfolio.cre*", "portfolio.#x", ""])
+def test_invalid_patterns_are_rejected(pattern: str) -> None:
+    with pytest.raises(ValueError, match="Invalid topic pattern"):
+        topic_matches(pattern, "portfolio.created")
+
+
+def test_trie_agrees_with_topic_matches() -> None:
+    patterns = ["portfolio.*", "portfolio.#", "*.created", "#", "portfolio.lot.created", "market.#.closed"]
+    topics = ["portfolio", "portfolio.created", "portfolio.lot.created", "market.eod.closed", "market.closed"]
+    trie: TopicTrie[str] = TopicTrie()
+    for pattern in patterns:
+        trie.add(pattern, pattern)
+
+    for topic in topics:
+        assert set(trie.match(topic)) == {p for p in patterns if topic_matches(p, topic)}
+
+
+def test_remove_prunes_empty_branches() -> None:
+    trie: TopicTrie[str] = TopicTrie()
+    trie.add("portfolio.lot.created", "a")
+    trie.add("portfolio.*", "b")
+
+    trie.remove("portfolio.lot.created", "a")
+
+    portfolio = trie._root.children["portfolio"]  # noqa: SLF001
+    assert set(portfolio.children) == {"*"}
+    trie.remove("portfolio.*", "b")
+    assert trie._root.children == {}  # noqa: SLF001
+
+
+def test_remove_keeps_other_values_of_the_pattern() -> None:
+    trie: TopicTrie[str] = TopicTrie()
+    trie.add("portfolio.*", "a")
+    trie.add("portfolio.*", "b")
+
+    trie.remove("portfolio.*", "a")
+
+    assert trie.match("portfolio.created") == ("b",)
+
+
+def test_match_cache_is_dropped_when_patterns_change() -> None:
+    trie: TopicTrie[str] = TopicTrie()
+    trie.add("portfolio.*", "a")
+    first = trie.match("portfolio.created")
+
+    # repeated topics are answered from the cache
+    assert trie.match("portfolio.created") is first
+    trie.add("#", "b")
+    assert set(trie.match("portfolio.created")) == {"a", "b"}
+    trie.remove("portfolio.*", "a")
+    assert trie.match("portfolio.created") == ("b",)
@@ -1,17 +1,26 @@
 import logging
+from collections.abc import Callable
 
 from stega_contracts.portfolio import CONTRACT as PORTFOLIO_CONTRACT
 from stega_core import (
+    ClientBroker,
     ClientBrokerRuntime,
+    EventLogBroker,
+    EventLogOptions,
     InMemoryBroker,
+    InMemoryBusMetrics,
     RabbitMqBroker,
     RabbitMqConnectionParameters,
+    Scope,
     Service,
+    ServiceBroker,
     ServiceBrokerRuntime,
     ServiceBuilder,
+    build_codec,
 )
 
-from stega_edge.config import EdgeConfig
+from stega_edge.config import CommandWait, EdgeConfig
+from stega_edge.relay import ClientEventRelay
 from stega_edge.services.handlers import (
     CLIENT_EVENTS,
     COMMAND_HANDLERS,
@@ -31,6 +40,7 @@ def build_rabbitmq_broker(config: EdgeConfig) -> RabbitMqBroker:
     return RabbitMqBroker(
         connection_params=connection_params,
         exchange_name=config.SERVICE_BROKER_EXCHANGE_NAME,
+        codec=build_codec(config.CODEC),
     )
 
 
@@ -38,8 +48,40 @@ def build_in_memory_broker(_: EdgeConfig) -> InMemoryBroker:
     return InMemoryBroker()
 
 
+def build_in_memory_client_broker(config: EdgeConfig) -> InMemoryBroker:
+    return InMemoryBroker(
+        buffer_size=config.CLIENT_BROKER_BUFFER_SIZE,
+        policy=config.CLIENT_BROKER_SLOW_CONSUMER_POLICY,
+    )
+
+
+def build_log_client_broker(config: EdgeConfig) -> EventLogBroker:
+    return EventLogBroker(
+        directory=config.CLIENT_BROKER_LOG_DIR,
+        options=EventLogOptions(
+            segment_bytes=config.CLIENT_BROKER_LOG_SEGMENT_BYTES,
+            retention_bytes=config.CLIENT_BROKER_LOG_RETENTION_BYTES,
+            retention_seconds=config.CLIENT_BROKER_LOG_RETENTION_SECONDS,
+        ),
+        codec=build_codec(config.CODEC),
+    )
+
+
+def client_event_relay_factory(config: EdgeConfig) -> Callable[[ServiceBroker, ClientBroker], ClientEventRelay]:
+    def build(service_broker: ServiceBroker, client_broker: ClientBroker) -> ClientEventRelay:
+        return ClientEventRelay(
+            service_broker=service_broker,
+            client_broker=client_broker,
+            event_types=CLIENT_EVENTS,
+            batch_size=config.CLIENT_RELAY_BATCH_SIZE,
+            linger_seconds=config.CLIENT_RELAY_LINGER_SECONDS,
+        )
+
+    return build
+
+
 def build_service(config: EdgeConfig) -> Service:
-    builder = ServiceBuilder(config)
+    builder = ServiceBuilder(config).with_codec(build_codec(config.CODEC))
 
     # set runtimes
     builder = builder.with_service_broker_runtime("SERVICE_BROKER_RUNTIME").with_client_broker_runtime(
@@ -53,9 +95,13 @@ def build_service(config: EdgeConfig) -> Service:
     }
     builder = builder.with_service_broker(service_broker_factories)
 
+    # consume the events this service reacts to from the service broker
+    builder = builder.with_event_consumer(concurrency=config.SERVICE_BROKER_CONSUMER_CONCURRENCY)
+
     # create client broker
     client_broker_factories = {
-        ClientBrokerRuntime.MEMORY: build_in_memory_broker,
+        ClientBrokerRuntime.MEMORY: build_in_memory_client_broker,
+        ClientBrokerRuntime.LOG: build_log_client_broker,
     }
     builder = builder.with_client_broker(client_broker_factories)
 
@@ -72,7 +118,18 @@ def build_service(config: EdgeConfig) -> Service:
         .with_query_handlers(QUERY_HANDLERS)
         .with_event_handlers(EVENT_HANDLERS)
         .with_service_events(SERVICE_EVENTS)
-        .with_client_events(CLIENT_EVENTS)
+        .with_client_events(CLIENT_EVENTS, relayed=True)
     )
 
+    # forwarded commands only wait for the owning service when configured to
+    builder = builder.with_dependency(
+        CommandWait, Scope.SINGLETON, lambda: CommandWait(seconds=config.COMMAND_WAIT_SECONDS)
+    )
+
+    # relay client visible service events to the client broker in batches
+    builder = builder.with_dependency(ClientEventRelay, Scope.SINGLETON, client_event_relay_factory(config))
+
+    # instrument the message bus
+    builder = builder.with_bus_metrics(InMemoryBusMetrics())
+
     return builder.build(logging.getLogger(__name__))
@@ -1,4 +1,5 @@
 import os
+from dataclasses import dataclass
 
 from stega_config import BaseConfig, source
 from stega_contracts.portfolio import PortfolioServiceConfig
@@ -18,6 +19,17 @@ class EdgeConfig(
 ):
     __prefix__ = "STEGA_EDGE"
 
+    CLIENT_RELAY_BATCH_SIZE: int = source("env", default=256)
+    CLIENT_RELAY_LINGER_SECONDS: float = source("env", default=0.005)
+    # forwarded commands return once the owning service accepted them, a short wait is opt-in and holds the
+    # request, its channel and its command slot until the command settles or the wait runs out
+    COMMAND_WAIT_SECONDS: float = source("env", default=0.0)
+
+
+@dataclass(frozen=True, kw_only=True)
+class CommandWait:
+    seconds: float
+
 
 class ProdConfig(EdgeConfig):
     HOST: str = source("env", default="0.0.0.0")
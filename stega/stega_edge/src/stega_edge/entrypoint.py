@@ -1,15 +1,16 @@
-import asyncio
+import functools
 
+from quart import Quart
 from stega_contracts.routes import ROUTES
 from stega_core import (
     SseRoute,
     build_quart_app,
     init_logger,
-    serve_hypercorn,
+    run_hypercorn,
 )
 
 from stega_edge.bootstrap import build_service
-from stega_edge.config import create_config
+from stega_edge.config import EdgeConfig, create_config
 
 SSE_ROUTES = [
     SseRoute(
@@ -19,6 +20,11 @@ SSE_ROUTES = [
 ]
 
 
+def create_app(config: EdgeConfig) -> Quart:
+    service = build_service(config)
+    return build_quart_app(service, ROUTES, SSE_ROUTES)
+
+
 def run_rest_app() -> None:
     # setup config and logger
     config = create_config()
@@ -28,15 +34,14 @@ def run_rest_app() -> None:
         third_party_logger_names=["hypercorn"],
     )
 
-    # build service and app
-    service = build_service(config)
-    app = build_quart_app(service, ROUTES, SSE_ROUTES)
-
-    asyncio.run(
-        serve_hypercorn(
-            app=app,
-            log_level=config.LOG_LEVEL,
-            host=config.HOST,
-            port=config.PORT,
-        )
+    # build service and app in every worker
+    run_hypercorn(
+        functools.partial(create_app, config),
+        log_level=config.LOG_LEVEL,
+        host=config.HOST,
+        port=config.PORT,
+        workers=config.WORKERS,
+        keep_alive=config.KEEP_ALIVE,
+        backlog=config.BACKLOG,
+        use_uvloop=config.UVLOOP,
     )
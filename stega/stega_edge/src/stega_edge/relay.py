@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from stega_core import Envelope
+
+if TYPE_CHECKING:
+    from stega_core import ClientBroker, Event, PrometheusText, ServiceBroker
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, kw_only=True)
+class ClientEventRelayStats:
+    buffered: int
+    received: int
+    filtered: int
+    published: int
+    batches: int
+    retries: int
+    dropped: int
+    restarts: int
+
+
+class ClientEventRelay:
+    def __init__(  # noqa: PLR0913
+        self,
+        service_broker: ServiceBroker,
+        client_broker: ClientBroker,
+        event_types: list[type[Event]],
+        *,
+        batch_size: int = 256,
+        linger_seconds: float = 0.005,
+        buffer_size: int = 10_000,
+        restart_delay_seconds: float = 1.0,
+        retry_delay_seconds: float = 0.1,
+    ) -> None:
+        self._service_broker = service_broker
+        self._client_broker = client_broker
+        # client visible topics and the payload fields each keeps from clients
+        self._internal_fields: dict[str, frozenset[str]] = {t.topic: t.internal_fields for t in event_types}
+        self._batch_size = batch_size
+        self._linger_seconds = linger_seconds
+        self._buffer_size = buffer_size
+        self._restart_delay_seconds = restart_delay_seconds
+        self._retry_delay_seconds = retry_delay_seconds
+        self._buffer: asyncio.Queue[Envelope] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._received = 0
+        self._filtered = 0
+        self._published = 0
+        self._batches = 0
+        self._retries = 0
+        self._dropped = 0
+        self._restarts = 0
+
+    async def start(self) -> None:
+        if self._tasks or not self._internal_fields:
+            return
+        self._buffer = asyncio.Queue(maxsize=self._buffer_size)
+        self._tasks = [
+            asyncio.create_task(self._subscribe_loop(), name="client-relay-subscribe"),
+            asyncio.create_task(self._flush_loop(), name="client-relay-flush"),
+        ]
+
+    async def stop(self) -> None:
+        if not self._tasks:
+            return
+        subscriber, flusher = self._tasks
+        self._tasks = []
+        subscriber.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await subscriber
+
+        # hand what was already received to the client broker, it is still running
+        flusher.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await flusher
+        with contextlib.suppress(Exception):
+            while await self._flush_once(linger=False):
+                pass
+
+    def stats(self) -> ClientEventRelayStats:
+        return ClientEventRelayStats(
+            buffered=self._buffer.qsize() if self._buffer is not None else 0,
+            received=self._received,
+            filtered=self._filtered,
+            published=self._published,
+            batches=self._batches,
+            retries=self._retries,
+            dropped=self._dropped,
+            restarts=self._restarts,
+        )
+
+    def collect_metrics(self, out: PrometheusText) -> None:
+        stats = self.stats()
+        out.gauge("stega_client_relay_buffered", "Events waiting to be relayed to clients.", [({}, stats.buffered)])
+        out.counter(
+            "stega_client_relay_received_total",
+            "Events received from the service broker.",
+            [({}, stats.received)],
+        )
+        out.counter(
+            "stega_client_relay_filtered_total",
+            "Received events that are not client visible.",
+            [({}, stats.filtered)],
+        )
+        out.counter(
+            "stega_client_relay_published_total",
+            "Events published to the client broker.",
+            [({}, stats.published)],
+        )
+        out.counter(
+            "stega_client_relay_batches_total",
+            "Batches published to the client broker.",
+            [({}, stats.batches)],
+        )
+        out.counter(
+            "stega_client_relay_retries_total",
+            "Batches published again after the client broker rejected them.",
+            [({}, stats.retries)],
+        )
+        out.counter(
+            "stega_client_relay_dropped_total",
+            "Events dropped after the client broker rejected their batch twice.",
+            [({}, stats.dropped)],
+        )
+        out.counter(
+            "stega_client_relay_restarts_total",
+            "Service broker subscriptions reopened after they failed or ended.",
+            [({}, stats.restarts)],
+        )
+
+    async def _subscribe_loop(self) -> None:
+        assert self._buffer is not None  # noqa: S101
+        while True:
+            # one subscription for every client visible topic, reopened if the broker drops it
+            try:
+                async for envelope in self._service_broker.subscribe(list(self._internal_fields)):
+                    self._received += 1
+                    internal = self._internal_fields.get(envelope.topic)
+                    if internal is None:
+                        self._filtered += 1
+                        continue
+                    await self._buffer.put(_strip(envelope, internal))
+            except Exception:
+                logger.exception("Client event relay subscription failed, restarting")
+            else:
+                logger.warning("Client event relay subscription ended, restarting")
+            self._restarts += 1
+            await asyncio.sleep(self._restart_delay_seconds)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await self._flush_once(linger=True)
+            except Exception:
+                logger.exception("Client event relay flush failed")
+
+    async def _flush_once(self, *, linger: bool) -> int:
+        assert self._buffer is not None  # noqa: S101
+        if linger:
+            batch = [await self._buffer.get()]
+        elif self._buffer.empty():
+            return 0
+        else:
+            batch = [self._buffer.get_nowait()]
+        self._drain(batch)
+        # linger only when the buffer ran dry, a backlog is flushed at once
+        if linger and len(batch) < self._batch_size and self._linger_seconds > 0:
+            await asyncio.sleep(self._linger_seconds)
+            self._drain(batch)
+
+        if not await self._publish(batch):
+            self._dropped += len(batch)
+            return len(batch)
+        self._published += len(batch)
+        self._batches += 1
+        return len(batch)
+
+    async def _publish(self, batch: list[Envelope]) -> bool:
+        try:
+            await self._client_broker.publish_many(batch)
+        except Exception:
+            logger.warning("Relaying %d client events failed, retrying", len(batch), exc_info=True)
+        else:
+            return True
+
+        # a rejected batch gets one more attempt, the relay never holds back later events for it
+        self._retries += 1
+        await asyncio.sleep(self._retry_delay_seconds)
+        try:
+            await self._client_broker.publish_many(batch)
+        except Exception:
+            logger.exception("Dropped %d client events the client broker rejected twice", len(batch))
+            return False
+        return True
+
+    def _drain(self, batch: list[Envelope]) -> None:
+        assert self._buffer is not None  # noqa: S101
+        while len(batch) < self._batch_size and not self._buffer.empty():
+            batch.append(self._buffer.get_nowait())
+
+
+def _strip(envelope: Envelope, internal: frozenset[str]) -> Envelope:
+    if not internal:
+        return envelope
+    data = envelope.payload
+    payload = {k: v for k, v in data["payload"].items() if k not in internal}
+    return Envelope(topic=envelope.topic, payload={**data, "payload": payload})
@@ -2,7 +2,9 @@ from stega_contracts.portfolio.command import CreatePortfolio, DeletePortfolio,
 from stega_contracts.portfolio.port import PortfolioServicePort
 from stega_contracts.portfolio.query import GetPortfolio, ListPortfolios
 from stega_contracts.portfolio.view import PortfolioListView, PortfolioView
-from stega_core import QueryResponse, QueryStatus
+from stega_core import Command, QueryResponse, QueryStatus, get_correlation_id
+
+from stega_edge.config import CommandWait
 
 
 async def get_portfolio(query: GetPortfolio, service: PortfolioServicePort) -> QueryResponse[PortfolioView]:
@@ -23,16 +25,21 @@ async def list_portfolios(query: ListPortfolios, service: PortfolioServicePort)
         )
 
 
-async def create_portfolio(cmd: CreatePortfolio, service: PortfolioServicePort) -> None:
-    async with service:
-        await service.forward(cmd)
+async def create_portfolio(cmd: CreatePortfolio, service: PortfolioServicePort, wait: CommandWait) -> None:
+    await submit(cmd, service, wait)
 
 
-async def update_portfolio(cmd: UpdatePortfolio, service: PortfolioServicePort) -> None:
-    async with service:
-        await service.forward(cmd)
+async def update_portfolio(cmd: UpdatePortfolio, service: PortfolioServicePort, wait: CommandWait) -> None:
+    await submit(cmd, service, wait)
+
+
+async def delete_portfolio(cmd: DeletePortfolio, service: PortfolioServicePort, wait: CommandWait) -> None:
+    await submit(cmd, service, wait)
 
 
-async def delete_portfolio(cmd: DeletePortfolio, service: PortfolioServicePort) -> None:
+async def submit(cmd: Command, service: PortfolioServicePort, wait: CommandWait) -> None:
     async with service:
         await service.forward(cmd)
+        # without a wait the edge records the submission, the owning service settles the outcome
+        if wait.seconds > 0:
+            await service.wait_for_completion(get_correlation_id(), wait.seconds)
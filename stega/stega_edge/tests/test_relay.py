@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Iterable
+
+import pytest
+from stega_contracts.portfolio.event import PortfolioCreated
+from stega_core import Envelope, InMemoryBroker
+from stega_edge.relay import ClientEventRelay
+
+
+class FlakyClientBroker(InMemoryBroker):
+    def __init__(self, failures: int) -> None:
+        super().__init__()
+        self.failures = failures
+        self.published: list[Envelope] = []
+
+    async def publish_many(self, envelopes: Iterable[Envelope]) -> None:
+        if self.failures:
+            self.failures -= 1
+            err_msg = "client broker unavailable"
+            raise RuntimeError(err_msg)
+        self.published.extend(envelopes)
+
+
+def created(portfolio_id: str) -> Envelope:
+    event = PortfolioCreated(correlation_id="c", portfolio_id=portfolio_id, name="p", assets=[])
+    return Envelope(topic=event.topic, payload=event.serialize())
+
+
+async def relay_events(client_broker: FlakyClientBroker, count: int) -> ClientEventRelay:
+    service_broker = InMemoryBroker()
+    await service_broker.start()
+    relay = ClientEventRelay(
+        service_broker=service_broker,
+        client_broker=client_broker,
+        event_types=[PortfolioCreated],
+        linger_seconds=0.0,
+        retry_delay_seconds=0.0,
+    )
+    await relay.start()
+    await asyncio.sleep(0.01)
+    for i in range(count):
+        await service_broker.publish(created(str(i)))
+    async with asyncio.timeout(1.0):
+        while relay.stats().published + relay.stats().dropped < count:  # noqa: ASYNC110
+            await asyncio.sleep(0.001)
+    await relay.stop()
+    await service_broker.stop()
+    return relay
+
+
+@pytest.mark.anyio
+async def test_rejected_batch_is_retried_once() -> None:
+    client_broker = FlakyClientBroker(failures=1)
+
+    relay = await relay_events(client_broker, 3)
+
+    stats = relay.stats()
+    assert [e.payload["payload"]["portfolio_id"] for e in client_broker.published] == ["0", "1", "2"]
+    assert stats.retries == 1
+    assert stats.dropped == 0
+
+
+@pytest.mark.anyio
+async def test_batch_rejected_twice_is_dropped_and_counted(caplog: pytest.LogCaptureFixture) -> None:
+    client_broker = FlakyClientBroker(failures=2)
+
+    relay = await relay_events(client_broker, 1)
+
+    stats = relay.stats()
+    assert client_broker.published == []
+    assert stats.dropped == 1
+    assert stats.published == 0
+    assert "Dropped 1 client events" in caplog.text
+
+
+class FlakyServiceBroker(InMemoryBroker):
+    def __init__(self) -> None:
+        super().__init__()
+        self.subscriptions = 0
+
+    async def subscribe(self, topics: str | Iterable[str]) -> AsyncIterator[Envelope]:
+        self.subscriptions += 1
+        if self.subscriptions == 1:
+            err_msg = "service broker connection lost"
+            raise RuntimeError(err_msg)
+        async for envelope in super().subscribe(topics):
+            yield envelope
+
+
+@pytest.mark.anyio
+async def test_failed_subscription_is_logged_and_restarted(caplog: pytest.LogCaptureFixture) -> None:
+    service_broker = FlakyServiceBroker()
+    client_broker = FlakyClientBroker(failures=0)
+    relay = ClientEventRelay(
+        service_broker=service_broker,
+        client_broker=client_broker,
+        event_types=[PortfolioCreated],
+        linger_seconds=0.0,
+        restart_delay_seconds=0.0,
+    )
+
+    with caplog.at_level(logging.ERROR, logger="stega_edge.relay"):
+        await relay.start()
+        async with asyncio.timeout(1.0):
+            while service_broker.subscriptions < 2:  # noqa: PLR2004, ASYNC110
+                await asyncio.sleep(0.001)
+        await asyncio.sleep(0.01)
+        await service_broker.publish(created("0"))
+        async with asyncio.timeout(1.0):
+            while relay.stats().published < 1:  # noqa: ASYNC110
+                await asyncio.sleep(0.001)
+        await relay.stop()
+
+    assert relay.stats().restarts == 1
+    assert "subscription failed" in caplog.text
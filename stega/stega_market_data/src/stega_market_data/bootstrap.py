@@ -10,12 +10,15 @@ from stega_core import (
     InMemoryBroker,
     RabbitMqBroker,
     RabbitMqConnectionParameters,
+    RabbitMqConsumeOptions,
+    RabbitMqPublishOptions,
     RepositoryRuntime,
     Scope,
     Service,
     ServiceBrokerRuntime,
     ServiceBuilder,
     SqlAlchemyUnitOfWork,
+    build_codec,
 )
 from stega_utils.limiter import QuotaRateLimiter, RateLimiterStack, SmoothingRateLimiter
 
@@ -108,6 +111,18 @@ def build_rabbitmq_service_broker(config: MarketDataConfig) -> RabbitMqBroker:
     return RabbitMqBroker(
         connection_params=connection_params,
         exchange_name=config.SERVICE_BROKER_EXCHANGE_NAME,
+        publish_options=RabbitMqPublishOptions(
+            buffer_size=config.SERVICE_BROKER_PUBLISH_BUFFER_SIZE,
+            batch_size=config.SERVICE_BROKER_PUBLISH_BATCH_SIZE,
+            linger_seconds=config.SERVICE_BROKER_PUBLISH_LINGER_SECONDS,
+            channels=config.SERVICE_BROKER_PUBLISH_CHANNELS,
+        ),
+        consume_options=RabbitMqConsumeOptions(
+            queue_name=f"{config.SERVICE_BROKER_EXCHANGE_NAME}.stega_market_data",
+            prefetch=config.SERVICE_BROKER_PREFETCH,
+            concurrency=config.SERVICE_BROKER_CONSUMER_CONCURRENCY,
+        ),
+        codec=build_codec(config.CODEC),
     )
 
 
@@ -119,7 +134,7 @@ def build_service(config: MarketDataConfig) -> Service:
     sqlite_session_factory = functools.partial(build_sqlite_session_factory, config)
     postgres_session_factory = functools.partial(build_postgres_session_factory, config)
 
-    builder = ServiceBuilder(config)
+    builder = ServiceBuilder(config).with_codec(build_codec(config.CODEC))
     # set runtimes
     builder = builder.with_repository_runtime("REPOSITORY_RUNTIME").with_service_broker_runtime(
         "SERVICE_BROKER_RUNTIME"
@@ -151,6 +166,9 @@ def build_service(config: MarketDataConfig) -> Service:
     }
     builder = builder.with_service_broker(service_broker_factories)
 
+    # consume the events this service reacts to from the service broker
+    builder = builder.with_event_consumer(concurrency=config.SERVICE_BROKER_CONSUMER_CONCURRENCY)
+
     # create providers
     builder = builder.with_dependency(
         HttpProviderChannel, Scope.SINGLETON, lambda: build_eod_channel(config)
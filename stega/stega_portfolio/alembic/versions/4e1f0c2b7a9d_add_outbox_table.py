@@ -0,0 +1,39 @@
+"""Add outbox table.
+
+Revision ID: 4e1f0c2b7a9d
+Revises: 91c71382362b
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4e1f0c2b7a9d"
+down_revision: str | Sequence[str] | None = "91c71382362b"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "outbox",
+        sa.Column("_id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), autoincrement=True, nullable=False),
+        sa.Column("topic", sa.String(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("_id"),
+    )
+    op.create_index("ix_outbox_sent_at", "outbox", ["sent_at", "_id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_outbox_sent_at", table_name="outbox")
+    op.drop_table("outbox")
@@ -6,23 +6,31 @@ from urllib.parse import quote_plus
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from stega_core import (
     InMemoryBroker,
+    InMemoryBusMetrics,
+    InMemoryQueryCache,
     RabbitMqBroker,
     RabbitMqConnectionParameters,
+    RabbitMqConsumeOptions,
+    RabbitMqPublishOptions,
     ReaderRuntime,
     RepositoryRuntime,
     Service,
     ServiceBrokerRuntime,
     ServiceBuilder,
+    SqlAlchemyOutbox,
     SqlAlchemyQueryContext,
     SqlAlchemyUnitOfWork,
+    build_codec,
 )
 
 from stega_portfolio.config import PortfolioConfig
+from stega_portfolio.ports.orm import outbox_table
 from stega_portfolio.ports.reader.base import PortfolioReader
 from stega_portfolio.ports.reader.sqlalchemy import SqlAlchemyPortfolioReader
 from stega_portfolio.ports.repository.base import PortfolioRepository
 from stega_portfolio.ports.repository.sqlalchemy import SqlAlchemyPortfolioRepository
 from stega_portfolio.services.handlers import (
+    CACHE_RULES,
     COMMAND_HANDLERS,
     EVENT_HANDLERS,
     QUERY_HANDLERS,
@@ -87,6 +95,18 @@ def build_rabbitmq_service_broker(config: PortfolioConfig) -> RabbitMqBroker:
     return RabbitMqBroker(
         connection_params=connection_params,
         exchange_name=config.SERVICE_BROKER_EXCHANGE_NAME,
+        publish_options=RabbitMqPublishOptions(
+            buffer_size=config.SERVICE_BROKER_PUBLISH_BUFFER_SIZE,
+            batch_size=config.SERVICE_BROKER_PUBLISH_BATCH_SIZE,
+            linger_seconds=config.SERVICE_BROKER_PUBLISH_LINGER_SECONDS,
+            channels=config.SERVICE_BROKER_PUBLISH_CHANNELS,
+        ),
+        consume_options=RabbitMqConsumeOptions(
+            queue_name=f"{config.SERVICE_BROKER_EXCHANGE_NAME}.stega_portfolio",
+            prefetch=config.SERVICE_BROKER_PREFETCH,
+            concurrency=config.SERVICE_BROKER_CONSUMER_CONCURRENCY,
+        ),
+        codec=build_codec(config.CODEC),
     )
 
 
@@ -98,7 +118,7 @@ def build_service(config: PortfolioConfig) -> Service:
     sqlite_session_factory = functools.partial(build_sqlite_session_factory, config)
     postgres_session_factory = functools.partial(build_postgres_session_factory, config)
 
-    builder = ServiceBuilder(config)
+    builder = ServiceBuilder(config).with_codec(build_codec(config.CODEC))
     # set runtimes
     builder = (
         builder.with_repository_runtime("REPOSITORY_RUNTIME")
@@ -123,6 +143,7 @@ def build_service(config: PortfolioConfig) -> Service:
         builder.with_unit_of_work_sessions(uow_session_factories)
         .with_unit_of_work(uow_classes)
         .with_repository(PortfolioRepository, portfolio_repositories)
+        .with_outbox(SqlAlchemyOutbox(outbox_table))
     )
 
     # create reader constructs
@@ -151,6 +172,9 @@ def build_service(config: PortfolioConfig) -> Service:
     }
     builder = builder.with_service_broker(service_broker_factories)
 
+    # consume the events this service reacts to from the service broker
+    builder = builder.with_event_consumer(concurrency=config.SERVICE_BROKER_CONSUMER_CONCURRENCY)
+
     # create handlers
     builder = (
         builder.with_command_handlers(COMMAND_HANDLERS)
@@ -159,4 +183,11 @@ def build_service(config: PortfolioConfig) -> Service:
         .with_service_events(SERVICE_EVENTS)
     )
 
+    # cache query results until an event invalidates them
+    if config.QUERY_CACHE:
+        builder = builder.with_query_cache(InMemoryQueryCache(CACHE_RULES))
+
+    # instrument the message bus
+    builder = builder.with_bus_metrics(InMemoryBusMetrics())
+
     return builder.build(logging.getLogger(__name__))
@@ -3,6 +3,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, ClassVar
 
 from stega_contracts.portfolio.event import (
+    AssetAllocation,
     PortfolioCreated,
     PortfolioDeleted,
     PortfolioUpdated,
@@ -46,7 +47,7 @@ class Portfolio(Aggregate):
         event = PortfolioCreated(
             portfolio_id=self.portfolio_id,
             name=self.name,
-            assets=self.assets,
+            assets=[AssetAllocation(symbol=asset.symbol, weight=asset.weight) for asset in self.assets],
         )
         self.record(event)
 
@@ -1,19 +1,25 @@
-import asyncio
+import functools
 import logging
 
+from quart import Quart
 from stega_contracts.portfolio.routes import ROUTES
 from stega_core import (
     RepositoryRuntime,
     build_quart_app,
     init_logger,
-    serve_hypercorn,
+    run_hypercorn,
 )
 
 from stega_portfolio.bootstrap import build_service, get_db_uri
-from stega_portfolio.config import create_config
+from stega_portfolio.config import PortfolioConfig, create_config
 from stega_portfolio.ports.orm import init_metadata, start_mappers
 
 
+def create_app(config: PortfolioConfig) -> Quart:
+    service = build_service(config)
+    return build_quart_app(service, ROUTES)
+
+
 def run_rest_app() -> None:
     # setup config and logger
     config = create_config()
@@ -24,11 +30,7 @@ def run_rest_app() -> None:
     )
     logger = logging.getLogger(__name__)
 
-    # build service and app
-    service = build_service(config)
-    app = build_quart_app(service, ROUTES)
-
-    # start mappers if persisted runtime
+    # start mappers if persisted runtime, once before any worker builds its service
     is_sqlalchemy = RepositoryRuntime.SQLITE | RepositoryRuntime.POSTGRES
     if bool(config.REPOSITORY_RUNTIME & is_sqlalchemy):
         logger.info("Initializing metadata & starting mappers...")
@@ -36,11 +38,14 @@ def run_rest_app() -> None:
         init_metadata(db_uri)
         start_mappers()
 
-    asyncio.run(
-        serve_hypercorn(
-            app=app,
-            log_level=config.LOG_LEVEL,
-            host=config.HOST,
-            port=config.PORT,
-        )
+    # build service and app in every worker
+    run_hypercorn(
+        functools.partial(create_app, config),
+        log_level=config.LOG_LEVEL,
+        host=config.HOST,
+        port=config.PORT,
+        workers=config.WORKERS,
+        keep_alive=config.KEEP_ALIVE,
+        backlog=config.BACKLOG,
+        use_uvloop=config.UVLOOP,
     )
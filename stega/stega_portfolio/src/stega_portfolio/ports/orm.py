@@ -11,6 +11,7 @@ from sqlalchemy import (
     event,
 )
 from sqlalchemy.orm import registry, relationship
+from stega_core import build_outbox_table
 
 from stega_portfolio.domain.portfolio import Portfolio, PortfolioAsset
 
@@ -52,6 +53,9 @@ asset_table = Table(
 )
 
 
+outbox_table = build_outbox_table(metadata)
+
+
 def init_metadata(db_uri: str) -> None:
     engine = create_engine(db_uri)
     metadata.create_all(engine)
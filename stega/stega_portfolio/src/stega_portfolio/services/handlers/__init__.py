@@ -3,6 +3,11 @@ from stega_contracts.portfolio.event import (
     PortfolioDeleted,
     PortfolioUpdated,
 )
+from stega_contracts.portfolio.query import (
+    GetPortfolio,
+    ListPortfolios,
+)
+from stega_core import CacheRule
 
 from stega_portfolio.services.handlers.portfolio import (
     create_portfolio,
@@ -29,3 +34,15 @@ SERVICE_EVENTS = [
     PortfolioUpdated,
 ]
 EVENT_HANDLERS = []
+
+CACHE_RULES = [
+    CacheRule(
+        query_type=GetPortfolio,
+        invalidated_by=(PortfolioCreated, PortfolioDeleted, PortfolioUpdated),
+        match=lambda query, event: query.portfolio_id == event.portfolio_id,
+    ),
+    CacheRule(
+        query_type=ListPortfolios,
+        invalidated_by=(PortfolioCreated, PortfolioDeleted, PortfolioUpdated),
+    ),
+]